@@ -0,0 +1,56 @@
+"""Per-request authentication overhead before and after the cached dependency.
+
+"before" re-verifies the HS256 JWT on every request (the old per-router
+helpers); "after" goes through security.decode_token, which serves verified
+claims from an LRU until `exp`. On /api/auth/me the profile cache also saves
+the `db.get(User, ...)` round trip, which is not measured here.
+
+    python -m benchmarks.bench_auth --iterations 20000
+"""
+import argparse
+import json
+import time
+import uuid
+
+import security
+from schemas import create_access_token, verify_access_token
+
+
+def _per_call_us(fn, tokens, iterations: int) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(tokens[i % len(tokens)])
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=200)
+    args = parser.parse_args()
+
+    tokens = [
+        create_access_token({"userId": str(uuid.uuid4()), "email": f"u{i}@example.com"})
+        for i in range(args.users)
+    ]
+    security._token_cache.clear()
+
+    before = _per_call_us(verify_access_token, tokens, args.iterations)
+    after = _per_call_us(security.decode_token, tokens, args.iterations)
+
+    print(
+        json.dumps(
+            {
+                "users": args.users,
+                "iterations": args.iterations,
+                "verify_every_request_us": round(before, 2),
+                "cached_decode_us": round(after, 2),
+                "speedup": round(before / after, 1),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
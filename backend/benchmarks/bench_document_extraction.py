@@ -0,0 +1,73 @@
+"""Text extraction throughput for PDF, DOCX and XLSX versions of the same document.
+
+Each format is generated from the same synthetic lecture text and extracted
+with the worker functions the upload endpoint uses, once in full and once
+with the default EXTRACTION_CHAR_BUDGET. PDFs use PDF_EXTRACTION_BACKEND;
+see bench_pdf_backends for a comparison of the PDF backends.
+
+    python -m benchmarks.bench_document_extraction --pages 200 --repeat 3
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.sample_docs import make_docx, make_pdf, make_xlsx
+from extraction import EXTRACTION_CHAR_BUDGET, PDF_EXTRACTION_BACKEND, _extract_pdf_pages
+from ooxml import extract_docx_text, extract_xlsx_text
+
+
+def _pdf(pages: int):
+    return lambda path, budget: "\n".join(
+        _extract_pdf_pages(path, 0, pages, budget, PDF_EXTRACTION_BACKEND)
+    )[:budget]
+
+
+def _best_of(extract, path: str, budget: int, repeat: int):
+    best, text = float("inf"), ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = extract(path, budget)
+        best = min(best, time.perf_counter() - start)
+    return best, len(text)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    formats = {
+        "pdf": (make_pdf(args.pages), _pdf(args.pages)),
+        "docx": (make_docx(args.pages), extract_docx_text),
+        "xlsx": (make_xlsx(args.pages), extract_xlsx_text),
+    }
+    report = {
+        "pages": args.pages,
+        "budget_chars": EXTRACTION_CHAR_BUDGET,
+        "pdf_backend": PDF_EXTRACTION_BACKEND,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (content, extract) in formats.items():
+            path = os.path.join(tmp, f"lecture.{name}")
+            with open(path, "wb") as f:
+                f.write(content)
+            full_s, chars = _best_of(extract, path, sys.maxsize, args.repeat)
+            budget_s, budget_chars = _best_of(extract, path, EXTRACTION_CHAR_BUDGET, args.repeat)
+            report[name] = {
+                "file_kb": round(len(content) / 1024, 1),
+                "chars": chars,
+                "full_s": round(full_s, 3),
+                "pages_per_s": round(args.pages / full_s, 1),
+                "mchars_per_s": round(chars / full_s / 1e6, 2),
+                "budget_s": round(budget_s, 3),
+                "budget_chars": budget_chars,
+            }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
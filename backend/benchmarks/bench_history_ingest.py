@@ -0,0 +1,76 @@
+"""Quiz-result ingestion throughput: single-row POSTs vs the batch endpoint.
+
+Needs a running backend and database:
+
+    python -m benchmarks.bench_history_ingest --base-url http://127.0.0.1:8000 --results 500
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import httpx
+
+
+async def _token(client: httpx.AsyncClient) -> str:
+    email = f"ingest-{uuid.uuid4().hex[:12]}@example.com"
+    creds = {"email": email, "password": "ingest-password"}
+    await client.post("/api/auth/register", json={"name": "Ingest", **creds})
+    resp = await client.post("/api/auth/login", json=creds)
+    resp.raise_for_status()
+    return resp.cookies["auth_token"]
+
+
+def _results(count: int) -> list:
+    rng = random.Random(3)
+    topics = ["Algebra", "Biology", "History", "Physics", "Databases"]
+    return [
+        {"topic": rng.choice(topics), "score": rng.randint(0, 10), "total_questions": 10}
+        for _ in range(count)
+    ]
+
+
+async def run(base_url: str, count: int, concurrency: int) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        headers = {"Authorization": f"Bearer {await _token(client)}"}
+        results = _results(count)
+
+        sem = asyncio.Semaphore(concurrency)
+
+        async def single(item: dict) -> None:
+            async with sem:
+                resp = await client.post("/api/history/quiz", json=item, headers=headers)
+                resp.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(single(item) for item in results))
+        single_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        resp = await client.post("/api/history/quiz/batch", json=results, headers=headers)
+        resp.raise_for_status()
+        batch_s = time.perf_counter() - start
+
+    return {
+        "results": count,
+        "single_row_seconds": round(single_s, 3),
+        "single_row_rows_per_sec": round(count / single_s, 1),
+        "batch_seconds": round(batch_s, 3),
+        "batch_rows_per_sec": round(count / batch_s, 1),
+        "speedup": round(single_s / batch_s, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--results", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.base_url, args.results, args.concurrency)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
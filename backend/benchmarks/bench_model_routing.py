@@ -0,0 +1,98 @@
+"""Model routing under a degraded primary model.
+
+Runs short `ai_chat` turns against the stub LLM, where each model has its own
+time to first token, in three phases: healthy, primary model slowed past the
+TTFT SLO, and primary recovered. Reports the models the router chose and the
+client-observed TTFT per phase.
+
+    python -m benchmarks.bench_model_routing --requests 60 --concurrency 4
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import Counter
+
+import upstream
+from benchmarks.stub_llm import STUB_CONFIG, StubServer
+from model_router import FAST_MODEL, LARGE_MODEL, model_router
+
+MESSAGES = [{"role": "user", "content": "What is a binary search tree?"}]
+
+
+async def _one(client) -> tuple:
+    route = model_router.route("ai_chat", MESSAGES)
+    start = time.perf_counter()
+    stream = await upstream.open_chat_completion(
+        client,
+        {"model": route.model, "messages": MESSAGES},
+        "bench failed",
+        endpoint="ai_chat",
+        requester="bench",
+    )
+    ttft = None
+    async for _ in stream:
+        if ttft is None:
+            ttft = time.perf_counter() - start
+    return route.model, ttft or 0.0
+
+
+async def run_phase(client, requests: int, concurrency: int) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def task() -> tuple:
+        async with sem:
+            return await _one(client)
+
+    results = await asyncio.gather(*(task() for _ in range(requests)))
+    ttfts = sorted(ttft for _, ttft in results)
+    return {
+        "models": dict(Counter(model for model, _ in results)),
+        "ttft_p50_ms": round(statistics.median(ttfts) * 1000, 1),
+        "ttft_p95_ms": round(ttfts[int(len(ttfts) * 0.95) - 1] * 1000, 1),
+    }
+
+
+async def main_async(args) -> dict:
+    client = upstream.create_upstream_client()
+    phases = {}
+    try:
+        STUB_CONFIG["model_ttft_ms"] = {FAST_MODEL: args.fast_ms, LARGE_MODEL: args.large_ms}
+        phases["healthy"] = await run_phase(client, args.requests, args.concurrency)
+
+        STUB_CONFIG["model_ttft_ms"] = {FAST_MODEL: args.degraded_ms, LARGE_MODEL: args.large_ms}
+        phases["primary_degraded"] = await run_phase(client, args.requests, args.concurrency)
+
+        STUB_CONFIG["model_ttft_ms"] = {FAST_MODEL: args.fast_ms, LARGE_MODEL: args.large_ms}
+        await asyncio.sleep(model_router.window_seconds)
+        phases["primary_recovered"] = await run_phase(client, args.requests, args.concurrency)
+    finally:
+        await client.aclose()
+    return phases
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=60, help="requests per phase")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--fast-ms", type=float, default=40)
+    parser.add_argument("--large-ms", type=float, default=300)
+    parser.add_argument("--degraded-ms", type=float, default=2500)
+    parser.add_argument("--window-seconds", type=float, default=3, help="router sample window")
+    args = parser.parse_args()
+
+    model_router.window_seconds = args.window_seconds
+    with StubServer(tokens=10, tokens_per_sec=500) as stub:
+        upstream.GROQ_BASE_URL = stub.base_url
+        phases = asyncio.run(main_async(args))
+    print(
+        json.dumps(
+            {"slo_ms": model_router.ttft_slo * 1000, "window_s": args.window_seconds, "phases": phases},
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Pages/sec and peak memory of each PDF extraction backend on the checked-in corpus.
+
+Every (backend, file) pair runs in a fresh subprocess, so the reported peak
+RSS growth is that backend's alone, measured from after the imports. Text
+is extracted in full (no character budget) in a single process, without
+the pool.
+
+    python -m benchmarks.bench_pdf_backends --repeat 3
+    python -m benchmarks.bench_pdf_backends --backends pdfium,pdfplumber
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.build_pdf_corpus import CORPUS_DIR
+from pdf_backends import PDF_BACKENDS
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _measure(backend: str, path: str, repeat: int) -> dict:
+    engine = PDF_BACKENDS[backend]
+    baseline_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    best = float("inf")
+    pages = chars = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pages = engine.count_pages(path)
+        texts = list(engine.iter_pages(path, 0, pages))
+        best = min(best, time.perf_counter() - start)
+        chars = sum(len(text) for text in texts)
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "pages": pages,
+        "chars": chars,
+        "seconds": round(best, 3),
+        "pages_per_s": round(pages / best, 1) if best else None,
+        "peak_rss_growth_mb": round((peak_kib - baseline_kib) / 1024, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", default=",".join(PDF_BACKENDS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", nargs=2, metavar=("BACKEND", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_measure(args.child[0], args.child[1], args.repeat)))
+        return
+
+    report = {}
+    for path in sorted(CORPUS_DIR.glob("*.pdf")):
+        report[path.name] = {}
+        for backend in args.backends.split(","):
+            out = subprocess.check_output(
+                [
+                    sys.executable, "-m", "benchmarks.bench_pdf_backends",
+                    "--repeat", str(args.repeat), "--child", backend, str(path),
+                ],
+                cwd=BACKEND_DIR,
+                text=True,
+            )
+            report[path.name][backend] = json.loads(out)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""BM25 index build time and query latency for document chat.
+
+The synthetic document is cut to EXTRACTION_CHAR_BUDGET first, since that is
+all the upload pipeline stores and indexes.
+
+    python -m benchmarks.bench_retrieval --pages 500 --queries 200
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.sample_docs import WORDS, lecture_text
+from extraction import EXTRACTION_CHAR_BUDGET
+from retrieval import build_index, estimate_tokens, select_context
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    document = "\n".join("\n".join(lines) for lines in lecture_text(args.pages))
+    text = document[:EXTRACTION_CHAR_BUDGET]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = build_index(text)
+    build_ms = (time.perf_counter() - start) * 1000
+    index_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rng = random.Random(1)
+    latencies = []
+    context_tokens = []
+    for _ in range(args.queries):
+        query = f"explain {rng.choice(WORDS)} and {rng.choice(WORDS)} in chapter {rng.randint(1, 50)}"
+        start = time.perf_counter()
+        context = select_context(index, query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        context_tokens.append(estimate_tokens(context))
+
+    latencies.sort()
+    print(
+        json.dumps(
+            {
+                "pages": args.pages,
+                "document_chars": len(document),
+                "indexed_chars": len(text),
+                "chunks": len(index.chunks),
+                "terms": len(index.postings),
+                "build_ms": round(build_ms, 2),
+                "index_mb": round(index_bytes / (1024 * 1024), 1),
+                "query_p50_ms": round(statistics.median(latencies), 3),
+                "query_p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 3),
+                "context_tokens_mean": round(statistics.fmean(context_tokens), 1),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
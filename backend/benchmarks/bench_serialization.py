@@ -0,0 +1,88 @@
+"""List-endpoint serialization: per-row Pydantic + stdlib json vs row dicts + orjson.
+
+"before" mirrors the old list_assignments path (AssignmentRead per row,
+model_dump(mode="json"), JSONResponse); "after" is the current one (plain
+dicts from column rows rendered by ORJSONResponse). Database time is not
+included.
+
+    python -m benchmarks.bench_serialization --rows 1000 10000
+"""
+import argparse
+import json
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from routers.assignments import _assignment_out
+from schemas import AssignmentRead
+
+Row = namedtuple("Row", "id user_id title course status score created_at")
+
+
+def _rows(count: int) -> list:
+    user_id = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    return [
+        Row(uuid.uuid4(), user_id, f"Assignment {i}", "Databases", "Pending", "-", now - timedelta(minutes=i))
+        for i in range(count)
+    ]
+
+
+def before(rows: list) -> bytes:
+    content = {
+        "assignments": [
+            AssignmentRead(
+                id=a.id,
+                user_id=a.user_id,
+                title=a.title,
+                course=a.course,
+                status=a.status,
+                score=a.score or "-",
+                createdAt=a.created_at,
+            ).model_dump(mode="json")
+            for a in rows
+        ]
+    }
+    return JSONResponse(content=content).body
+
+
+def after(rows: list) -> bytes:
+    return ORJSONResponse(content={"assignments": [_assignment_out(a) for a in rows]}).body
+
+
+def _best_ms(fn, rows: list, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    report = []
+    for count in args.rows:
+        rows = _rows(count)
+        old_ms = _best_ms(before, rows, args.repeat)
+        new_ms = _best_ms(after, rows, args.repeat)
+        report.append(
+            {
+                "rows": count,
+                "pydantic_stdlib_json_ms": old_ms,
+                "row_dicts_orjson_ms": new_ms,
+                "speedup": round(old_ms / new_ms, 1),
+            }
+        )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Server memory under concurrent large uploads.
+
+Starts the upload endpoint alone in a uvicorn subprocess (no database
+needed), sends `--concurrency` simultaneous uploads of a large PDF and of a
+large text file, and reports the server's RSS growth over its idle baseline
+(peak of the server process and of the extraction pool children) and
+request latency.
+
+    python -m benchmarks.bench_upload_memory --pdf-pages 3000 --text-mb 40 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+from fastapi import FastAPI
+
+from benchmarks.sample_docs import lecture_text, make_pdf
+from benchmarks.stub_llm import free_port
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    from extraction import shutdown_extraction_pool, start_extraction_pool
+
+    start_extraction_pool()
+    try:
+        yield
+    finally:
+        shutdown_extraction_pool()
+
+
+def create_app() -> FastAPI:
+    from routers import quizzes
+
+    app = FastAPI(lifespan=_lifespan)
+    app.include_router(quizzes.router, prefix="/api/quizzes")
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    return app
+
+
+def _rss_kib(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+class RssSampler:
+    """Samples the server's and its children's RSS every few milliseconds."""
+
+    def __init__(self, pid: int, interval: float = 0.005):
+        self.pid = pid
+        self.interval = interval
+        self.server_peak = 0
+        self.children_peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.server_peak = max(self.server_peak, _rss_kib(self.pid))
+            self.children_peak = max(
+                self.children_peak, sum(_rss_kib(child) for child in _children(self.pid))
+            )
+            time.sleep(self.interval)
+
+    def __enter__(self) -> "RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+async def _upload_all(base_url: str, filename: str, content: bytes, concurrency: int) -> Dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+
+        async def one(i: int):
+            # A distinct trailing byte per request defeats the content-hash dedup.
+            body = content + b"\n%d" % i
+            start = time.perf_counter()
+            resp = await client.post(
+                "/api/quizzes/upload", files={"file": (filename, body, "application/octet-stream")}
+            )
+            return resp.status_code, time.perf_counter() - start, resp.json().get("characters")
+
+        results = await asyncio.gather(*(one(i) for i in range(concurrency)))
+    latencies = sorted(latency for _, latency, _ in results)
+    return {
+        "statuses": sorted({status for status, _, _ in results}),
+        "characters": results[0][2],
+        "latency_p50_s": round(latencies[len(latencies) // 2], 3),
+        "latency_max_s": round(latencies[-1], 3),
+    }
+
+
+def _wait_healthy(base_url: str, proc: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit("server exited during startup")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit("server did not become healthy")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf-pages", type=int, default=3000)
+    parser.add_argument("--text-mb", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    pdf = make_pdf(args.pdf_pages)
+    line = " ".join(" ".join(lines) for lines in lecture_text(1)).encode() + b"\n"
+    text = line * (args.text_mb * 1024 * 1024 // len(line))
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    # A fresh document store, so uploads are not answered from an earlier run's spill.
+    store_dir = tempfile.mkdtemp(prefix="mentoro-bench-documents-")
+    env = {
+        **os.environ,
+        "UPLOAD_MAX_BYTES": str(max(len(pdf), len(text)) + 1024),
+        "DOCUMENT_STORE_DIR": store_dir,
+    }
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "benchmarks.bench_upload_memory:create_app",
+            "--factory", "--port", str(port), "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    try:
+        _wait_healthy(base_url, proc)
+        report = {"concurrency": args.concurrency}
+        for name, filename, content in (("pdf", "lecture.pdf", pdf), ("text", "notes.txt", text)):
+            time.sleep(1)
+            baseline = _rss_kib(proc.pid)
+            children_baseline = sum(_rss_kib(child) for child in _children(proc.pid))
+            with RssSampler(proc.pid) as sampler:
+                result = asyncio.run(_upload_all(base_url, filename, content, args.concurrency))
+            report[name] = {
+                "upload_mb": round(len(content) / (1024 * 1024), 1),
+                **result,
+                "server_rss_growth_mb": round((sampler.server_peak - baseline) / 1024, 1),
+                "pool_rss_growth_mb": round(
+                    (sampler.children_peak - children_baseline) / 1024, 1
+                ),
+            }
+        print(json.dumps(report, indent=2))
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Per-request vs shared pooled upstream client.
+
+Measures time to first byte against the local stub LLM, comparing a fresh
+`httpx.AsyncClient` per call (the old router behaviour) with the shared
+client built by `upstream.create_upstream_client()`.
+
+    python -m benchmarks.bench_upstream_client --requests 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+import upstream
+from benchmarks.stub_llm import StubServer
+
+PAYLOAD = {
+    "model": "llama-3.3-70b-versatile",
+    "messages": [{"role": "user", "content": "ping"}],
+    "stream": True,
+}
+
+
+async def _one(client: httpx.AsyncClient) -> float:
+    start = time.perf_counter()
+    ttfb = None
+    async with client.stream("POST", "/chat/completions", json=PAYLOAD) as resp:
+        async for _ in resp.aiter_bytes():
+            if ttfb is None:
+                ttfb = time.perf_counter() - start
+    return ttfb or 0.0
+
+
+async def run_fresh(base_url: str, requests: int, concurrency: int) -> list:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def task() -> float:
+        async with sem:
+            async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+                return await _one(client)
+
+    return await asyncio.gather(*(task() for _ in range(requests)))
+
+
+async def run_shared(requests: int, concurrency: int) -> list:
+    sem = asyncio.Semaphore(concurrency)
+    client = upstream.create_upstream_client()
+
+    async def task() -> float:
+        async with sem:
+            return await _one(client)
+
+    try:
+        return await asyncio.gather(*(task() for _ in range(requests)))
+    finally:
+        await client.aclose()
+
+
+def _summary(samples: list) -> dict:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p99_ms": round(ordered[int(len(ordered) * 0.99) - 1] * 1000, 2),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--ttft-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    with StubServer(ttft_ms=args.ttft_ms, tokens=5, tokens_per_sec=0) as stub:
+        upstream.GROQ_BASE_URL = stub.base_url
+        fresh = asyncio.run(run_fresh(stub.base_url, args.requests, args.concurrency))
+        shared = asyncio.run(run_shared(args.requests, args.concurrency))
+
+    print(
+        json.dumps(
+            {"fresh_client": _summary(fresh), "shared_client": _summary(shared)},
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""SQL statements and latency per request of the single-row write endpoints.
+
+Needs a running backend with one worker (the statement counts come from that
+worker's /metrics, `http_request_db_queries`) and its database:
+
+    uvicorn main:app --port 8000
+    python -m benchmarks.bench_write_roundtrips --base-url http://127.0.0.1:8000 --requests 200
+
+Requests are sent one at a time, so latency is dominated by round trips to
+Postgres. Each endpoint runs as its own phase and the metrics are scraped
+around it, which keeps PUT and DELETE on the same route template apart.
+Statement counts exclude the BEGIN and COMMIT of the transaction.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+from benchmarks.loadtest import _percentiles
+
+
+async def _db_queries(client: httpx.AsyncClient) -> Dict[str, Tuple[float, float]]:
+    """route -> (statements, requests) so far."""
+    resp = await client.get("/metrics")
+    resp.raise_for_status()
+    totals: Dict[str, List[float]] = {}
+    for family in text_string_to_metric_families(resp.text):
+        if family.name != "http_request_db_queries":
+            continue
+        for sample in family.samples:
+            entry = totals.setdefault(sample.labels["route"], [0.0, 0.0])
+            if sample.name.endswith("_sum"):
+                entry[0] = sample.value
+            elif sample.name.endswith("_count"):
+                entry[1] = sample.value
+    return {route: (s, n) for route, (s, n) in totals.items()}
+
+
+async def _phase(
+    client: httpx.AsyncClient,
+    route: str,
+    count: int,
+    send: Callable[[int], Awaitable[httpx.Response]],
+    expect: int,
+) -> dict:
+    before = (await _db_queries(client)).get(route, (0.0, 0.0))
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        resp = await send(i)
+        latencies.append(time.perf_counter() - start)
+        if resp.status_code != expect:
+            raise RuntimeError(f"{route}: expected {expect}, got {resp.status_code}: {resp.text}")
+    after = (await _db_queries(client)).get(route, (0.0, 0.0))
+    requests = after[1] - before[1]
+    return {
+        "requests": count,
+        "statements_per_request": round((after[0] - before[0]) / requests, 2) if requests else None,
+        "latency_ms": _percentiles(sorted(latencies)),
+    }
+
+
+async def run(base_url: str, count: int) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        prefix = uuid.uuid4().hex[:8]
+        creds = {"email": f"writes-{prefix}@example.com", "password": "writes-password"}
+        await client.post("/api/auth/register", json={"name": "Writes", **creds})
+        resp = await client.post("/api/auth/login", json=creds)
+        resp.raise_for_status()
+        headers = {"Authorization": f"Bearer {resp.cookies['auth_token']}"}
+        assignment_ids: List[str] = []
+
+        async def register(i: int) -> httpx.Response:
+            return await client.post(
+                "/api/auth/register",
+                json={
+                    "name": "Writes",
+                    "email": f"writes-{prefix}-{i}@example.com",
+                    "password": "writes-password",
+                },
+            )
+
+        async def register_duplicate(i: int) -> httpx.Response:
+            return await client.post("/api/auth/register", json={"name": "Writes", **creds})
+
+        async def update_me(i: int) -> httpx.Response:
+            return await client.patch(
+                "/api/auth/me", json={"study_hours_per_week": i % 40 + 1}, headers=headers
+            )
+
+        async def create_assignment(i: int) -> httpx.Response:
+            resp = await client.post(
+                "/api/assignments", json={"title": f"Essay {i}", "course": "History"}, headers=headers
+            )
+            if resp.status_code == 201:
+                assignment_ids.append(resp.json()["assignment"]["id"])
+            return resp
+
+        async def update_assignment(i: int) -> httpx.Response:
+            return await client.put(
+                f"/api/assignments/{assignment_ids[i]}", json={"status": "Done"}, headers=headers
+            )
+
+        async def delete_assignment(i: int) -> httpx.Response:
+            return await client.delete(f"/api/assignments/{assignment_ids[i]}", headers=headers)
+
+        async def save_quiz_result(i: int) -> httpx.Response:
+            return await client.post(
+                "/api/history/quiz",
+                json={"topic": "Algebra", "score": i % 11, "total_questions": 10},
+                headers=headers,
+            )
+
+        phases = [
+            ("POST /api/auth/register", "/api/auth/register", register, 201),
+            (
+                "POST /api/auth/register (duplicate)",
+                "/api/auth/register",
+                register_duplicate,
+                409,
+            ),
+            ("PATCH /api/auth/me", "/api/auth/me", update_me, 200),
+            ("POST /api/assignments", "/api/assignments", create_assignment, 201),
+            ("PUT /api/assignments/{id}", "/api/assignments/{assignment_id}", update_assignment, 200),
+            ("DELETE /api/assignments/{id}", "/api/assignments/{assignment_id}", delete_assignment, 200),
+            ("POST /api/history/quiz", "/api/history/quiz", save_quiz_result, 200),
+        ]
+        return {
+            name: await _phase(client, route, count, send, expect)
+            for name, route, send, expect in phases
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.base_url, args.requests)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Regenerate the checked-in PDF benchmark corpus in benchmarks/pdf_corpus/.
+
+The files are deterministic, so rerunning this only changes them when the
+generator in sample_docs.py changes.
+
+    python -m benchmarks.build_pdf_corpus
+"""
+from pathlib import Path
+
+from benchmarks.sample_docs import make_pdf
+
+CORPUS_DIR = Path(__file__).resolve().parent / "pdf_corpus"
+
+# name -> make_pdf arguments
+CORPUS = {
+    "lecture_60p.pdf": dict(pages=60),
+    "lecture_flate_300p.pdf": dict(pages=300, compress=True),
+    "dense_20p.pdf": dict(pages=20, lines_per_page=64, compress=True),
+    "two_column_30p.pdf": dict(pages=30, lines_per_page=120, columns=2, compress=True),
+    "no_text_layer_10p.pdf": dict(pages=10, with_text=False, compress=True),
+}
+
+
+def main() -> None:
+    CORPUS_DIR.mkdir(exist_ok=True)
+    for name, kwargs in CORPUS.items():
+        (CORPUS_DIR / name).write_bytes(make_pdf(**kwargs))
+        print(name, (CORPUS_DIR / name).stat().st_size)
+
+
+if __name__ == "__main__":
+    main()
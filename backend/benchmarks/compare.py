@@ -0,0 +1,60 @@
+"""Compare two loadtest.py reports route by route.
+
+    python -m benchmarks.compare bench-base.json bench-head.json --threshold 10
+
+Exits with status 1 if any route's p95 latency or TTFB regressed by more than
+`--threshold` percent, so it can gate CI.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def _change(old: float, new: float) -> float:
+    return round((new - old) / old * 100, 1) if old else 0.0
+
+
+def compare(base: dict, head: dict, threshold: float) -> tuple:
+    rows = []
+    regressed = False
+    for route in sorted(set(base["routes"]) | set(head["routes"])):
+        old = base["routes"].get(route)
+        new = head["routes"].get(route)
+        if not old or not new:
+            rows.append({"route": route, "note": "missing in base" if not old else "missing in head"})
+            continue
+        row = {
+            "route": route,
+            "rps": [old["throughput_rps"], new["throughput_rps"], _change(old["throughput_rps"], new["throughput_rps"])],
+            "p95_ms": [old["latency_ms"]["p95"], new["latency_ms"]["p95"], _change(old["latency_ms"]["p95"], new["latency_ms"]["p95"])],
+            "p99_ms": [old["latency_ms"]["p99"], new["latency_ms"]["p99"], _change(old["latency_ms"]["p99"], new["latency_ms"]["p99"])],
+            "ttfb_p95_ms": [old["ttfb_ms"]["p95"], new["ttfb_ms"]["p95"], _change(old["ttfb_ms"]["p95"], new["ttfb_ms"]["p95"])],
+        }
+        row["regressed"] = row["p95_ms"][2] > threshold or row["ttfb_p95_ms"][2] > threshold
+        regressed = regressed or row["regressed"]
+        rows.append(row)
+    return rows, regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed p95 regression in percent")
+    args = parser.parse_args()
+
+    base = json.loads(Path(args.base).read_text(encoding="utf-8"))
+    head = json.loads(Path(args.head).read_text(encoding="utf-8"))
+    rows, regressed = compare(base, head, args.threshold)
+    print(
+        json.dumps(
+            {"base": base.get("commit"), "head": head.get("commit"), "columns": "[base, head, change %]", "routes": rows},
+            indent=2,
+        )
+    )
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
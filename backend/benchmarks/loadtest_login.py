@@ -0,0 +1,90 @@
+"""Login burst load test: login throughput and /me latency under bcrypt load.
+
+Registers `--users` accounts, then fires a burst of concurrent logins while
+already-authenticated clients keep polling `GET /api/auth/me`. Reports login
+throughput, the share of fast 503 rejections and the p50/p99 of the /me
+requests that ran alongside the burst. Needs a running backend (and its
+database):
+
+    uvicorn main:app --port 8000 &
+    python -m benchmarks.loadtest_login --base-url http://127.0.0.1:8000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+def _pct(samples: list, q: float) -> float:
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000, 2)
+
+
+async def _register_and_login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    await client.post(
+        "/api/auth/register", json={"name": "Load Test", "email": email, "password": password}
+    )
+    resp = await client.post("/api/auth/login", json={"email": email, "password": password})
+    resp.raise_for_status()
+    return resp.cookies["auth_token"]
+
+
+async def run(base_url: str, users: int, logins: int, me_clients: int) -> dict:
+    password = "load-test-password"
+    emails = [f"load-{uuid.uuid4().hex[:12]}@example.com" for _ in range(users)]
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        tokens = await asyncio.gather(*(_register_and_login(client, e, password) for e in emails))
+
+        me_latencies: list = []
+        login_status: dict = {}
+        burst_done = asyncio.Event()
+
+        async def poll_me(token: str) -> None:
+            headers = {"Authorization": f"Bearer {token}"}
+            while not burst_done.is_set():
+                start = time.perf_counter()
+                await client.get("/api/auth/me", headers=headers)
+                me_latencies.append(time.perf_counter() - start)
+
+        async def login(i: int) -> None:
+            resp = await client.post(
+                "/api/auth/login", json={"email": emails[i % users], "password": password}
+            )
+            login_status[resp.status_code] = login_status.get(resp.status_code, 0) + 1
+
+        pollers = [asyncio.create_task(poll_me(tokens[i % users])) for i in range(me_clients)]
+        start = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(logins)))
+        elapsed = time.perf_counter() - start
+        burst_done.set()
+        await asyncio.gather(*pollers)
+
+    return {
+        "logins": logins,
+        "login_status": login_status,
+        "login_throughput_rps": round(login_status.get(200, 0) / elapsed, 2),
+        "burst_seconds": round(elapsed, 3),
+        "me_requests": len(me_latencies),
+        "me_p50_ms": _pct(me_latencies, 0.50),
+        "me_p99_ms": _pct(me_latencies, 0.99),
+        "me_mean_ms": round(statistics.fmean(me_latencies) * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--me-clients", type=int, default=10)
+    args = parser.parse_args()
+    result = asyncio.run(run(args.base_url, args.users, args.logins, args.me_clients))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
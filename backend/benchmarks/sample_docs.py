@@ -0,0 +1,221 @@
+"""Synthetic sample documents for benchmarks.
+
+`make_pdf` writes a minimal, valid text-only PDF, and `make_docx` /
+`make_xlsx` the equivalent Office documents, without third-party
+dependencies so that benchmark inputs are reproducible.
+"""
+import io
+import random
+import zipfile
+import zlib
+from xml.sax.saxutils import escape
+
+WORDS = (
+    "algorithm matrix vector entropy gradient protocol kernel theorem lemma proof "
+    "graph tree heap queue stack cache latency throughput database index transaction "
+    "integral derivative function limit series sequence probability variance mean "
+    "photosynthesis enzyme protein cell membrane nucleus mitochondria osmosis "
+    "economy inflation market demand supply equilibrium elasticity revenue"
+).split()
+
+
+def lecture_text(pages: int, lines_per_page: int = 40, seed: int = 7) -> list:
+    """Return one list of text lines per page."""
+    rng = random.Random(seed)
+    out = []
+    for page in range(pages):
+        lines = [f"Chapter {page // 10 + 1}, page {page + 1}"]
+        for _ in range(lines_per_page - 1):
+            lines.append(" ".join(rng.choice(WORDS) for _ in range(12)))
+        out.append(lines)
+    return out
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_ops(lines: list, columns: int, with_text: bool) -> list:
+    if not with_text:
+        # Vector shapes only, like a scanned page without an OCR text layer.
+        return [f"{40 + (i % 10) * 50} {60 + (i // 10) * 70} 40 50 re f" for i in range(100)]
+    per_column = -(-len(lines) // columns)
+    font = 10 if columns == 1 else 6
+    ops = []
+    for column in range(columns):
+        x = 40 + column * (515 // columns)
+        ops += ["BT", f"/F1 {font} Tf", f"{font + 2} TL", f"{x} 800 Td"]
+        for line in lines[column * per_column:(column + 1) * per_column]:
+            ops.append(f"({_escape(line)}) Tj T*")
+        ops.append("ET")
+    return ops
+
+
+def make_pdf(
+    pages: int,
+    lines_per_page: int = 40,
+    seed: int = 7,
+    columns: int = 1,
+    compress: bool = False,
+    with_text: bool = True,
+) -> bytes:
+    """Text-only PDF of `lecture_text`; optionally multi-column, Flate-compressed or text-less."""
+    page_lines = lecture_text(pages, lines_per_page, seed)
+    objects = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = add(b"")  # placeholder, filled once page ids are known
+    page_ids = []
+    for lines in page_lines:
+        stream = "\n".join(_page_ops(lines, columns, with_text)).encode("latin-1")
+        if compress:
+            stream = zlib.compress(stream)
+        content_id = add(
+            b"<< /Length %d%s >>\nstream\n"
+            % (len(stream), b" /Filter /FlateDecode" if compress else b"")
+            + stream
+            + b"\nendstream"
+        )
+        page_ids.append(
+            add(
+                (
+                    f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 595 842] "
+                    f"/Resources << /Font << /F1 {font_id} 0 R >> >> "
+                    f"/Contents {content_id} 0 R >>"
+                ).encode("latin-1")
+            )
+        )
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects[pages_id - 1] = (
+        f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("latin-1")
+    )
+    catalog_id = add(f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode("latin-1"))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += (
+        b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+        % (len(objects) + 1, catalog_id, xref)
+    )
+    return bytes(out)
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    "{overrides}</Types>"
+)
+
+
+def _zip(parts: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, body in parts.items():
+            archive.writestr(name, body)
+    return buffer.getvalue()
+
+
+def make_docx(pages: int, lines_per_page: int = 40, seed: int = 7) -> bytes:
+    """The text of `make_pdf`, one paragraph per line."""
+    body = []
+    for lines in lecture_text(pages, lines_per_page, seed):
+        for line in lines:
+            body.append(f"<w:p><w:r><w:t>{escape(line)}</w:t></w:r></w:p>")
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{''.join(body)}</w:body></w:document>"
+    )
+    return _zip(
+        {
+            "[Content_Types].xml": _CONTENT_TYPES.format(
+                overrides='<Override PartName="/word/document.xml" ContentType="application/'
+                'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            ),
+            "_rels/.rels": (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/'
+                '2006/relationships/officeDocument" Target="word/document.xml"/></Relationships>'
+            ),
+            "word/document.xml": document,
+        }
+    )
+
+
+def make_xlsx(pages: int, lines_per_page: int = 40, seed: int = 7) -> bytes:
+    """The text of `make_pdf` as one sheet per 10 pages, one row per line, a word per cell.
+
+    Words go through the shared-strings table, as spreadsheet apps write them.
+    """
+    shared: dict = {}
+    sheets = []
+    page_lines = lecture_text(pages, lines_per_page, seed)
+    for first in range(0, pages, 10):
+        rows = []
+        lines = [line for page in page_lines[first:first + 10] for line in page]
+        for number, line in enumerate(lines, start=1):
+            cells = "".join(
+                f'<c t="s"><v>{shared.setdefault(word, len(shared))}</v></c>'
+                for word in line.split()
+            )
+            rows.append(f'<row r="{number}">{cells}</row>')
+        sheets.append(
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            f"<sheetData>{''.join(rows)}</sheetData></worksheet>"
+        )
+    strings = "".join(f"<si><t>{escape(word)}</t></si>" for word in shared)
+    sheet_entries = "".join(
+        f'<sheet name="Chapter {i + 1}" sheetId="{i + 1}" r:id="rId{i + 1}"/>'
+        for i in range(len(sheets))
+    )
+    relationships = "".join(
+        f'<Relationship Id="rId{i + 1}" Type="http://schemas.openxmlformats.org/officeDocument/'
+        f'2006/relationships/worksheet" Target="worksheets/sheet{i + 1}.xml"/>'
+        for i in range(len(sheets))
+    )
+    parts = {
+        "[Content_Types].xml": _CONTENT_TYPES.format(
+            overrides='<Override PartName="/xl/workbook.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        ),
+        "_rels/.rels": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId0" Type="http://schemas.openxmlformats.org/officeDocument/'
+            '2006/relationships/officeDocument" Target="xl/workbook.xml"/></Relationships>'
+        ),
+        "xl/workbook.xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f"<sheets>{sheet_entries}</sheets></workbook>"
+        ),
+        "xl/_rels/workbook.xml.rels": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f"{relationships}</Relationships>"
+        ),
+        "xl/sharedStrings.xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            f"{strings}</sst>"
+        ),
+    }
+    for i, sheet in enumerate(sheets):
+        parts[f"xl/worksheets/sheet{i + 1}.xml"] = sheet
+    return _zip(parts)
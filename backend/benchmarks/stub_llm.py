@@ -0,0 +1,235 @@
+"""Local OpenAI-compatible stand-in for the Groq API.
+
+Streams `chat.completion.chunk` SSE events with a configurable time to first
+token and token rate, so benchmarks never touch the real provider. Quiz
+prompts get a valid quiz JSON array back. `--model-ttft MODEL=MS` gives each
+model its own latency, and `--model-status MODEL=CODE` makes a model answer
+with that HTTP error instead. With `--max-concurrent`, streams beyond that
+limit get a 429 with Retry-After, like the provider's rate limiter.
+
+    python -m benchmarks.stub_llm --port 9100 --ttft-ms 50 --tokens-per-sec 200
+"""
+import argparse
+import asyncio
+import json
+import socket
+import threading
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+STUB_CONFIG = {
+    "ttft_ms": 50.0,
+    "tokens_per_sec": 200.0,
+    "tokens": 40,
+    "max_concurrent": 0,
+    # Per-model time to first token, overriding ttft_ms (e.g. {"llama-3.1-8b-instant": 30}).
+    "model_ttft_ms": {},
+    # Per-model HTTP error status returned instead of a stream (e.g. {"llama-3.3-70b-versatile": 503}).
+    "model_status": {},
+    "retry_after": 1,
+}
+
+
+def _chunk(completion_id: str, model: str, delta: dict, finish_reason=None) -> bytes:
+    body = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(body, separators=(',', ':'))}\n\n".encode("utf-8")
+
+
+def _quiz_reply(count: int = 10) -> str:
+    questions = [
+        {
+            "question": f"Stub question {i + 1}?",
+            "options": [f"Option {i + 1}{letter}" for letter in "ABCD"],
+            "correctAnswer": f"Option {i + 1}A",
+            "explanation": "Stub explanation.",
+        }
+        for i in range(count)
+    ]
+    return json.dumps(questions)
+
+
+def _reply_pieces(body: dict, tokens: int) -> list:
+    """Quiz prompts get a valid quiz JSON array, split into `tokens` pieces; others get filler."""
+    system = next((m.get("content", "") for m in body.get("messages", []) if m.get("role") == "system"), "")
+    if "multiple choice questions" not in system:
+        return [f"tok{i} " for i in range(tokens)]
+    reply = _quiz_reply()
+    size = max(1, -(-len(reply) // max(tokens, 1)))
+    return [reply[i:i + size] for i in range(0, len(reply), size)]
+
+
+def _usage_chunk(completion_id: str, model: str, usage: dict) -> bytes:
+    body = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [],
+        "usage": usage,
+    }
+    return f"data: {json.dumps(body, separators=(',', ':'))}\n\n".encode("utf-8")
+
+
+def create_stub_app() -> FastAPI:
+    app = FastAPI(title="stub llm")
+    state = {"streams": 0, "rate_limited": 0}
+    app.state.stub = state
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "stub")
+        ttft = STUB_CONFIG["model_ttft_ms"].get(model, STUB_CONFIG["ttft_ms"]) / 1000
+        interval = 1 / STUB_CONFIG["tokens_per_sec"] if STUB_CONFIG["tokens_per_sec"] else 0
+        tokens = int(STUB_CONFIG["tokens"])
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        pieces = _reply_pieces(body, tokens)
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in body.get("messages", []))
+
+        if not body.get("stream"):
+            return JSONResponse(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "tok " * tokens},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                }
+            )
+
+        status = STUB_CONFIG["model_status"].get(model)
+        if status:
+            return JSONResponse(
+                {"error": {"message": "Model unavailable", "type": "server_error"}},
+                status_code=status,
+            )
+
+        limit = int(STUB_CONFIG["max_concurrent"])
+        if limit and state["streams"] >= limit:
+            state["rate_limited"] += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                status_code=429,
+                headers={"Retry-After": str(STUB_CONFIG["retry_after"])},
+            )
+        state["streams"] += 1
+
+        async def events():
+            try:
+                await asyncio.sleep(ttft)
+                yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+                for piece in pieces:
+                    yield _chunk(completion_id, model, {"content": piece})
+                    if interval:
+                        await asyncio.sleep(interval)
+                yield _chunk(completion_id, model, {}, finish_reason="stop")
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    usage = {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": len(pieces),
+                        "total_tokens": prompt_tokens + len(pieces),
+                    }
+                    yield _usage_chunk(completion_id, model, usage)
+                yield b"data: [DONE]\n\n"
+            finally:
+                state["streams"] -= 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class StubServer:
+    """Run the stub in a background thread; use as a context manager."""
+
+    def __init__(self, port: int = 0, **config):
+        self.port = port or free_port()
+        self.config = config
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "StubServer":
+        STUB_CONFIG.update({k: v for k, v in self.config.items() if v is not None})
+        config = uvicorn.Config(
+            create_stub_app(), host="127.0.0.1", port=self.port, log_level="warning"
+        )
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--ttft-ms", type=float, default=STUB_CONFIG["ttft_ms"])
+    parser.add_argument("--tokens-per-sec", type=float, default=STUB_CONFIG["tokens_per_sec"])
+    parser.add_argument("--tokens", type=int, default=STUB_CONFIG["tokens"])
+    parser.add_argument("--max-concurrent", type=int, default=STUB_CONFIG["max_concurrent"])
+    parser.add_argument("--retry-after", type=int, default=STUB_CONFIG["retry_after"])
+    parser.add_argument(
+        "--model-ttft",
+        action="append",
+        default=[],
+        metavar="MODEL=MS",
+        help="per-model time to first token; repeatable",
+    )
+    parser.add_argument(
+        "--model-status",
+        action="append",
+        default=[],
+        metavar="MODEL=CODE",
+        help="per-model HTTP error status; repeatable",
+    )
+    args = parser.parse_args()
+
+    STUB_CONFIG.update(
+        ttft_ms=args.ttft_ms,
+        tokens_per_sec=args.tokens_per_sec,
+        tokens=args.tokens,
+        max_concurrent=args.max_concurrent,
+        retry_after=args.retry_after,
+        model_ttft_ms={
+            model: float(ms) for model, ms in (item.rsplit("=", 1) for item in args.model_ttft)
+        },
+        model_status={
+            model: int(code) for model, code in (item.rsplit("=", 1) for item in args.model_status)
+        },
+    )
+    uvicorn.run(create_stub_app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
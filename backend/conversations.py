@@ -0,0 +1,200 @@
+"""Server-side chat conversations with a bounded, compacted history.
+
+Clients send only the new message and a conversation id. Each turn's prompt
+is the system prompt plus the rolling summary, the recent messages and the
+new message. Once the stored history exceeds CONVERSATION_TOKEN_BUDGET, a
+background call folds all but the last CONVERSATION_KEEP_MESSAGES messages
+into the summary. Per-turn prompt size therefore stays roughly constant
+however long the conversation runs.
+
+Conversations live in a per-worker LRU with an idle TTL, like the document
+store; run a single worker (or sticky sessions) to keep them across turns.
+"""
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+import httpx
+
+from metrics import CONVERSATION_COMPACTIONS, CONVERSATIONS_ACTIVE
+from model_router import model_router
+from retrieval import estimate_tokens
+from upstream import CompletionStream, open_chat_completion
+
+CONVERSATION_TTL = float(os.getenv("CONVERSATION_TTL", str(6 * 60 * 60)))
+CONVERSATION_MAX_ENTRIES = int(os.getenv("CONVERSATION_MAX_ENTRIES", "10000"))
+CONVERSATION_TOKEN_BUDGET = int(os.getenv("CONVERSATION_TOKEN_BUDGET", "3000"))
+CONVERSATION_KEEP_MESSAGES = int(os.getenv("CONVERSATION_KEEP_MESSAGES", "6"))
+CONVERSATION_SUMMARY_MAX_TOKENS = int(os.getenv("CONVERSATION_SUMMARY_MAX_TOKENS", "400"))
+
+SUMMARY_PROMPT = (
+    "You maintain the running summary of a conversation between a student and an AI tutor. "
+    "Merge the new turns into the current summary. Keep the student's goals, facts and "
+    "definitions already explained, decisions, and open questions; drop greetings and "
+    "repetition. Write plain prose, at most 250 words. Reply with the summary only."
+)
+
+
+class Conversation:
+    def __init__(self, owner: str, kind: str, session_id: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.kind = kind
+        self.session_id = session_id
+        self.summary = ""
+        self.messages: List[Dict[str, str]] = []
+        self.compacting = False
+
+    def history_tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(
+            estimate_tokens(m["content"]) for m in self.messages
+        )
+
+    def prompt_messages(self, system_prompt: str, user_message: str) -> List[Dict[str, str]]:
+        """Messages for the next upstream call.
+
+        Recent messages are added newest first until the budget is spent, so
+        the prompt stays bounded even if a compaction is pending or failed.
+        """
+        if self.summary:
+            system_prompt += f"\n\nSUMMARY OF THE EARLIER CONVERSATION:\n{self.summary}"
+        budget = CONVERSATION_TOKEN_BUDGET - estimate_tokens(self.summary)
+        recent: List[Dict[str, str]] = []
+        for message in reversed(self.messages):
+            budget -= estimate_tokens(message["content"])
+            if budget < 0:
+                break
+            recent.append(message)
+        return [
+            {"role": "system", "content": system_prompt},
+            *reversed(recent),
+            {"role": "user", "content": user_message},
+        ]
+
+
+class ConversationStore:
+    """Per-worker LRU of conversations; entries expire after `ttl` seconds idle."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def new(
+        owner: str,
+        kind: str,
+        session_id: Optional[str] = None,
+        opening: Optional[str] = None,
+    ) -> Conversation:
+        """A conversation that is not stored yet; `add` it once its first turn has started."""
+        conversation = Conversation(owner, kind, session_id)
+        if opening and opening.strip():
+            conversation.messages.append({"role": "assistant", "content": opening})
+        return conversation
+
+    def add(self, conversation: Conversation) -> None:
+        self._entries[conversation.id] = (conversation, time.time())
+        self._entries.move_to_end(conversation.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(
+        self, conversation_id: str, owner: str, kind: str, session_id: Optional[str] = None
+    ) -> Optional[Conversation]:
+        entry = self._entries.get(conversation_id)
+        if entry is None:
+            return None
+        conversation, last_used = entry
+        if time.time() - last_used > self.ttl:
+            del self._entries[conversation_id]
+            return None
+        if (conversation.owner, conversation.kind, conversation.session_id) != (owner, kind, session_id):
+            return None
+        self._entries[conversation_id] = (conversation, time.time())
+        self._entries.move_to_end(conversation_id)
+        return conversation
+
+
+# Keeps compaction tasks referenced until they finish.
+_background_tasks: Set[asyncio.Task] = set()
+
+
+async def record_turn(
+    client: httpx.AsyncClient,
+    conversation: Conversation,
+    user_message: str,
+    stream: CompletionStream,
+) -> AsyncIterator[bytes]:
+    """Pass the reply through; store the turn once it completes and compact if over budget."""
+    stream.collect_text()
+    async for event in stream:
+        yield event
+    if not stream.completed:
+        return
+    conversation.messages.append({"role": "user", "content": user_message})
+    conversation.messages.append({"role": "assistant", "content": stream.text})
+    if (
+        conversation.history_tokens() > CONVERSATION_TOKEN_BUDGET
+        and len(conversation.messages) > CONVERSATION_KEEP_MESSAGES
+        and not conversation.compacting
+    ):
+        conversation.compacting = True
+        task = asyncio.create_task(compact(client, conversation))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+async def compact(client: httpx.AsyncClient, conversation: Conversation) -> None:
+    """Fold all but the most recent messages into the conversation summary."""
+    conversation.compacting = True
+    try:
+        folded = conversation.messages[: len(conversation.messages) - CONVERSATION_KEEP_MESSAGES]
+        if not folded:
+            return
+        transcript = "\n\n".join(f"{m['role'].upper()}: {m['content']}" for m in folded)
+        messages = [
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {
+                "role": "user",
+                "content": (
+                    f"CURRENT SUMMARY:\n{conversation.summary or '(none)'}\n\n"
+                    f"NEW TURNS:\n{transcript}"
+                ),
+            },
+        ]
+        stream = await open_chat_completion(
+            client,
+            {
+                "model": model_router.route("conversation_summary", messages).model,
+                "messages": messages,
+                "max_tokens": CONVERSATION_SUMMARY_MAX_TOKENS,
+                "temperature": 0.2,
+            },
+            "Failed to summarize conversation",
+            endpoint="conversation_summary",
+            requester=conversation.owner,
+        )
+        summary = (await stream.read_text()).strip()
+        # Turns appended while the summary was generated stay after the folded prefix.
+        del conversation.messages[: len(folded)]
+        conversation.summary = summary
+        CONVERSATION_COMPACTIONS.labels("ok").inc()
+    except Exception:
+        # prompt_messages() still bounds the prompt; the next turn tries again.
+        CONVERSATION_COMPACTIONS.labels("failed").inc()
+    finally:
+        conversation.compacting = False
+
+
+conversation_store = ConversationStore(
+    max_entries=CONVERSATION_MAX_ENTRIES,
+    ttl=CONVERSATION_TTL,
+)
+CONVERSATIONS_ACTIVE.set_function(lambda: len(conversation_store))
@@ -0,0 +1,110 @@
+import os
+import re
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+DOCUMENT_STORE_MAX_BYTES = int(os.getenv("DOCUMENT_STORE_MAX_BYTES", str(64 * 1024 * 1024)))
+DOCUMENT_STORE_TTL = float(os.getenv("DOCUMENT_STORE_TTL", str(24 * 60 * 60)))
+DOCUMENT_STORE_DIR = os.getenv(
+    "DOCUMENT_STORE_DIR", os.path.join(tempfile.gettempdir(), "mentoro-documents")
+)
+
+_KEY_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class DocumentStore:
+    """Extracted document text keyed by content hash.
+
+    Recently used documents live in an in-memory LRU bounded by `max_bytes`.
+    Entries pushed out of memory are spilled to `spill_dir` and promoted back
+    on the next read. Both tiers drop entries older than `ttl` seconds.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, spill_dir: str):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.spill_dir = Path(spill_dir)
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self._entries: "OrderedDict[str, Tuple[str, int, float]]" = OrderedDict()
+        self._bytes = 0
+
+    def _path(self, key: str) -> Path:
+        return self.spill_dir / f"{key}.txt"
+
+    def _expired(self, stored_at: float) -> bool:
+        return time.time() - stored_at > self.ttl
+
+    def get(self, key: str) -> Optional[str]:
+        if not _KEY_RE.match(key or ""):
+            return None
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            text, _, stored_at = entry
+            if self._expired(stored_at):
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return text
+
+        path = self._path(key)
+        try:
+            stored_at = path.stat().st_mtime
+            if self._expired(stored_at):
+                path.unlink(missing_ok=True)
+                return None
+            text = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        path.unlink(missing_ok=True)
+        self._insert(key, text, stored_at)
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        if not _KEY_RE.match(key):
+            raise ValueError("Invalid document key")
+        self._drop(key)
+        self._insert(key, text, time.time())
+        self.evict_expired()
+
+    def _insert(self, key: str, text: str, stored_at: float) -> None:
+        size = len(text.encode("utf-8"))
+        self._entries[key] = (text, size, stored_at)
+        self._bytes += size
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            old_key, (old_text, old_size, old_stored_at) = self._entries.popitem(last=False)
+            self._bytes -= old_size
+            self._spill(old_key, old_text, old_stored_at)
+
+    def _spill(self, key: str, text: str, stored_at: float) -> None:
+        path = self._path(key)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.utime(tmp, (stored_at, stored_at))
+        tmp.replace(path)
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+        self._path(key).unlink(missing_ok=True)
+
+    def evict_expired(self) -> None:
+        for key in [k for k, (_, _, ts) in self._entries.items() if self._expired(ts)]:
+            self._drop(key)
+        for path in self.spill_dir.glob("*.txt"):
+            try:
+                if self._expired(path.stat().st_mtime):
+                    path.unlink(missing_ok=True)
+            except FileNotFoundError:
+                continue
+
+
+document_store = DocumentStore(
+    max_bytes=DOCUMENT_STORE_MAX_BYTES,
+    ttl=DOCUMENT_STORE_TTL,
+    spill_dir=DOCUMENT_STORE_DIR,
+)
@@ -0,0 +1,214 @@
+import asyncio
+import math
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Deque, List, Optional, Tuple
+
+from metrics import PDF_EXTRACTION_FALLBACKS
+from ooxml import extract_docx_text, extract_xlsx_text
+from pdf_backends import PDF_BACKENDS
+
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXTRACTION_TIMEOUT = float(os.getenv("EXTRACTION_TIMEOUT", "60"))
+EXTRACTION_MAX_QUEUE = int(os.getenv("EXTRACTION_MAX_QUEUE", "8"))
+EXTRACTION_MIN_PAGES_PER_TASK = int(os.getenv("EXTRACTION_MIN_PAGES_PER_TASK", "8"))
+# Extraction stops once this many characters have been read (about 500 PDF
+# pages). Generation only sends the first MAX_CONTEXT_CHARS, but everything
+# kept here is indexed for document chat, so the budget bounds what it can find.
+EXTRACTION_CHAR_BUDGET = int(os.getenv("EXTRACTION_CHAR_BUDGET", "2000000"))
+# One of pdf_backends.PDF_BACKENDS. The fallback is tried when the primary
+# backend finds no text at all; set it empty to disable.
+PDF_EXTRACTION_BACKEND = os.getenv("PDF_EXTRACTION_BACKEND", "pdfium")
+PDF_FALLBACK_BACKEND = os.getenv("PDF_FALLBACK_BACKEND", "pdfplumber")
+
+for _backend in filter(None, (PDF_EXTRACTION_BACKEND, PDF_FALLBACK_BACKEND)):
+    if _backend not in PDF_BACKENDS:
+        raise RuntimeError(
+            f"Unknown PDF extraction backend {_backend!r}; expected one of {sorted(PDF_BACKENDS)}"
+        )
+
+
+class ExtractionBusy(Exception):
+    """Raised when too many documents are already waiting for extraction."""
+
+
+class ExtractionTimeout(Exception):
+    """Raised when a document takes longer than EXTRACTION_TIMEOUT to extract."""
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_in_flight = 0
+
+
+def start_extraction_pool() -> None:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=EXTRACTION_WORKERS)
+
+
+def shutdown_extraction_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+# ─── Worker-side functions (run in child processes) ──────────────────────────
+
+def _count_pdf_pages(path: str, backend: str) -> int:
+    return PDF_BACKENDS[backend].count_pages(path)
+
+
+def _extract_pdf_pages(path: str, start: int, end: int, budget: int, backend: str) -> List[str]:
+    """Text of pages [start, end), stopping early once `budget` characters are read."""
+    texts = []
+    pages = PDF_BACKENDS[backend].iter_pages(path, start, end)
+    try:
+        for text in pages:
+            texts.append(text)
+            budget -= len(text) + 1
+            if budget <= 0:
+                break
+    finally:
+        pages.close()
+    return texts
+
+
+# ─── Event-loop side ─────────────────────────────────────────────────────────
+
+def _page_ranges(page_count: int) -> List[Tuple[int, int]]:
+    per_task = max(EXTRACTION_MIN_PAGES_PER_TASK, math.ceil(page_count / EXTRACTION_WORKERS))
+    return [
+        (start, min(start + per_task, page_count))
+        for start in range(0, page_count, per_task)
+    ]
+
+
+class _Admission:
+    """One admitted document's place in the extraction queue.
+
+    Cancelling the asyncio side (timeout, client gone) cannot stop a pool
+    task that a worker has already started, so the place is only given back
+    once the extraction has returned and every task it submitted is done.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._tasks = 0
+        self._closed = False
+        self._released = False
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> "asyncio.Future[Any]":
+        future = _pool.submit(fn, *args)
+        self._tasks += 1
+        future.add_done_callback(self._task_done)
+        return asyncio.wrap_future(future)
+
+    def _task_done(self, _future: Future) -> None:
+        # Called from the executor's management thread.
+        try:
+            self._loop.call_soon_threadsafe(self._finish_task)
+        except RuntimeError:
+            pass  # Event loop already closed at shutdown.
+
+    def _finish_task(self) -> None:
+        self._tasks -= 1
+        self._release_if_idle()
+
+    def close(self) -> None:
+        self._closed = True
+        self._release_if_idle()
+
+    def _release_if_idle(self) -> None:
+        global _in_flight
+        if self._closed and not self._tasks and not self._released:
+            self._released = True
+            _in_flight -= 1
+
+
+async def _run_extraction(admission: _Admission, path: str, budget: int, backend: str) -> str:
+    """Extract page ranges in order, at most EXTRACTION_WORKERS at a time.
+
+    Ranges are consumed in page order and no new ones are started once the
+    budget is reached, so a long document is not parsed past what is kept.
+    """
+    page_count = await admission.run(_count_pdf_pages, path, backend)
+    ranges = deque(_page_ranges(page_count))
+    pending: Deque[asyncio.Future] = deque()
+    texts: List[str] = []
+    remaining = budget
+    try:
+        while ranges or pending:
+            while ranges and len(pending) < EXTRACTION_WORKERS:
+                start, end = ranges.popleft()
+                pending.append(
+                    admission.run(_extract_pdf_pages, path, start, end, budget, backend)
+                )
+            for text in await pending.popleft():
+                texts.append(text)
+                remaining -= len(text) + 1
+                if remaining <= 0:
+                    return "\n".join(texts)[:budget]
+        return "\n".join(texts)
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def extract_plain_text(path: str, budget: int = EXTRACTION_CHAR_BUDGET) -> str:
+    """Decode a text upload as UTF-8, reading no more than `budget` characters."""
+    with open(path, "rb") as f:
+        # A UTF-8 character is at most 4 bytes.
+        data = f.read(budget * 4)
+    return data.decode("utf-8", errors="ignore")[:budget]
+
+
+async def _admitted(extraction: Callable[[_Admission], Awaitable[str]]) -> str:
+    global _in_flight
+    if _pool is None:
+        start_extraction_pool()
+    if _in_flight >= EXTRACTION_MAX_QUEUE:
+        raise ExtractionBusy("Document extraction queue is full")
+
+    _in_flight += 1
+    admission = _Admission()
+    try:
+        return await asyncio.wait_for(extraction(admission), timeout=EXTRACTION_TIMEOUT)
+    except asyncio.TimeoutError as exc:
+        raise ExtractionTimeout("Document extraction timed out") from exc
+    finally:
+        admission.close()
+
+
+async def extract_pdf_text(path: str, budget: int = EXTRACTION_CHAR_BUDGET) -> str:
+    """Extract up to `budget` characters of PDF text in the process pool, by page ranges.
+
+    Raises ExtractionBusy when EXTRACTION_MAX_QUEUE documents are already in
+    flight and ExtractionTimeout when extraction exceeds EXTRACTION_TIMEOUT.
+    A timed-out document keeps its place in the queue until its pool tasks
+    have actually finished.
+    """
+    return await _admitted(lambda admission: _run_pdf_extraction(admission, path, budget))
+
+
+async def _run_pdf_extraction(admission: _Admission, path: str, budget: int) -> str:
+    text = await _run_extraction(admission, path, budget, PDF_EXTRACTION_BACKEND)
+    if text.strip() or not PDF_FALLBACK_BACKEND or PDF_FALLBACK_BACKEND == PDF_EXTRACTION_BACKEND:
+        return text
+    PDF_EXTRACTION_FALLBACKS.labels(PDF_EXTRACTION_BACKEND, PDF_FALLBACK_BACKEND).inc()
+    return await _run_extraction(admission, path, budget, PDF_FALLBACK_BACKEND)
+
+
+_OFFICE_EXTRACTORS = {"docx": extract_docx_text, "xlsx": extract_xlsx_text}
+
+
+async def extract_office_text(path: str, ext: str, budget: int = EXTRACTION_CHAR_BUDGET) -> str:
+    """Extract up to `budget` characters of a .docx/.xlsx file in the process pool.
+
+    Same admission and timeout as extract_pdf_text; raises ooxml.InvalidDocument
+    for files that are not valid archives of that type.
+    """
+    return await _admitted(
+        lambda admission: admission.run(_OFFICE_EXTRACTORS[ext], path, budget)
+    )
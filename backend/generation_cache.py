@@ -0,0 +1,95 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import AsyncGenerator, AsyncIterator, Optional, Tuple
+
+from metrics import (
+    GENERATION_CACHE_BYTES,
+    GENERATION_CACHE_ENTRIES,
+    GENERATION_CACHE_HITS,
+    GENERATION_CACHE_MISSES,
+)
+from sse import DONE_PREFIX, HEARTBEAT
+
+GENERATION_CACHE_MAX_BYTES = int(os.getenv("GENERATION_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+GENERATION_CACHE_TTL = float(os.getenv("GENERATION_CACHE_TTL", str(7 * 24 * 60 * 60)))
+GENERATION_CACHE_BYPASS_HEADER = "X-Cache-Bypass"
+REPLAY_CHUNK_SIZE = 4096
+
+
+def generation_key(model: str, kind: str, context: str, prompt_version: str) -> str:
+    context_hash = hashlib.sha256(context.encode("utf-8")).hexdigest()
+    return f"{model}:{kind}:{prompt_version}:{context_hash}"
+
+
+class GenerationCache:
+    """Size-bounded LRU of finished generations with TTL."""
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None or time.time() - entry[1] > self.ttl:
+            if entry is not None:
+                self._drop(key)
+            GENERATION_CACHE_MISSES.inc()
+            return None
+        self._entries.move_to_end(key)
+        GENERATION_CACHE_HITS.inc()
+        return entry[0]
+
+    def put(self, key: str, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        self._drop(key)
+        self._entries[key] = (body, time.time())
+        self._bytes += len(body)
+        while self._bytes > self.max_bytes:
+            _, (old_body, _) = self._entries.popitem(last=False)
+            self._bytes -= len(old_body)
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+
+async def replay(body: bytes) -> AsyncGenerator[bytes, None]:
+    for start in range(0, len(body), REPLAY_CHUNK_SIZE):
+        yield body[start:start + REPLAY_CHUNK_SIZE]
+
+
+async def record(
+    cache: GenerationCache, key: str, source: AsyncIterator[bytes]
+) -> AsyncGenerator[bytes, None]:
+    """Pass `source` through and store it if the stream finished with a done event.
+
+    Heartbeats are not stored, and streams ending in an error event are not cached.
+    """
+    chunks = []
+    async for chunk in source:
+        if chunk != HEARTBEAT:
+            chunks.append(chunk)
+        yield chunk
+    if chunks and chunks[-1].startswith(DONE_PREFIX):
+        cache.put(key, b"".join(chunks))
+
+
+generation_cache = GenerationCache(
+    max_bytes=GENERATION_CACHE_MAX_BYTES,
+    ttl=GENERATION_CACHE_TTL,
+)
+GENERATION_CACHE_ENTRIES.set_function(lambda: len(generation_cache))
+GENERATION_CACHE_BYTES.set_function(lambda: generation_cache.size)
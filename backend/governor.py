@@ -0,0 +1,119 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "128"))
+LLM_MAX_QUEUE_PER_USER = int(os.getenv("LLM_MAX_QUEUE_PER_USER", "4"))
+LLM_MAX_QUEUE_WAIT = float(os.getenv("LLM_MAX_QUEUE_WAIT", "20"))
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot get an upstream slot; carries the HTTP status to return."""
+
+    def __init__(self, status_code: int, message: str, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.retry_after = retry_after
+
+
+class UpstreamGovernor:
+    """Global concurrency cap for upstream LLM calls with per-user fair queuing.
+
+    When all slots are busy, callers wait in a FIFO per requester, and freed
+    slots are handed out round-robin across requesters so one user with many
+    open tabs cannot starve the others. Waiting is bounded: a requester with
+    `max_queue_per_user` waiters gets 429, a full queue or a wait longer than
+    `max_wait` seconds gets 503.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, max_queue_per_user: int, max_wait: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_queue_per_user = max_queue_per_user
+        self.max_wait = max_wait
+        self.active = 0
+        self.waiting = 0
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._wait_observer = None
+
+    def on_wait(self, observer) -> None:
+        self._wait_observer = observer
+
+    async def acquire(self, requester: str) -> None:
+        if self.active < self.max_concurrency and not self.waiting:
+            self.active += 1
+            self._observe_wait(0.0)
+            return
+
+        queue = self._queues.get(requester)
+        if queue is not None and len(queue) >= self.max_queue_per_user:
+            raise AdmissionRejected(429, "Too many AI requests in progress, please wait", 2)
+        if self.waiting >= self.max_queue:
+            raise AdmissionRejected(503, "AI service is busy, please retry shortly", 5)
+
+        future = asyncio.get_running_loop().create_future()
+        if queue is None:
+            queue = self._queues[requester] = deque()
+        queue.append(future)
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as the timeout fired; keep it.
+                self._observe_wait(time.perf_counter() - start)
+                return
+            future.cancel()
+            self._discard(requester, future)
+            raise AdmissionRejected(503, "AI service is busy, please retry shortly", 5)
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                future.cancel()
+                self._discard(requester, future)
+            raise
+        self._observe_wait(time.perf_counter() - start)
+
+    def release(self) -> None:
+        while self._queues:
+            requester, queue = next(iter(self._queues.items()))
+            future = queue.popleft()
+            self.waiting -= 1
+            if queue:
+                self._queues.move_to_end(requester)
+            else:
+                del self._queues[requester]
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def _discard(self, requester: str, future: asyncio.Future) -> None:
+        queue = self._queues.get(requester)
+        if queue is None or future not in queue:
+            return
+        queue.remove(future)
+        self.waiting -= 1
+        if not queue:
+            del self._queues[requester]
+
+    def _observe_wait(self, seconds: float) -> None:
+        if self._wait_observer is not None:
+            self._wait_observer(seconds)
+
+    def stats(self) -> Dict[str, int]:
+        return {"active": self.active, "waiting": self.waiting, "requesters": len(self._queues)}
+
+
+llm_governor = UpstreamGovernor(
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    max_queue=LLM_MAX_QUEUE,
+    max_queue_per_user=LLM_MAX_QUEUE_PER_USER,
+    max_wait=LLM_MAX_QUEUE_WAIT,
+)
@@ -0,0 +1,206 @@
+"""Background generation jobs.
+
+`POST /api/quizzes/jobs` queues a generation and returns at once; a bounded
+pool of in-process workers runs it, so no request handler waits on the model.
+Clients poll the job or subscribe to its event stream; finished jobs are kept
+for GENERATION_JOB_TTL seconds. Jobs live in the worker process that accepted
+them, like the document store.
+"""
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from metrics import (
+    GENERATION_JOB_POOL_SIZE,
+    GENERATION_JOB_QUEUE_DEPTH,
+    GENERATION_JOB_QUEUE_WAIT,
+    GENERATION_JOB_WORKERS_BUSY,
+    GENERATION_JOBS,
+    GENERATION_JOBS_STORED,
+)
+from sse import HEARTBEAT, SSE_HEARTBEAT_INTERVAL, delta_event, error_event, named_event
+
+GENERATION_JOB_WORKERS = int(os.getenv("GENERATION_JOB_WORKERS", "4"))
+GENERATION_JOB_MAX_QUEUE = int(os.getenv("GENERATION_JOB_MAX_QUEUE", "256"))
+GENERATION_JOB_TTL = float(os.getenv("GENERATION_JOB_TTL", str(60 * 60)))
+GENERATION_JOB_MAX_ENTRIES = int(os.getenv("GENERATION_JOB_MAX_ENTRIES", "10000"))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, owner: str, kind: str, work: Callable[["Job"], Awaitable[Any]]):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.kind = kind
+        self.work = work
+        self.status = QUEUED
+        self.deltas: List[str] = []
+        self.characters = 0
+        self.result: Any = None
+        self.error: Optional[Dict[str, Any]] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def append(self, delta: str) -> None:
+        """Record generated text; subscribers receive it as it arrives."""
+        self.deltas.append(delta)
+        self.characters += len(delta)
+        self._notify()
+
+    def set_status(self, status: str) -> None:
+        self.status = status
+        if self.finished:
+            self.finished_at = time.time()
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "jobId": self.id,
+            "type": self.kind,
+            "status": self.status,
+            "progress": {"characters": self.characters},
+            "result": self.result,
+            "error": self.error,
+        }
+
+    async def events(self) -> AsyncIterator[bytes]:
+        """Status changes and text deltas as SSE; the generated prefix is replayed first.
+
+        Ends with `event: done` carrying the job snapshot, or `event: error`.
+        """
+        position = 0
+        status = None
+        while True:
+            changed = self._changed
+            if status != self.status:
+                status = self.status
+                yield named_event("status", {"status": status})
+            while position < len(self.deltas):
+                yield delta_event(self.deltas[position])
+                position += 1
+            if self.status == DONE:
+                yield named_event("done", self.snapshot())
+                return
+            if self.status == FAILED:
+                yield error_event(self.error["message"])
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=SSE_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+
+
+class JobQueue:
+    """Bounded FIFO of generation jobs served by a fixed pool of worker tasks."""
+
+    def __init__(self, workers: int, max_queue: int, ttl: float, max_entries: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.busy = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def submit(self, owner: str, kind: str, work: Callable[[Job], Awaitable[Any]]) -> Job:
+        """Queue `work`; its return value becomes the job result. Raises JobQueueFull."""
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+        self._prune()
+        job = Job(owner, kind, work)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull("Too many queued generation jobs, please try again later")
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str, owner: str) -> Optional[Job]:
+        self._prune()
+        job = self._jobs.get(job_id)
+        if job is None or job.owner != owner:
+            return None
+        return job
+
+    def _prune(self) -> None:
+        """Drop finished jobs past their TTL, then the oldest finished ones over the cap."""
+        cutoff = time.time() - self.ttl
+        finished = [job for job in self._jobs.values() if job.finished]
+        excess = len(self._jobs) - self.max_entries
+        for job in finished:
+            if job.finished_at < cutoff or excess > 0:
+                del self._jobs[job.id]
+                excess -= 1
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            GENERATION_JOB_QUEUE_WAIT.observe(time.time() - job.created_at)
+            self.busy += 1
+            job.set_status(RUNNING)
+            try:
+                job.result = await job.work(job)
+                job.set_status(DONE)
+            except HTTPException as exc:
+                job.error = {"status": exc.status_code, "message": exc.detail}
+                job.set_status(FAILED)
+            except asyncio.CancelledError:
+                job.error = {"status": 503, "message": "Server is shutting down"}
+                job.set_status(FAILED)
+                raise
+            except Exception:  # noqa: BLE001
+                job.error = {"status": 500, "message": "Failed to generate content"}
+                job.set_status(FAILED)
+            finally:
+                self.busy -= 1
+                GENERATION_JOBS.labels(job.kind, job.status).inc()
+                job.work = None
+
+
+job_queue = JobQueue(
+    workers=GENERATION_JOB_WORKERS,
+    max_queue=GENERATION_JOB_MAX_QUEUE,
+    ttl=GENERATION_JOB_TTL,
+    max_entries=GENERATION_JOB_MAX_ENTRIES,
+)
+GENERATION_JOB_POOL_SIZE.set(job_queue.workers)
+GENERATION_JOB_WORKERS_BUSY.set_function(lambda: job_queue.busy)
+GENERATION_JOB_QUEUE_DEPTH.set_function(job_queue.depth)
+GENERATION_JOBS_STORED.set_function(lambda: len(job_queue))
@@ -2,12 +2,19 @@ import os
 from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response
 
-from database import engine, Base
+from database import engine, Base, create_missing_indexes
+from extraction import shutdown_extraction_pool, start_extraction_pool
+from jobs import job_queue
+from metrics import MetricsMiddleware, render_metrics
 from models import User, QuizHistory, Assignment  # noqa: F401
 from routers import auth, chat, quizzes, history, recommendations, assignments
+from passwords import shutdown_password_hasher
+from security import AuthError
+from upstream import create_upstream_client
 
 load_dotenv()
 
@@ -16,10 +23,24 @@ load_dotenv()
 async def lifespan(app: FastAPI):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
-    yield
+        await conn.run_sync(create_missing_indexes)
+    app.state.upstream_client = create_upstream_client()
+    start_extraction_pool()
+    job_queue.start()
+    try:
+        yield
+    finally:
+        await job_queue.stop()
+        shutdown_extraction_pool()
+        shutdown_password_hasher()
+        await app.state.upstream_client.aclose()
 
 
-app = FastAPI(title="mentoro AI Backend", lifespan=lifespan)
+app = FastAPI(
+    title="mentoro AI Backend",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 frontend_origin = os.getenv("FRONTEND_ORIGIN", "http://localhost:3000")
 
@@ -32,11 +53,25 @@ app.add_middleware(
 )
 
 
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(AuthError)
+async def auth_error_handler(request: Request, exc: AuthError):
+    return ORJSONResponse(status_code=exc.status_code, content={"message": exc.message})
+
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(chat.router, prefix="/api/ai", tags=["ai"])
 app.include_router(quizzes.router, prefix="/api/quizzes", tags=["quizzes"])
@@ -0,0 +1,248 @@
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from database import TimedQueuePool, engine
+from governor import llm_governor
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time from request start until the response body is fully sent.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being handled, including streaming bodies.",
+    ["method", "route"],
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements issued while handling one request.",
+    ["route"],
+    buckets=(0, 1, 2, 3, 4, 5, 8, 13, 21, 50),
+)
+
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed.")
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "SQL statement execution time.", buckets=DB_BUCKETS
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool.",
+    buckets=DB_BUCKETS,
+)
+
+UPSTREAM_TTFT = Histogram(
+    "llm_upstream_ttft_seconds",
+    "Time from sending the upstream request to its first streamed byte.",
+    ["endpoint", "model"],
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_STREAM_DURATION = Histogram(
+    "llm_upstream_stream_duration_seconds",
+    "Total duration of an upstream completion stream.",
+    ["endpoint", "model"],
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_BYTES = Counter(
+    "llm_upstream_bytes_total", "Bytes received from the upstream LLM.", ["endpoint", "model"]
+)
+STREAM_SENT_BYTES = Counter(
+    "llm_stream_sent_bytes_total",
+    "Compact SSE bytes sent to clients for upstream LLM streams.",
+    ["endpoint", "model"],
+)
+UPSTREAM_USAGE_TOKENS = Counter(
+    "llm_upstream_usage_tokens_total",
+    "Tokens reported by the upstream usage block (completion tokens are counted from deltas when it is missing).",
+    ["endpoint", "model", "kind"],
+)
+UPSTREAM_TOKENS_PER_SECOND = Histogram(
+    "llm_upstream_tokens_per_second",
+    "Streamed completion tokens per second after the first token.",
+    ["endpoint", "model"],
+    buckets=(5, 10, 25, 50, 100, 200, 400, 800, 1600),
+)
+UPSTREAM_ERRORS = Counter(
+    "llm_upstream_errors_total", "Upstream LLM requests that failed.", ["endpoint", "model"]
+)
+UPSTREAM_RETRIES = Counter(
+    "llm_upstream_retries_total",
+    "Upstream LLM requests retried before the first byte, by cause (status code or transport).",
+    ["endpoint", "model", "reason"],
+)
+LLM_ROUTED_REQUESTS = Counter(
+    "llm_routed_requests_total",
+    "Model chosen per request by the router, with prompt-size class and reason (primary, fallback, all_slow).",
+    ["endpoint", "size_class", "model", "reason"],
+)
+
+LLM_ACTIVE = Gauge("llm_governor_active", "Upstream LLM requests currently holding a slot.")
+LLM_ACTIVE.set_function(lambda: llm_governor.active)
+LLM_QUEUE_DEPTH = Gauge("llm_governor_queue_depth", "Requests waiting for an upstream LLM slot.")
+LLM_QUEUE_DEPTH.set_function(lambda: llm_governor.waiting)
+LLM_QUEUE_WAIT = Histogram(
+    "llm_governor_queue_wait_seconds",
+    "Time a request waited for an upstream LLM slot.",
+    buckets=LATENCY_BUCKETS,
+)
+LLM_ADMISSION_REJECTED = Counter(
+    "llm_governor_rejected_total",
+    "Requests turned away by the governor (429 per-user limit, 503 queue full or wait timeout).",
+    ["status"],
+)
+QUIZ_BANK_LOOKUPS = Counter(
+    "quiz_bank_lookups_total", "Stored-quiz lookups by outcome (hit or miss).", ["result"]
+)
+QUIZ_VALIDATION_FAILURES = Counter(
+    "quiz_validation_failures_total", "Generated quizzes rejected by validation and re-requested."
+)
+CONVERSATIONS_ACTIVE = Gauge("conversations_active", "Server-side chat conversations held by this worker.")
+CONVERSATION_COMPACTIONS = Counter(
+    "conversation_compactions_total",
+    "Conversation histories folded into a rolling summary, by result (ok or failed).",
+    ["result"],
+)
+SINGLEFLIGHT_REQUESTS = Counter(
+    "singleflight_requests_total",
+    "Generation requests that started an upstream call (leader) or joined one in flight (follower).",
+    ["endpoint", "role"],
+)
+SINGLEFLIGHT_IN_FLIGHT = Gauge(
+    "singleflight_in_flight", "Coalesced generations currently running.", ["endpoint"]
+)
+GENERATION_JOB_QUEUE_DEPTH = Gauge(
+    "generation_job_queue_depth", "Background generation jobs waiting for a worker."
+)
+GENERATION_JOB_POOL_SIZE = Gauge("generation_job_workers", "Background generation workers in the pool.")
+GENERATION_JOB_WORKERS_BUSY = Gauge(
+    "generation_job_workers_busy", "Background generation workers currently running a job."
+)
+GENERATION_JOB_QUEUE_WAIT = Histogram(
+    "generation_job_queue_wait_seconds",
+    "Time a background generation job waited for a worker.",
+    buckets=(0.01, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+GENERATION_JOBS = Counter(
+    "generation_jobs_total", "Finished background generation jobs.", ["type", "status"]
+)
+GENERATION_JOBS_STORED = Gauge(
+    "generation_jobs_stored", "Background generation jobs held by this worker, finished or not."
+)
+PDF_EXTRACTION_FALLBACKS = Counter(
+    "pdf_extraction_fallbacks_total",
+    "PDFs re-extracted with the fallback backend because the primary one found no text.",
+    ["backend", "fallback"],
+)
+
+GENERATION_CACHE_HITS = Counter("generation_cache_hits", "Explain/quiz generation cache hits.")
+GENERATION_CACHE_MISSES = Counter("generation_cache_misses", "Explain/quiz generation cache misses.")
+GENERATION_CACHE_ENTRIES = Gauge("generation_cache_entries", "Finished generations held in the cache.")
+GENERATION_CACHE_BYTES = Gauge("generation_cache_bytes", "Size of the cached generations.")
+
+# [query count, query seconds] for the request being handled in this context.
+_request_db_stats: ContextVar[Optional[list]] = ContextVar("request_db_stats", default=None)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    DB_QUERIES.inc()
+    DB_QUERY_DURATION.observe(elapsed)
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += elapsed
+
+
+TimedQueuePool.on_checkout_wait = DB_POOL_CHECKOUT_WAIT.observe
+llm_governor.on_wait(LLM_QUEUE_WAIT.observe)
+
+
+def observe_upstream_stream(
+    endpoint: str,
+    model: str,
+    ttft: Optional[float],
+    duration: float,
+    size: int,
+    sent: int,
+    usage: Dict[str, int],
+) -> None:
+    labels = (endpoint, model)
+    tokens = usage.get("completion_tokens", 0)
+    if ttft is not None:
+        UPSTREAM_TTFT.labels(*labels).observe(ttft)
+        generating = duration - ttft
+        if tokens and generating > 0:
+            UPSTREAM_TOKENS_PER_SECOND.labels(*labels).observe(tokens / generating)
+    UPSTREAM_STREAM_DURATION.labels(*labels).observe(duration)
+    UPSTREAM_BYTES.labels(*labels).inc(size)
+    STREAM_SENT_BYTES.labels(*labels).inc(sent)
+    for kind in ("prompt", "completion"):
+        if f"{kind}_tokens" in usage:
+            UPSTREAM_USAGE_TOKENS.labels(*labels, kind).inc(usage[f"{kind}_tokens"])
+
+
+def render_metrics() -> tuple:
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, in-flight requests and DB queries per route.
+
+    Routes are labelled by their path template (e.g. /api/assignments/{assignment_id})
+    so label cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    def _route_template(self, scope: Scope) -> str:
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+        return "unmatched"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._route_template(scope)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        stats = [0, 0.0]
+        token = _request_db_stats.set(stats)
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            _request_db_stats.reset(token)
+            HTTP_REQUEST_DURATION.labels(method, route, str(status["code"])).observe(
+                time.perf_counter() - start
+            )
+            HTTP_REQUEST_DB_QUERIES.labels(route).observe(stats[0])
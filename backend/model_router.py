@@ -0,0 +1,120 @@
+"""Per-endpoint model selection with TTFT-based fallback.
+
+Each endpoint maps a prompt-size class ("short" / "long") to an ordered list
+of candidate models. The first candidate is preferred. A candidate is skipped
+while its recent time to first token (the ROUTING_TTFT_PERCENTILE over the
+last ROUTING_WINDOW_SECONDS) exceeds ROUTING_TTFT_SLO. A request that fails
+with a 429, a 5xx or a transport error, or times out before its first token,
+counts as an infinitely slow sample. Samples age out of the window, so a
+degraded model is tried again once it has been quiet.
+"""
+import json
+import math
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from metrics import LLM_ROUTED_REQUESTS
+from retrieval import estimate_tokens
+
+FAST_MODEL = "llama-3.1-8b-instant"
+LARGE_MODEL = "llama-3.3-70b-versatile"
+
+DEFAULT_MODEL_ROUTES: Dict[str, Dict[str, List[str]]] = {
+    "ai_chat": {"short": [FAST_MODEL, LARGE_MODEL], "long": [LARGE_MODEL, FAST_MODEL]},
+    "doc_chat": {"short": [FAST_MODEL, LARGE_MODEL], "long": [LARGE_MODEL, FAST_MODEL]},
+    "generate_explain": {"short": [FAST_MODEL, LARGE_MODEL], "long": [FAST_MODEL, LARGE_MODEL]},
+    # Quizzes must come back as valid JSON; the large model fails validation far less often.
+    "generate_quiz": {"short": [LARGE_MODEL, FAST_MODEL], "long": [LARGE_MODEL, FAST_MODEL]},
+    "conversation_summary": {"short": [FAST_MODEL, LARGE_MODEL], "long": [FAST_MODEL, LARGE_MODEL]},
+}
+
+# JSON object with the same shape as DEFAULT_MODEL_ROUTES; replaces the listed endpoints.
+MODEL_ROUTES = {**DEFAULT_MODEL_ROUTES, **json.loads(os.getenv("MODEL_ROUTES", "{}"))}
+ROUTING_SHORT_PROMPT_TOKENS = int(os.getenv("ROUTING_SHORT_PROMPT_TOKENS", "1500"))
+ROUTING_TTFT_SLO = float(os.getenv("ROUTING_TTFT_SLO", "1.5"))
+ROUTING_TTFT_PERCENTILE = float(os.getenv("ROUTING_TTFT_PERCENTILE", "0.9"))
+ROUTING_WINDOW_SECONDS = float(os.getenv("ROUTING_WINDOW_SECONDS", "60"))
+ROUTING_MIN_SAMPLES = int(os.getenv("ROUTING_MIN_SAMPLES", "5"))
+ROUTING_MAX_SAMPLES = 512
+
+
+class Route(NamedTuple):
+    model: str
+    # First candidate for the endpoint and size class; used for cache keys so a
+    # temporary fallback does not split the generation cache.
+    primary: str
+    size_class: str
+    reason: str  # "primary", "fallback" or "all_slow"
+
+
+class ModelRouter:
+    def __init__(
+        self,
+        routes: Dict[str, Dict[str, List[str]]],
+        short_prompt_tokens: int,
+        ttft_slo: float,
+        percentile: float,
+        window_seconds: float,
+        min_samples: int,
+    ):
+        self.routes = routes
+        self.short_prompt_tokens = short_prompt_tokens
+        self.ttft_slo = ttft_slo
+        self.percentile = percentile
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[Tuple[float, float]]] = {}
+
+    def size_class(self, messages: Iterable[Dict[str, str]]) -> str:
+        tokens = sum(estimate_tokens(m.get("content", "")) for m in messages)
+        return "short" if tokens <= self.short_prompt_tokens else "long"
+
+    def route(self, endpoint: str, messages: List[Dict[str, str]]) -> Route:
+        route = self._choose(endpoint, messages)
+        LLM_ROUTED_REQUESTS.labels(endpoint, route.size_class, route.model, route.reason).inc()
+        return route
+
+    def _choose(self, endpoint: str, messages: List[Dict[str, str]]) -> Route:
+        size_class = self.size_class(messages)
+        candidates = self.routes[endpoint][size_class]
+        observed = {model: self.observed_ttft(model) for model in candidates}
+        for position, model in enumerate(candidates):
+            ttft = observed[model]
+            if ttft is None or ttft <= self.ttft_slo:
+                reason = "primary" if position == 0 else "fallback"
+                return Route(model, candidates[0], size_class, reason)
+        fastest = min(candidates, key=lambda model: observed[model])
+        return Route(fastest, candidates[0], size_class, "all_slow")
+
+    def record_ttft(self, model: str, ttft: float) -> None:
+        samples = self._samples.setdefault(model, deque(maxlen=ROUTING_MAX_SAMPLES))
+        samples.append((time.monotonic(), ttft))
+
+    def record_failure(self, model: str) -> None:
+        """Count an error or timeout before the first token as a sample over any SLO."""
+        self.record_ttft(model, math.inf)
+
+    def observed_ttft(self, model: str) -> Optional[float]:
+        """Recent TTFT percentile, or None without enough fresh samples."""
+        samples = self._samples.get(model)
+        if not samples:
+            return None
+        cutoff = time.monotonic() - self.window_seconds
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+        if len(samples) < self.min_samples:
+            return None
+        values = sorted(ttft for _, ttft in samples)
+        return values[min(len(values) - 1, int(len(values) * self.percentile))]
+
+
+model_router = ModelRouter(
+    routes=MODEL_ROUTES,
+    short_prompt_tokens=ROUTING_SHORT_PROMPT_TOKENS,
+    ttft_slo=ROUTING_TTFT_SLO,
+    percentile=ROUTING_TTFT_PERCENTILE,
+    window_seconds=ROUTING_WINDOW_SECONDS,
+    min_samples=ROUTING_MIN_SAMPLES,
+)
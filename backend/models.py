@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, Float, String, func, Integer, JSON, ForeignKey
+from sqlalchemy import DateTime, Float, String, func, Integer, JSON, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -66,6 +66,29 @@ class QuizHistory(Base):
         server_default=func.now(),
         nullable=False,
     )
+
+
+class UserTopicStats(Base):
+    """Running per-(user, topic) aggregates of quiz_history, kept in sync on save."""
+
+    __tablename__ = "user_topic_stats"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    topic: Mapped[str] = mapped_column(String, primary_key=True)
+
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False)
+    percentage_sum: Mapped[int] = mapped_column(Integer, nullable=False)
+    first_percentage: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_percentage: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
 class Assignment(Base):
     __tablename__ = "assignments"
 
@@ -88,4 +111,58 @@ class Assignment(Base):
     )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
-    )
\ No newline at end of file
+    )
+
+
+class Quiz(Base):
+    """A validated generated quiz for one document (sessionId = SHA-256 of the upload)."""
+
+    __tablename__ = "quizzes"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    document_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    prompt_version: Mapped[str] = mapped_column(String, nullable=False)
+    model: Mapped[str] = mapped_column(String, nullable=False)
+    question_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+class QuizQuestion(Base):
+    __tablename__ = "quiz_questions"
+
+    quiz_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("quizzes.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    position: Mapped[int] = mapped_column(Integer, primary_key=True)
+    question: Mapped[str] = mapped_column(String, nullable=False)
+    options: Mapped[list] = mapped_column(JSON, nullable=False)
+    correct_answer: Mapped[str] = mapped_column(String, nullable=False)
+    explanation: Mapped[str] = mapped_column(String, nullable=False, server_default="")
+
+
+# Newest-first keyset pagination per user: WHERE user_id = ? AND (created_at, id) < (?, ?)
+Index(
+    "ix_quiz_history_user_created",
+    QuizHistory.user_id,
+    QuizHistory.created_at.desc(),
+    QuizHistory.id.desc(),
+)
+Index(
+    "ix_assignments_user_created",
+    Assignment.user_id,
+    Assignment.created_at.desc(),
+    Assignment.id.desc(),
+)
+# Latest quiz for a document: WHERE document_hash = ? AND prompt_version = ? ORDER BY created_at DESC LIMIT 1
+Index(
+    "ix_quizzes_document_created",
+    Quiz.document_hash,
+    Quiz.prompt_version,
+    Quiz.created_at.desc(),
+)
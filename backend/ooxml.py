@@ -0,0 +1,162 @@
+"""Streaming text extraction from .docx and .xlsx files.
+
+Both formats are zip archives of XML parts, parsed incrementally with
+`iterparse`. Each paragraph or row is dropped once its text is taken, so
+memory is bounded by the character budget, not the document size. These
+functions run in the extraction process pool.
+"""
+import posixpath
+import zipfile
+from typing import IO, Dict, Generator, Iterator, List, Tuple
+from xml.etree.ElementTree import Element, ParseError, iterparse
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_S = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+class InvalidDocument(ValueError):
+    """Raised when an upload is not a readable .docx/.xlsx archive."""
+
+
+def _elements(part: IO[bytes], container: str) -> Iterator[Element]:
+    """Every element of `part` as it is completed.
+
+    Completed children of the `container` element are detached from the tree,
+    so the parsed tree does not grow with the document.
+    """
+    parent = None
+    for event, element in iterparse(part, events=("start", "end")):
+        if event == "start":
+            if element.tag == container:
+                parent = element
+            continue
+        yield element
+        if parent is not None and len(parent) and parent[-1] is element:
+            del parent[-1]
+
+
+def _take(lines: Generator[str, None, None], budget: int) -> str:
+    """Join lines until `budget` characters are collected, then stop reading."""
+    out: List[str] = []
+    remaining = budget
+    try:
+        for line in lines:
+            out.append(line)
+            remaining -= len(line) + 1
+            if remaining <= 0:
+                break
+    finally:
+        lines.close()
+    return "\n".join(out)[:budget]
+
+
+# ─── DOCX ────────────────────────────────────────────────────────────────────
+
+def _docx_paragraphs(archive: zipfile.ZipFile) -> Generator[str, None, None]:
+    with archive.open("word/document.xml") as part:
+        pieces: List[str] = []
+        for element in _elements(part, f"{_W}body"):
+            tag = element.tag
+            if tag == f"{_W}t":
+                pieces.append(element.text or "")
+            elif tag == f"{_W}tab":
+                pieces.append("\t")
+            elif tag in (f"{_W}br", f"{_W}cr"):
+                pieces.append("\n")
+            elif tag == f"{_W}p":
+                paragraph = "".join(pieces).strip()
+                pieces = []
+                element.clear()
+                if paragraph:
+                    yield paragraph
+
+
+def extract_docx_text(path: str, budget: int) -> str:
+    try:
+        with zipfile.ZipFile(path) as archive:
+            return _take(_docx_paragraphs(archive), budget)
+    except (zipfile.BadZipFile, KeyError, ParseError, ValueError) as exc:
+        raise InvalidDocument("The file is not a valid .docx document") from exc
+
+
+# ─── XLSX ────────────────────────────────────────────────────────────────────
+
+def _shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    try:
+        part = archive.open("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+    strings: List[str] = []
+    with part:
+        pieces: List[str] = []
+        for element in _elements(part, f"{_S}sst"):
+            if element.tag == f"{_S}t":
+                pieces.append(element.text or "")
+            elif element.tag == f"{_S}si":
+                strings.append("".join(pieces))
+                pieces = []
+                element.clear()
+    return strings
+
+
+def _sheet_parts(archive: zipfile.ZipFile) -> List[Tuple[str, str]]:
+    """(sheet name, part path) in workbook order."""
+    targets: Dict[str, str] = {}
+    with archive.open("xl/_rels/workbook.xml.rels") as part:
+        for _, element in iterparse(part, events=("end",)):
+            if element.tag == f"{_REL}Relationship":
+                target = element.get("Target", "")
+                targets[element.get("Id")] = (
+                    target.lstrip("/") if target.startswith("/") else posixpath.join("xl", target)
+                )
+    sheets = []
+    with archive.open("xl/workbook.xml") as part:
+        for _, element in iterparse(part, events=("end",)):
+            if element.tag == f"{_S}sheet":
+                target = targets.get(element.get(f"{_R}id"))
+                if target:
+                    sheets.append((element.get("name", ""), posixpath.normpath(target)))
+    return sheets
+
+
+def _cell_text(cell, shared: List[str]) -> str:
+    kind = cell.get("t")
+    if kind == "inlineStr":
+        return "".join(t.text or "" for t in cell.iter(f"{_S}t"))
+    value = cell.find(f"{_S}v")
+    if value is None or value.text is None:
+        return ""
+    if kind == "s":
+        index = int(value.text)
+        return shared[index] if index < len(shared) else ""
+    if kind == "b":
+        return "TRUE" if value.text == "1" else "FALSE"
+    return value.text
+
+
+def _xlsx_lines(archive: zipfile.ZipFile) -> Generator[str, None, None]:
+    shared = _shared_strings(archive)
+    for name, target in _sheet_parts(archive):
+        yield f"## {name}"
+        with archive.open(target) as part:
+            for element in _elements(part, f"{_S}sheetData"):
+                if element.tag == f"{_S}row":
+                    cells = [_cell_text(cell, shared) for cell in element.iter(f"{_S}c")]
+                    row = "\t".join(cells).rstrip("\t")
+                    if row.strip():
+                        yield row
+
+
+def extract_xlsx_text(path: str, budget: int) -> str:
+    """Sheets in workbook order, one tab-separated line per row.
+
+    The shared-strings table is read in full first, since cells refer to
+    it by index; sheet rows are then streamed until the budget is spent.
+    """
+    try:
+        with zipfile.ZipFile(path) as archive:
+            return _take(_xlsx_lines(archive), budget)
+    except (zipfile.BadZipFile, KeyError, ParseError, ValueError) as exc:
+        raise InvalidDocument("The file is not a valid .xlsx document") from exc
@@ -0,0 +1,96 @@
+"""PDF text extraction engines.
+
+Each backend counts pages and yields the text of a page range, one page at
+a time. They run in the extraction process pool; `extraction.py` picks one
+per deployment with PDF_EXTRACTION_BACKEND.
+
+- `pdfium`: PDFium's text layer through pypdfium2. No layout analysis;
+  by far the fastest.
+- `pdfminer`: pdfminer.six with its default line grouping; pure Python.
+- `pdfplumber`: pdfminer plus pdfplumber's character/word model. The
+  slowest, but its line reconstruction copes best with unusual layouts.
+
+pypdfium2 and pdfminer.six are dependencies of pdfplumber, so all three are
+always available.
+"""
+import io
+from typing import Callable, Dict, Iterator, NamedTuple
+
+import pdfplumber
+import pypdfium2 as pdfium
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+
+
+class PdfBackend(NamedTuple):
+    count_pages: Callable[[str], int]
+    # (path, start, end) -> text of pages [start, end), lazily
+    iter_pages: Callable[[str, int, int], Iterator[str]]
+
+
+def _pdfium_count(path: str) -> int:
+    pdf = pdfium.PdfDocument(path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def _pdfium_pages(path: str, start: int, end: int) -> Iterator[str]:
+    pdf = pdfium.PdfDocument(path)
+    try:
+        for index in range(start, min(end, len(pdf))):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            try:
+                yield textpage.get_text_bounded().replace("\r\n", "\n")
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+
+
+def _pdfminer_count(path: str) -> int:
+    with open(path, "rb") as f:
+        return sum(1 for _ in PDFPage.get_pages(f))
+
+
+def _pdfminer_pages(path: str, start: int, end: int) -> Iterator[str]:
+    manager = PDFResourceManager()
+    out = io.StringIO()
+    device = TextConverter(manager, out, laparams=LAParams())
+    interpreter = PDFPageInterpreter(manager, device)
+    try:
+        with open(path, "rb") as f:
+            for page in PDFPage.get_pages(f, pagenos=set(range(start, end))):
+                interpreter.process_page(page)
+                # Also drops the form feed TextConverter ends each page with.
+                yield out.getvalue().strip()
+                out.seek(0)
+                out.truncate()
+    finally:
+        device.close()
+
+
+def _pdfplumber_count(path: str) -> int:
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def _pdfplumber_pages(path: str, start: int, end: int) -> Iterator[str]:
+    with pdfplumber.open(path, pages=list(range(start + 1, end + 1))) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text() or ""
+            # Drop the page's parsed layout objects before moving on.
+            page.close()
+            yield text
+
+
+PDF_BACKENDS: Dict[str, PdfBackend] = {
+    "pdfium": PdfBackend(_pdfium_count, _pdfium_pages),
+    "pdfminer": PdfBackend(_pdfminer_count, _pdfminer_pages),
+    "pdfplumber": PdfBackend(_pdfplumber_count, _pdfplumber_pages),
+}
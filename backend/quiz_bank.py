@@ -0,0 +1,204 @@
+"""Validated, persisted quizzes generated from uploaded documents.
+
+The model is asked for a JSON array of questions. The reply is assembled
+server-side, validated, and re-requested with the validation error when it
+is malformed. Valid quizzes are stored per document hash, so retakes and
+other students uploading the same file are served from the database.
+"""
+import os
+import re
+import uuid
+from typing import Any, Dict, List, Optional
+
+import httpx
+import orjson
+from fastapi import HTTPException
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from metrics import QUIZ_BANK_LOOKUPS, QUIZ_VALIDATION_FAILURES
+from models import Quiz, QuizQuestion
+from upstream import open_chat_completion
+
+QUIZ_QUESTION_COUNT = 10
+QUIZ_OPTION_COUNT = 4
+QUIZ_GENERATION_ATTEMPTS = int(os.getenv("QUIZ_GENERATION_ATTEMPTS", "3"))
+
+_CODE_FENCE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+
+
+class QuizValidationError(ValueError):
+    pass
+
+
+def _validate_question(item: Any) -> Dict[str, Any]:
+    if not isinstance(item, dict):
+        raise QuizValidationError("each question must be an object")
+    question = item.get("question")
+    options = item.get("options")
+    correct = item.get("correctAnswer")
+    explanation = item.get("explanation", "")
+    if not isinstance(question, str) or not question.strip():
+        raise QuizValidationError('"question" must be a non-empty string')
+    if (
+        not isinstance(options, list)
+        or len(options) != QUIZ_OPTION_COUNT
+        or not all(isinstance(o, str) and o.strip() for o in options)
+        or len(set(options)) != QUIZ_OPTION_COUNT
+    ):
+        raise QuizValidationError(f'"options" must be {QUIZ_OPTION_COUNT} distinct non-empty strings')
+    if correct not in options:
+        raise QuizValidationError('"correctAnswer" must match one of the options exactly')
+    if not isinstance(explanation, str):
+        raise QuizValidationError('"explanation" must be a string')
+    return {
+        "question": question.strip(),
+        "options": options,
+        "correctAnswer": correct,
+        "explanation": explanation.strip(),
+    }
+
+
+def parse_quiz(text: str) -> List[Dict[str, Any]]:
+    """Parse and validate a generated quiz; raises QuizValidationError on bad output.
+
+    Tolerates code fences and text around the array. Invalid questions are
+    dropped; the quiz is rejected if fewer than QUIZ_QUESTION_COUNT remain.
+    """
+    fenced = _CODE_FENCE.search(text)
+    candidate = fenced.group(1) if fenced else text
+    start, end = candidate.find("["), candidate.rfind("]")
+    if start == -1 or end <= start:
+        raise QuizValidationError("the reply does not contain a JSON array")
+    try:
+        items = orjson.loads(candidate[start:end + 1])
+    except orjson.JSONDecodeError as exc:
+        raise QuizValidationError(f"the JSON array is malformed ({exc})") from exc
+    if not isinstance(items, list):
+        raise QuizValidationError("the reply must be a JSON array")
+
+    questions = []
+    first_error = None
+    for item in items:
+        try:
+            questions.append(_validate_question(item))
+        except QuizValidationError as exc:
+            first_error = first_error or exc
+    if len(questions) < QUIZ_QUESTION_COUNT:
+        reason = f"only {len(questions)} valid questions, expected {QUIZ_QUESTION_COUNT}"
+        if first_error:
+            reason += f"; {first_error}"
+        raise QuizValidationError(reason)
+    return questions[:QUIZ_QUESTION_COUNT]
+
+
+async def generate_quiz(
+    client: httpx.AsyncClient,
+    model: str,
+    messages: List[Dict[str, str]],
+    requester: str,
+) -> List[Dict[str, Any]]:
+    """Ask the model for a quiz, re-prompting with the validation error when the reply is invalid."""
+    messages = list(messages)
+    for attempt in range(QUIZ_GENERATION_ATTEMPTS):
+        stream = await open_chat_completion(
+            client,
+            {"model": model, "messages": messages},
+            "Failed to generate content",
+            endpoint="generate_quiz",
+            requester=requester,
+        )
+        reply = await stream.read_text()
+        try:
+            return parse_quiz(reply)
+        except QuizValidationError as exc:
+            QUIZ_VALIDATION_FAILURES.inc()
+            messages = [
+                *messages[:2],
+                {"role": "assistant", "content": reply},
+                {
+                    "role": "user",
+                    "content": (
+                        f"That output is invalid: {exc}. Reply again with ONLY a JSON array of "
+                        f"exactly {QUIZ_QUESTION_COUNT} question objects in the required format."
+                    ),
+                },
+            ]
+    raise HTTPException(status_code=502, detail="Failed to generate a valid quiz, please try again")
+
+
+async def load_quiz(
+    db: AsyncSession, document_hash: str, prompt_version: str
+) -> Optional[Dict[str, Any]]:
+    """Latest stored quiz for a document, fetched in one indexed query."""
+    latest = (
+        select(Quiz.id)
+        .where(Quiz.document_hash == document_hash, Quiz.prompt_version == prompt_version)
+        .order_by(Quiz.created_at.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    rows = (
+        await db.execute(
+            select(
+                QuizQuestion.quiz_id,
+                QuizQuestion.question,
+                QuizQuestion.options,
+                QuizQuestion.correct_answer,
+                QuizQuestion.explanation,
+            )
+            .where(QuizQuestion.quiz_id == latest)
+            .order_by(QuizQuestion.position)
+        )
+    ).all()
+    QUIZ_BANK_LOOKUPS.labels("hit" if rows else "miss").inc()
+    if not rows:
+        return None
+    return {
+        "quizId": str(rows[0].quiz_id),
+        "questions": [
+            {
+                "question": row.question,
+                "options": row.options,
+                "correctAnswer": row.correct_answer,
+                "explanation": row.explanation,
+            }
+            for row in rows
+        ],
+    }
+
+
+async def save_quiz(
+    db: AsyncSession,
+    document_hash: str,
+    prompt_version: str,
+    model: str,
+    questions: List[Dict[str, Any]],
+) -> uuid.UUID:
+    quiz_id = uuid.uuid4()
+    await db.execute(
+        insert(Quiz).values(
+            id=quiz_id,
+            document_hash=document_hash,
+            prompt_version=prompt_version,
+            model=model,
+            question_count=len(questions),
+        )
+    )
+    await db.execute(
+        insert(QuizQuestion).values(
+            [
+                {
+                    "quiz_id": quiz_id,
+                    "position": position,
+                    "question": q["question"],
+                    "options": q["options"],
+                    "correct_answer": q["correctAnswer"],
+                    "explanation": q["explanation"],
+                }
+                for position, q in enumerate(questions)
+            ]
+        )
+    )
+    await db.commit()
+    return quiz_id
@@ -0,0 +1,126 @@
+import math
+import os
+import re
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+RETRIEVAL_CHUNK_CHARS = int(os.getenv("RETRIEVAL_CHUNK_CHARS", "800"))
+RETRIEVAL_TOKEN_BUDGET = int(os.getenv("RETRIEVAL_TOKEN_BUDGET", "1500"))
+RETRIEVAL_INDEX_CACHE_SIZE = int(os.getenv("RETRIEVAL_INDEX_CACHE_SIZE", "64"))
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Rough chars-per-token ratio for Llama-family tokenizers on mixed EN/RU text.
+CHARS_PER_TOKEN = 4
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1]
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def chunk_text(text: str, chunk_chars: int = RETRIEVAL_CHUNK_CHARS) -> List[str]:
+    """Split text into chunks of roughly `chunk_chars`, breaking on line boundaries."""
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for line in text.splitlines():
+        while len(line) > chunk_chars:
+            if current:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            chunks.append(line[:chunk_chars])
+            line = line[chunk_chars:]
+        if size + len(line) > chunk_chars and current:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return [c for c in chunks if c.strip()]
+
+
+class BM25Index:
+    """In-process BM25 index over document chunks using term postings."""
+
+    def __init__(self, chunks: List[str]):
+        self.chunks = chunks
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.lengths: List[int] = []
+        for chunk_id, chunk in enumerate(chunks):
+            terms = tokenize(chunk)
+            self.lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                self.postings.setdefault(term, []).append((chunk_id, tf))
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        n = len(chunks)
+        self.idf = {
+            term: math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for term, plist in self.postings.items()
+        }
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[int, float]]:
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = self.idf[term]
+            for chunk_id, tf in plist:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[chunk_id] / self.avg_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+def build_index(text: str) -> BM25Index:
+    return BM25Index(chunk_text(text))
+
+
+def select_context(index: BM25Index, query: str, token_budget: int = RETRIEVAL_TOKEN_BUDGET) -> str:
+    """Pack the best-scoring chunks for `query` into `token_budget`, in document order.
+
+    Falls back to the leading chunks when nothing in the query matches.
+    """
+    ranked = [chunk_id for chunk_id, _ in index.search(query, limit=len(index.chunks))]
+    if not ranked:
+        ranked = list(range(len(index.chunks)))
+
+    selected: List[int] = []
+    used = 0
+    for chunk_id in ranked:
+        cost = estimate_tokens(index.chunks[chunk_id])
+        if used + cost > token_budget:
+            continue
+        selected.append(chunk_id)
+        used += cost
+        if used >= token_budget:
+            break
+    return "\n\n[...]\n\n".join(index.chunks[i] for i in sorted(selected))
+
+
+class IndexCache:
+    """Small LRU of built indexes keyed by document session id."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, BM25Index]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[BM25Index]:
+        index = self._entries.get(key)
+        if index is not None:
+            self._entries.move_to_end(key)
+        return index
+
+    def put(self, key: str, index: BM25Index) -> None:
+        self._entries[key] = index
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+index_cache = IndexCache(RETRIEVAL_INDEX_CACHE_SIZE)
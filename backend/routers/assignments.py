@@ -1,196 +1,278 @@
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import JSONResponse
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import String, any_, bindparam, delete, func, insert, select, update, values
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import column
 
 from database import get_db
 from models import Assignment
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page, split_page
 from schemas import (
+    AssignmentBatchRequest,
     AssignmentCreate,
-    AssignmentRead,
     AssignmentUpdate,
-    verify_access_token,
 )
+from security import get_current_user_id
 
 router = APIRouter()
 
+ASSIGNMENT_BATCH_MAX_OPERATIONS = 500
 
-def _get_token_from_request(request: Request) -> Optional[str]:
-    """Get auth token from cookie (browser) or Authorization Bearer (e.g. Postman)."""
-    token = request.cookies.get("auth_token")
-    if token:
-        return token
-    auth = request.headers.get("Authorization")
-    if auth and auth.lower().startswith("bearer "):
-        return auth[7:].strip()
-    return None
 
+# Reads select these columns, and writes return them, instead of hydrating ORM objects.
+ASSIGNMENT_COLUMNS = (
+    Assignment.id,
+    Assignment.user_id,
+    Assignment.title,
+    Assignment.course,
+    Assignment.status,
+    Assignment.score,
+    Assignment.created_at,
+)
+
+
+def _assignment_out(a) -> dict:
+    """AssignmentRead-shaped dict from a row or ORM object; ORJSONResponse encodes it as-is.
 
-async def get_current_user_id(request: Request) -> UUID:
-    """Get current user id from auth cookie or Bearer token or raise 401."""
-    token = _get_token_from_request(request)
-    if not token:
-        raise ValueError("Not authenticated")
-    decoded = verify_access_token(token)
-    if not decoded or "userId" not in decoded:
-        raise ValueError("Invalid token")
-    return UUID(decoded["userId"])
+    asyncpg returns its own uuid.UUID subclass, which orjson refuses, so ids are
+    rendered as strings here.
+    """
+    return {
+        "id": str(a.id),
+        "user_id": str(a.user_id),
+        "title": a.title,
+        "course": a.course,
+        "status": a.status,
+        "score": a.score or "-",
+        "createdAt": a.created_at,
+    }
+
+
+def _ids_param(ids):
+    return any_(bindparam(None, list(ids), type_=ARRAY(PG_UUID(as_uuid=True))))
 
 
 @router.get("")
 async def list_assignments(
-    request: Request,
+    user_id: UUID = Depends(get_current_user_id),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
 ):
     try:
-        user_id = await get_current_user_id(request)
-    except ValueError as e:
-        return JSONResponse(
-            status_code=401,
-            content={"message": str(e)},
+        stmt = keyset_page(
+            select(*ASSIGNMENT_COLUMNS).where(Assignment.user_id == user_id),
+            Assignment.created_at,
+            Assignment.id,
+            limit,
+            cursor,
+            id_type=UUID,
         )
-    result = await db.execute(
-        select(Assignment).where(Assignment.user_id == user_id).order_by(Assignment.created_at.desc())
-    )
-    assignments = result.scalars().all()
-    return JSONResponse(
+    except ValueError as e:
+        return ORJSONResponse(status_code=400, content={"message": str(e)})
+
+    result = await db.execute(stmt)
+    assignments, next_cursor = split_page(result.all(), limit)
+    return ORJSONResponse(
         status_code=200,
         content={
-            "assignments": [
-                AssignmentRead(
-                    id=a.id,
-                    user_id=a.user_id,
-                    title=a.title,
-                    course=a.course,
-                    status=a.status,
-                    score=a.score or "-",
-                    createdAt=a.created_at,
-                ).model_dump(mode="json")
-                for a in assignments
-            ]
+            "assignments": [_assignment_out(a) for a in assignments],
+            "next_cursor": next_cursor,
         },
     )
 
 
 @router.post("")
 async def create_assignment(
-    request: Request,
     payload: AssignmentCreate,
+    user_id: UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    try:
-        user_id = await get_current_user_id(request)
-    except ValueError as e:
-        return JSONResponse(status_code=401, content={"message": str(e)})
-
-    assignment = Assignment(
-        user_id=user_id,
-        title=payload.title,
-        course=payload.course,
-        status=payload.status or "Pending",
-        score=payload.score or "-",
+    result = await db.execute(
+        insert(Assignment)
+        .values(
+            user_id=user_id,
+            title=payload.title,
+            course=payload.course,
+            status=payload.status or "Pending",
+            score=payload.score or "-",
+        )
+        .returning(*ASSIGNMENT_COLUMNS)
     )
-    db.add(assignment)
+    assignment = result.one()
     await db.commit()
-    await db.refresh(assignment)
-    out = AssignmentRead(
-        id=assignment.id,
-        user_id=assignment.user_id,
-        title=assignment.title,
-        course=assignment.course,
-        status=assignment.status,
-        score=assignment.score or "-",
-        createdAt=assignment.created_at,
-    )
-    return JSONResponse(
+    out = _assignment_out(assignment)
+    return ORJSONResponse(
         status_code=201,
-        content={"assignment": out.model_dump(mode="json"), "message": "Assignment created"},
+        content={"assignment": out, "message": "Assignment created"},
+    )
+
+
+@router.post("/batch")
+async def batch_assignments(
+    payload: AssignmentBatchRequest,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    ops = payload.operations
+    if len(ops) > ASSIGNMENT_BATCH_MAX_OPERATIONS:
+        return ORJSONResponse(
+            status_code=413,
+            content={"message": f"At most {ASSIGNMENT_BATCH_MAX_OPERATIONS} operations per batch"},
+        )
+
+    creates, updates, deletes = [], [], []
+    seen_ids = set()
+    for index, op in enumerate(ops):
+        if op.op == "create":
+            if not op.title or not op.course:
+                return ORJSONResponse(
+                    status_code=400,
+                    content={"message": f"Operation {index}: create requires title and course"},
+                )
+            creates.append(
+                {
+                    "user_id": user_id,
+                    "title": op.title,
+                    "course": op.course,
+                    "status": op.status or "Pending",
+                    "score": op.score or "-",
+                }
+            )
+            continue
+        if op.id is None:
+            return ORJSONResponse(
+                status_code=400,
+                content={"message": f"Operation {index}: {op.op} requires id"},
+            )
+        if op.id in seen_ids:
+            return ORJSONResponse(
+                status_code=400,
+                content={"message": f"Operation {index}: assignment {op.id} appears more than once"},
+            )
+        seen_ids.add(op.id)
+        (updates if op.op == "update" else deletes).append(op)
+
+    if seen_ids:
+        owned = await db.scalars(
+            select(Assignment.id)
+            .where(Assignment.user_id == user_id, Assignment.id == _ids_param(seen_ids))
+            .with_for_update()
+        )
+        missing = seen_ids - set(owned.all())
+        if missing:
+            await db.rollback()
+            return ORJSONResponse(
+                status_code=404,
+                content={
+                    "message": "Assignment not found",
+                    "missing_ids": sorted(str(i) for i in missing),
+                },
+            )
+
+    created_rows, updated_rows = [], []
+    if deletes:
+        await db.execute(
+            delete(Assignment).where(
+                Assignment.user_id == user_id,
+                Assignment.id == _ids_param(op.id for op in deletes),
+            )
+        )
+    if updates:
+        changes = values(
+            column("id", PG_UUID(as_uuid=True)),
+            column("title", String),
+            column("course", String),
+            column("status", String),
+            column("score", String),
+            name="changes",
+        ).data([(op.id, op.title, op.course, op.status, op.score) for op in updates])
+        result = await db.execute(
+            update(Assignment)
+            .where(Assignment.id == changes.c.id, Assignment.user_id == user_id)
+            .values(
+                title=func.coalesce(changes.c.title, Assignment.title),
+                course=func.coalesce(changes.c.course, Assignment.course),
+                status=func.coalesce(changes.c.status, Assignment.status),
+                score=func.coalesce(changes.c.score, Assignment.score),
+            )
+            .returning(*ASSIGNMENT_COLUMNS)
+        )
+        updated_rows = result.all()
+    if creates:
+        result = await db.execute(insert(Assignment).values(creates).returning(*ASSIGNMENT_COLUMNS))
+        created_rows = result.all()
+    await db.commit()
+
+    return ORJSONResponse(
+        status_code=200,
+        content={
+            "message": "Batch applied",
+            "created": [_assignment_out(row) for row in created_rows],
+            "updated": [_assignment_out(row) for row in updated_rows],
+            "deleted": [op.id for op in deletes],
+        },
     )
 
 
 @router.get("/{assignment_id}")
 async def get_assignment(
-    request: Request,
     assignment_id: UUID,
+    user_id: UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    try:
-        user_id = await get_current_user_id(request)
-    except ValueError as e:
-        return JSONResponse(status_code=401, content={"message": str(e)})
-
-    assignment = await db.get(Assignment, assignment_id)
-    if not assignment or assignment.user_id != user_id:
-        return JSONResponse(status_code=404, content={"message": "Assignment not found"})
-    out = AssignmentRead(
-        id=assignment.id,
-        user_id=assignment.user_id,
-        title=assignment.title,
-        course=assignment.course,
-        status=assignment.status,
-        score=assignment.score or "-",
-        createdAt=assignment.created_at,
+    result = await db.execute(
+        select(*ASSIGNMENT_COLUMNS).where(
+            Assignment.id == assignment_id, Assignment.user_id == user_id
+        )
     )
-    return JSONResponse(status_code=200, content={"assignment": out.model_dump(mode="json")})
+    assignment = result.first()
+    if not assignment:
+        return ORJSONResponse(status_code=404, content={"message": "Assignment not found"})
+    out = _assignment_out(assignment)
+    return ORJSONResponse(status_code=200, content={"assignment": out})
 
 
 @router.put("/{assignment_id}")
 async def update_assignment(
-    request: Request,
     assignment_id: UUID,
     payload: AssignmentUpdate,
+    user_id: UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    try:
-        user_id = await get_current_user_id(request)
-    except ValueError as e:
-        return JSONResponse(status_code=401, content={"message": str(e)})
-
-    assignment = await db.get(Assignment, assignment_id)
-    if not assignment or assignment.user_id != user_id:
-        return JSONResponse(status_code=404, content={"message": "Assignment not found"})
-    if payload.title is not None:
-        assignment.title = payload.title
-    if payload.course is not None:
-        assignment.course = payload.course
-    if payload.status is not None:
-        assignment.status = payload.status
-    if payload.score is not None:
-        assignment.score = payload.score
+    owned = (Assignment.id == assignment_id, Assignment.user_id == user_id)
+    changes = payload.model_dump(exclude_none=True)
+    if changes:
+        stmt = update(Assignment).where(*owned).values(**changes).returning(*ASSIGNMENT_COLUMNS)
+    else:
+        stmt = select(*ASSIGNMENT_COLUMNS).where(*owned)
+    assignment = (await db.execute(stmt)).first()
+    if not assignment:
+        return ORJSONResponse(status_code=404, content={"message": "Assignment not found"})
     await db.commit()
-    await db.refresh(assignment)
-    out = AssignmentRead(
-        id=assignment.id,
-        user_id=assignment.user_id,
-        title=assignment.title,
-        course=assignment.course,
-        status=assignment.status,
-        score=assignment.score or "-",
-        createdAt=assignment.created_at,
-    )
-    return JSONResponse(
+    out = _assignment_out(assignment)
+    return ORJSONResponse(
         status_code=200,
-        content={"assignment": out.model_dump(mode="json"), "message": "Assignment updated"},
+        content={"assignment": out, "message": "Assignment updated"},
     )
 
 
 @router.delete("/{assignment_id}")
 async def delete_assignment(
-    request: Request,
     assignment_id: UUID,
+    user_id: UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    try:
-        user_id = await get_current_user_id(request)
-    except ValueError as e:
-        return JSONResponse(status_code=401, content={"message": str(e)})
-
-    assignment = await db.get(Assignment, assignment_id)
-    if not assignment or assignment.user_id != user_id:
-        return JSONResponse(status_code=404, content={"message": "Assignment not found"})
-    await db.delete(assignment)
+    result = await db.execute(
+        delete(Assignment)
+        .where(Assignment.id == assignment_id, Assignment.user_id == user_id)
+        .returning(Assignment.id)
+    )
+    if result.first() is None:
+        return ORJSONResponse(status_code=404, content={"message": "Assignment not found"})
     await db.commit()
-    return JSONResponse(status_code=200, content={"message": "Assignment deleted"})
+    return ORJSONResponse(status_code=200, content={"message": "Assignment deleted"})
@@ -1,99 +1,73 @@
 from datetime import timedelta
-from typing import Optional
+from uuid import UUID
 
-import bcrypt
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import JSONResponse
-from sqlalchemy import select
+from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database import get_db
 from models import User
+from passwords import PasswordHasherBusy, hash_password, needs_rehash, verify_password
 from schemas import (
     UserCreate,
     UserLogin,
     UserRead,
     UserUpdate,
     create_access_token,
-    verify_access_token,
+)
+from security import (
+    USER_COLUMNS,
+    cache_user,
+    get_current_user,
+    get_current_user_id,
+    user_to_read,
 )
 
 router = APIRouter()
 
 
-def _extract_token(request: Request) -> Optional[str]:
-    """Get auth token from cookie (browser) or Authorization Bearer header (Postman/API)."""
-    token = request.cookies.get("auth_token")
-    if token:
-        return token
-    auth = request.headers.get("Authorization", "")
-    if auth.lower().startswith("bearer "):
-        return auth[7:].strip()
-    return None
-
-
-def _user_to_read(user: User) -> UserRead:
-    return UserRead(
-        id=user.id,
-        name=user.name,
-        email=user.email,
-        major=user.major,
-        group=user.group,
-        gpa=user.gpa,
-        study_goal=user.study_goal,
-        weak_subjects=user.weak_subjects,
-        study_hours_per_week=user.study_hours_per_week,
-        createdAt=user.created_at,
-    )
-
-
 @router.post("/register")
 async def register_user(payload: UserCreate, db: AsyncSession = Depends(get_db)):
-    
-    existing = await db.scalar(select(User).where(User.email == payload.email))
-    if existing:
-        return JSONResponse(
+    # Known emails are turned away before hashing, so repeated sign-ups cannot
+    # tie up the hasher slots that logins need.
+    existing = await db.scalar(select(User.id).where(User.email == payload.email))
+    if existing is not None:
+        return ORJSONResponse(
             status_code=409,
             content={"message": "User already exists"},
         )
 
-    
-    password_hash = bcrypt.hashpw(
-        payload.password.encode("utf-8"),
-        bcrypt.gensalt()
-    ).decode("utf-8")
+    try:
+        password_hash = await hash_password(payload.password)
+    except PasswordHasherBusy as exc:
+        return ORJSONResponse(
+            status_code=503,
+            content={"message": str(exc)},
+            headers={"Retry-After": "1"},
+        )
 
-    
-    user = User(
-        name=payload.name,
-        email=payload.email,
-        password_hash=password_hash,
-        
+    # ON CONFLICT still covers a registration racing this one for the same email.
+    result = await db.execute(
+        insert(User)
+        .values(name=payload.name, email=payload.email, password_hash=password_hash)
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(*USER_COLUMNS)
     )
-
-    db.add(user)
+    user = result.first()
+    if user is None:
+        return ORJSONResponse(
+            status_code=409,
+            content={"message": "User already exists"},
+        )
     await db.commit()
-    await db.refresh(user)
 
-    
-    user_out = UserRead(
-        id=user.id,
-        name=user.name,
-        email=user.email,
-        major=user.major,
-        group=user.group,
-        gpa=user.gpa,
-        study_goal=user.study_goal,
-        weak_subjects=user.weak_subjects,
-        study_hours_per_week=user.study_hours_per_week,
-        createdAt=user.created_at,
-    )
-
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=201,
         content={
             "message": "User created successfully",
-            "user": _user_to_read(user).model_dump(mode="json"),
+            "user": user_to_read(user).model_dump(mode="json"),
         },
     )
 
@@ -103,20 +77,33 @@ async def login_user(payload: UserLogin, db: AsyncSession = Depends(get_db)):
    
     user = await db.scalar(select(User).where(User.email == payload.email))
     if not user:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=401,
             content={"message": "Invalid credentials"},
         )
 
     
-    if not bcrypt.checkpw(
-        payload.password.encode("utf-8"),
-        user.password_hash.encode("utf-8"),
-    ):
-        return JSONResponse(
+    try:
+        valid = await verify_password(payload.password, user.password_hash)
+    except PasswordHasherBusy as exc:
+        return ORJSONResponse(
+            status_code=503,
+            content={"message": str(exc)},
+            headers={"Retry-After": "1"},
+        )
+    if not valid:
+        return ORJSONResponse(
             status_code=401,
             content={"message": "Invalid credentials"},
         )
+    if needs_rehash(user.password_hash):
+        # The password is already verified; a busy hasher only postpones the
+        # upgrade to a later login.
+        try:
+            user.password_hash = await hash_password(payload.password)
+            await db.commit()
+        except PasswordHasherBusy:
+            pass
 
     
     token = create_access_token(
@@ -124,7 +111,7 @@ async def login_user(payload: UserLogin, db: AsyncSession = Depends(get_db)):
         expires_delta=timedelta(days=1),
     )
 
-    response = JSONResponse(
+    response = ORJSONResponse(
         status_code=200,
         content={"message": "Login successful"},
     )
@@ -144,65 +131,36 @@ async def login_user(payload: UserLogin, db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/me")
-async def get_me(request: Request, db: AsyncSession = Depends(get_db)):
-    token = _extract_token(request)
-    if not token:
-        return JSONResponse(status_code=401, content={"message": "Not authenticated"})
-
-    decoded = verify_access_token(token)
-    if not decoded or "userId" not in decoded:
-        return JSONResponse(status_code=401, content={"message": "Invalid token"})
-
-    user = await db.get(User, decoded["userId"])
-    if not user:
-        return JSONResponse(status_code=404, content={"message": "User not found"})
-
-    return JSONResponse(
+async def get_me(user: UserRead = Depends(get_current_user)):
+    return ORJSONResponse(
         status_code=200,
-        content={"user": _user_to_read(user).model_dump(mode="json")},
+        content={"user": user.model_dump(mode="json")},
     )
 
 @router.patch("/me")
 async def update_me(
-    request: Request,
     payload: UserUpdate,
+    user_id: UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    token = _extract_token(request)
-    if not token:
-        return JSONResponse(status_code=401, content={"message": "Not authenticated"})
-
-    decoded = verify_access_token(token)
-    if not decoded or "userId" not in decoded:
-        return JSONResponse(status_code=401, content={"message": "Invalid token"})
-
-    user = await db.get(User, decoded["userId"])
-    if not user:
-        return JSONResponse(status_code=404, content={"message": "User not found"})
-
     # Применяем только переданные поля (partial update)
-    if payload.name is not None:
-        user.name = payload.name
-    if payload.major is not None:
-        user.major = payload.major
-    if payload.group is not None:
-        user.group = payload.group
-    if payload.gpa is not None:
-        user.gpa = payload.gpa
-    if payload.study_goal is not None:
-        user.study_goal = payload.study_goal
-    if payload.weak_subjects is not None:
-        user.weak_subjects = payload.weak_subjects
-    if payload.study_hours_per_week is not None:
-        user.study_hours_per_week = payload.study_hours_per_week
-
+    changes = payload.model_dump(exclude_none=True)
+    if changes:
+        stmt = update(User).where(User.id == user_id).values(**changes).returning(*USER_COLUMNS)
+    else:
+        stmt = select(*USER_COLUMNS).where(User.id == user_id)
+    user = (await db.execute(stmt)).first()
+    if not user:
+        return ORJSONResponse(status_code=404, content={"message": "User not found"})
     await db.commit()
-    await db.refresh(user)
 
-    return JSONResponse(
+    profile = user_to_read(user)
+    cache_user(profile)
+
+    return ORJSONResponse(
         status_code=200,
         content={
             "message": "Profile updated successfully",
-            "user": _user_to_read(user).model_dump(mode="json"),
+            "user": profile.model_dump(mode="json"),
         },
     )
\ No newline at end of file
@@ -1,57 +1,63 @@
-from typing import AsyncGenerator
-
-import os
 import httpx
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
+from conversations import conversation_store, record_turn
+from model_router import model_router
 from schemas import ChatRequest
+from security import get_requester_key
+from sse import SSE_HEADERS, SSE_MEDIA_TYPE
+from upstream import get_upstream_client, open_chat_completion
 
 router = APIRouter()
 
 
-GROQ_BASE_URL = "https://api.groq.com/openai/v1"
-GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
-
-
 @router.post("/chat")
-async def ai_chat(request_body: ChatRequest):
-    if not request_body.messages:
-        raise HTTPException(status_code=400, detail="Messages array is required")
-
-    system_prompt = {
-        "role": "system",
-        "content": (
-            "You are a strict academic assistant for students.\n"
-            "RULES:\n"
-            "1. ONLY answer questions related to studies, assignments, exams, or academic materials.\n"
-            "2. If a user asks about anything else (movies, games, jokes, general chat), "
-            "politely decline and steer them back to studying.\n"
-            "3. Be encouraging but focused.\n"
-            "4. Use Markdown for clear formatting."
-        ),
-    }
-
+async def ai_chat(
+    request_body: ChatRequest,
+    client: httpx.AsyncClient = Depends(get_upstream_client),
+    requester: str = Depends(get_requester_key),
+):
+    if not request_body.message.strip():
+        raise HTTPException(status_code=400, detail="Message is required")
+
+    if request_body.conversationId:
+        conversation = conversation_store.get(request_body.conversationId, requester, "ai_chat")
+        if conversation is None:
+            raise HTTPException(status_code=404, detail="Conversation not found or expired")
+    else:
+        conversation = conversation_store.new(requester, "ai_chat")
+
+    system_prompt = (
+        "You are a strict academic assistant for students.\n"
+        "RULES:\n"
+        "1. ONLY answer questions related to studies, assignments, exams, or academic materials.\n"
+        "2. If a user asks about anything else (movies, games, jokes, general chat), "
+        "politely decline and steer them back to studying.\n"
+        "3. Be encouraging but focused.\n"
+        "4. Use Markdown for clear formatting."
+    )
+
+    messages = conversation.prompt_messages(system_prompt, request_body.message)
     payload = {
-        "model": "llama-3.3-70b-versatile",
-        "messages": [system_prompt, *[m.model_dump() for m in request_body.messages]],
-        "stream": True,
+        "model": model_router.route("ai_chat", messages).model,
+        "messages": messages,
     }
 
-    headers = {"Authorization": f"Bearer {GROQ_API_KEY}"} if GROQ_API_KEY else {}
-
-    async def stream_completion() -> AsyncGenerator[bytes, None]:
-        groq_url = f"{GROQ_BASE_URL}/chat/completions"
-        async with httpx.AsyncClient(timeout=None) as client:
-            try:
-                async with client.stream("POST", groq_url, json=payload, headers=headers) as resp:
-                    resp.raise_for_status()
-                    async for chunk in resp.aiter_bytes():
-                        if chunk:
-                            yield chunk
-            except httpx.HTTPError as exc:
-                err_msg = "Failed to connect to AI service (Groq API)."
-                raise HTTPException(status_code=500, detail=err_msg) from exc
-
-    return StreamingResponse(stream_completion(), media_type="text/plain; charset=utf-8")
-
+    stream = await open_chat_completion(
+        client,
+        payload,
+        "Failed to connect to AI service (Groq API).",
+        endpoint="ai_chat",
+        requester=requester,
+    )
+    # Stored only once the upstream stream is open, so refused or failed
+    # requests do not leave empty conversations behind.
+    conversation_store.add(conversation)
+    return StreamingResponse(
+        record_turn(client, conversation, request_body.message, stream),
+        media_type=SSE_MEDIA_TYPE,
+        headers={**SSE_HEADERS, "X-Conversation-Id": conversation.id},
+        background=BackgroundTask(stream.aclose),
+    )
@@ -1,58 +1,74 @@
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import JSONResponse
+import os
+from typing import List, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select
 
 from database import get_db
 from models import QuizHistory
-from schemas import QuizHistoryCreate, verify_access_token
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page, split_page
+from schemas import QuizHistoryCreate
+from security import get_current_user_id
+from topic_stats import aggregate_topic_results, topic_stats_upsert, topic_stats_upsert_many
 
 router = APIRouter()
 
-def _extract_token(request: Request):
-    token = request.cookies.get("auth_token")
-    if token:
-        return token
-    auth = request.headers.get("Authorization", "")
-    if auth.lower().startswith("bearer "):
-        return auth[7:].strip()
-    return None
+HISTORY_BATCH_MAX_ITEMS = int(os.getenv("HISTORY_BATCH_MAX_ITEMS", "5000"))
+# Batches at least this large are written with COPY instead of a multi-row INSERT
+# (keeps the INSERT below Postgres' 32767 bind-parameter limit: 5 per row).
+HISTORY_BATCH_COPY_THRESHOLD = int(os.getenv("HISTORY_BATCH_COPY_THRESHOLD", "1000"))
+
+
+HISTORY_COLUMNS = (
+    QuizHistory.id,
+    QuizHistory.user_id,
+    QuizHistory.topic,
+    QuizHistory.score,
+    QuizHistory.total_questions,
+    QuizHistory.percentage,
+    QuizHistory.created_at,
+)
+
+
+def _percentage(score: int, total_questions: int) -> int:
+    return int((score / total_questions) * 100)
+
 
 @router.post("/quiz")
 async def save_quiz_result(
     payload: QuizHistoryCreate,
-    request: Request,
+    user_id: UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    token = _extract_token(request)
-    if not token:
-        return JSONResponse(status_code=401, content={"message": "Not authenticated"})
-
-    decoded = verify_access_token(token)
-    if not decoded or "userId" not in decoded:
-        return JSONResponse(status_code=401, content={"message": "Invalid token"})
-
-    user_id = decoded["userId"]
-
     if payload.total_questions <= 0:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=400,
             content={"message": "total_questions must be greater than 0"},
         )
 
-    percentage = int((payload.score / payload.total_questions) * 100)
+    percentage = _percentage(payload.score, payload.total_questions)
 
-    history = QuizHistory(
+    # The history row is inserted by a CTE of the stats upsert: one statement.
+    history = insert(QuizHistory).values(
         user_id=user_id,
         topic=payload.topic,
         score=payload.score,
         total_questions=payload.total_questions,
         percentage=percentage,
     )
-
-    db.add(history)
+    await db.execute(
+        topic_stats_upsert(
+            user_id=user_id,
+            topic=payload.topic,
+            percentage_sum=percentage,
+            first_percentage=percentage,
+            last_percentage=percentage,
+        ).add_cte(history.cte("history"))
+    )
     await db.commit()
-    await db.refresh(history)
 
     return {
         "message": "Quiz result saved successfully",
@@ -60,24 +76,97 @@ async def save_quiz_result(
     }
 
 
-@router.get("/quiz")
-async def get_quiz_history(
-    request: Request,
+@router.post("/quiz/batch")
+async def save_quiz_results_batch(
+    payload: List[QuizHistoryCreate],
+    user_id: UUID = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    token = _extract_token(request)
-    if not token:
-        return JSONResponse(status_code=401, content={"message": "Not authenticated"})
+    if len(payload) > HISTORY_BATCH_MAX_ITEMS:
+        return ORJSONResponse(
+            status_code=413,
+            content={"message": f"At most {HISTORY_BATCH_MAX_ITEMS} results per batch"},
+        )
 
-    decoded = verify_access_token(token)
-    if not decoded or "userId" not in decoded:
-        return JSONResponse(status_code=401, content={"message": "Invalid token"})
+    results = []
+    rows = []
+    for index, item in enumerate(payload):
+        if item.total_questions <= 0:
+            results.append(
+                {
+                    "index": index,
+                    "status": "error",
+                    "message": "total_questions must be greater than 0",
+                }
+            )
+            continue
+        percentage = _percentage(item.score, item.total_questions)
+        rows.append(
+            {
+                "user_id": user_id,
+                "topic": item.topic,
+                "score": item.score,
+                "total_questions": item.total_questions,
+                "percentage": percentage,
+            }
+        )
+        results.append({"index": index, "status": "created", "percentage": percentage})
+
+    if rows:
+        # The upsert goes first: asyncpg only opens the session's transaction on the
+        # first statement, and a COPY issued before that would commit on its own.
+        await db.execute(
+            topic_stats_upsert_many(
+                aggregate_topic_results(user_id, [(r["topic"], r["percentage"]) for r in rows])
+            )
+        )
+        if len(rows) >= HISTORY_BATCH_COPY_THRESHOLD:
+            conn = await db.connection()
+            raw = await conn.get_raw_connection()
+            columns = ["user_id", "topic", "score", "total_questions", "percentage"]
+            await raw.driver_connection.copy_records_to_table(
+                QuizHistory.__tablename__,
+                records=[tuple(row[c] for c in columns) for row in rows],
+                columns=columns,
+            )
+        else:
+            await db.execute(insert(QuizHistory).values(rows))
+        await db.commit()
 
-    user_id = decoded["userId"]
+    return {
+        "message": "Quiz results processed",
+        "created": len(rows),
+        "failed": len(payload) - len(rows),
+        "results": results,
+    }
 
-    result = await db.execute(
-        select(QuizHistory).where(QuizHistory.user_id == user_id)
-    )
-    history = result.scalars().all()
 
-    return {"history": history}
\ No newline at end of file
+@router.get("/quiz")
+async def get_quiz_history(
+    user_id: UUID = Depends(get_current_user_id),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        stmt = keyset_page(
+            select(*HISTORY_COLUMNS).where(QuizHistory.user_id == user_id),
+            QuizHistory.created_at,
+            QuizHistory.id,
+            limit,
+            cursor,
+            id_type=int,
+        )
+    except ValueError as e:
+        return ORJSONResponse(status_code=400, content={"message": str(e)})
+
+    result = await db.execute(stmt)
+    history, next_cursor = split_page(result.all(), limit)
+
+    return ORJSONResponse(
+        content={
+            # str(): orjson refuses asyncpg's uuid.UUID subclass.
+            "history": [{**row._asdict(), "user_id": str(row.user_id)} for row in history],
+            "next_cursor": next_cursor,
+        }
+    )
\ No newline at end of file
@@ -1,21 +1,46 @@
-import io
-import os
-import uuid
-from typing import AsyncGenerator
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
 
 import httpx
-import pdfplumber
-from fastapi import APIRouter, File, HTTPException, UploadFile
-from fastapi.responses import JSONResponse, StreamingResponse
-
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+
+from conversations import conversation_store, record_turn
+from database import AsyncSessionLocal
+from document_store import document_store
+from extraction import (
+    ExtractionBusy,
+    ExtractionTimeout,
+    extract_office_text,
+    extract_pdf_text,
+    extract_plain_text,
+)
+from generation_cache import (
+    GENERATION_CACHE_BYPASS_HEADER,
+    generation_cache,
+    generation_key,
+    replay,
+)
+from jobs import Job, JobQueueFull, job_queue
+from model_router import Route, model_router
+from ooxml import InvalidDocument
+from quiz_bank import generate_quiz, load_quiz, save_quiz
+from retrieval import build_index, index_cache, select_context
 from schemas import QuizChatRequest, QuizGenerateRequest
+from security import get_requester_key
+from singleflight import explain_flights, quiz_flights
+from sse import SSE_HEADERS, SSE_MEDIA_TYPE, SSEParser
+from uploads import InvalidUpload, UploadTooLarge, spooled_upload
+from upstream import get_upstream_client, open_chat_completion
 
 router = APIRouter()
 
 
-GROQ_BASE_URL = "https://api.groq.com/openai/v1"
-GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 MAX_CONTEXT_CHARS = 6000
+# Bump whenever the explain/quiz prompts change so cached generations are not reused.
+PROMPT_VERSION = "1"
 
 
 def truncate_for_context(text: str) -> str:
@@ -26,69 +51,98 @@ def truncate_for_context(text: str) -> str:
     )
 
 
-@router.post("/upload")
-async def upload_quiz_file(file: UploadFile = File(...)):
-    if not file:
-        return JSONResponse({"error": "No file provided"}, status_code=400)
+def _cache_status(leader: bool, bypass: bool) -> str:
+    if not leader:
+        return "COALESCED"
+    return "BYPASS" if bypass else "MISS"
+
+
+# The body is parsed by uploads.spooled_upload rather than a File() parameter,
+# so describe the form for the OpenAPI docs by hand.
+_UPLOAD_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "required": ["file"],
+                "properties": {"file": {"type": "string", "format": "binary"}},
+            }
+        }
+    },
+}
 
-    filename = file.filename or "document"
-    ext = (filename.split(".")[-1] if "." in filename else "").lower()
 
+@router.post("/upload", openapi_extra={"requestBody": _UPLOAD_REQUEST_BODY})
+async def upload_quiz_file(request: Request):
     try:
-        if ext in {"txt", "md"}:
-            content_bytes = await file.read()
-            text = content_bytes.decode("utf-8", errors="ignore")
-        elif ext == "pdf":
-            content_bytes = await file.read()
-            with pdfplumber.open(io.BytesIO(content_bytes)) as pdf:
-                pages_text = [page.extract_text() or "" for page in pdf.pages]
-            text = "\n".join(pages_text)
-        elif ext in {"doc", "docx", "xlsx"}:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File type .{ext} is not fully supported. Please use .txt, .md, or .pdf for best results.",
-            )
-        else:
-            content_bytes = await file.read()
-            text = content_bytes.decode("utf-8", errors="ignore")
+        async with spooled_upload(request) as upload:
+            filename = upload.filename or "document"
+            ext = (filename.split(".")[-1] if "." in filename else "").lower()
+
+            if ext == "doc":
+                raise HTTPException(
+                    status_code=400,
+                    detail="Legacy .doc files are not supported. Please save the file as .docx or .pdf.",
+                )
+
+            cached_text = document_store.get(upload.key)
+            if cached_text is not None:
+                return ORJSONResponse(
+                    {
+                        "success": True,
+                        "sessionId": upload.key,
+                        "characters": len(cached_text),
+                        "message": "Document processed successfully",
+                    }
+                )
+
+            if ext == "pdf":
+                text = await extract_pdf_text(upload.path)
+            elif ext in {"docx", "xlsx"}:
+                text = await extract_office_text(upload.path, ext)
+            else:
+                text = await asyncio.to_thread(extract_plain_text, upload.path)
     except HTTPException:
         raise
+    except UploadTooLarge as exc:
+        return ORJSONResponse({"error": str(exc)}, status_code=413)
+    except (InvalidUpload, InvalidDocument) as exc:
+        return ORJSONResponse({"error": str(exc)}, status_code=400)
+    except ExtractionBusy as exc:
+        return ORJSONResponse({"error": str(exc)}, status_code=503, headers={"Retry-After": "5"})
+    except ExtractionTimeout as exc:
+        return ORJSONResponse({"error": str(exc)}, status_code=504)
     except Exception as exc:  # noqa: BLE001
-        return JSONResponse(
+        return ORJSONResponse(
             {"error": "Failed to process document", "details": str(exc)}, status_code=500
         )
 
     cleaned_text = (text or "").strip() or "No readable content found in the document."
+    document_store.put(upload.key, cleaned_text)
 
-    session_id = f"session-{uuid.uuid4()}"
-
-    return JSONResponse(
+    return ORJSONResponse(
         {
             "success": True,
-            "sessionId": session_id,
-            "extractedText": cleaned_text,
+            "sessionId": upload.key,
+            "characters": len(cleaned_text),
             "message": "Document processed successfully",
         }
     )
 
 
-@router.post("/generate")
-async def generate_from_document(body: QuizGenerateRequest):
-    if body.type not in {"explain", "quiz"}:
-        return JSONResponse({"error": "Invalid generation type"}, status_code=400)
-
-    context_text = (body.documentText or "").strip()
-    if not context_text:
-        return JSONResponse(
-            {
-                "error": "No document content available. Please upload a document first.",
-            },
-            status_code=400,
-        )
+class Generation(NamedTuple):
+    messages: List[Dict[str, str]]
+    route: Route
+    # Generation cache key; identical requests already in flight (same primary
+    # model and prompt) join that generation instead of starting another one.
+    key: str
+
 
+def _prepare_generation(kind: str, context_text: str) -> Generation:
     context_text = truncate_for_context(context_text)
 
-    if body.type == "explain":
+    if kind == "explain":
         system_prompt = (
             "You are a study assistant. Your task is to explain and help people learn. "
             "Study the received data and explain what it is about. Also answer follow-up "
@@ -117,86 +171,259 @@ async def generate_from_document(body: QuizGenerateRequest):
             f"in this document:\n\n{context_text}"
         )
 
-    payload = {
-        "model": "llama-3.3-70b-versatile",
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        "stream": True,
-    }
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+    route = model_router.route(f"generate_{kind}", messages)
+    return Generation(
+        messages, route, generation_key(route.primary, kind, context_text, PROMPT_VERSION)
+    )
 
-    headers = {"Authorization": f"Bearer {GROQ_API_KEY}"} if GROQ_API_KEY else {}
 
-    async def stream_completion() -> AsyncGenerator[bytes, None]:
-        groq_url = f"{GROQ_BASE_URL}/chat/completions"
-        async with httpx.AsyncClient(timeout=None) as client:
-            try:
-                async with client.stream("POST", groq_url, json=payload, headers=headers) as resp:
-                    resp.raise_for_status()
-                    async for chunk in resp.aiter_bytes():
-                        if chunk:
-                            yield chunk
-            except httpx.HTTPError as exc:
-                msg = "Failed to generate content"
-                raise HTTPException(status_code=500, detail=msg) from exc
+async def _stored_quiz(document_hash: str) -> Optional[Dict[str, Any]]:
+    # Short-lived session: a request-scoped one would hold its connection
+    # through the whole generation.
+    async with AsyncSessionLocal() as session:
+        return await load_quiz(session, document_hash, PROMPT_VERSION)
+
+
+async def _run_quiz_generation(
+    client: httpx.AsyncClient, generation: Generation, requester: str, document_hash: str
+) -> Tuple[Dict[str, Any], bool]:
+    """Generate and store a quiz, or join the identical one in flight."""
+
+    async def generate_and_store():
+        model = generation.route.model
+        questions = await generate_quiz(client, model, generation.messages, requester)
+        # Own session: the work outlives the request that started it.
+        async with AsyncSessionLocal() as session:
+            quiz_id = await save_quiz(session, document_hash, PROMPT_VERSION, model, questions)
+        return {"quizId": str(quiz_id), "questions": questions}
+
+    return await quiz_flights.run(generation.key, generate_and_store)
+
+
+async def _join_explain_generation(
+    client: httpx.AsyncClient, generation: Generation, requester: str
+) -> Tuple[AsyncIterator[bytes], bool]:
+    """Subscribe to the explanation stream for this prompt, starting it if needed."""
+    return await explain_flights.join(
+        generation.key,
+        lambda: open_chat_completion(
+            client,
+            {"model": generation.route.model, "messages": generation.messages},
+            "Failed to generate content",
+            endpoint="generate_explain",
+            requester=requester,
+        ),
+    )
 
-    return StreamingResponse(stream_completion(), media_type="text/plain; charset=utf-8")
 
+def _document_not_found() -> ORJSONResponse:
+    return ORJSONResponse(
+        {
+            "error": "Document session not found or expired. Please upload the document again.",
+        },
+        status_code=404,
+    )
 
-@router.post("/chat")
-async def quiz_chat(body: QuizChatRequest):
-    if not body.messages:
-        return JSONResponse({"error": "Messages array is required"}, status_code=400)
-
-    context_text = (body.documentText or "").strip()
-    if not context_text:
-        return JSONResponse(
-            {
-                "error": "No document context. Please upload and process a document first.",
-            },
-            status_code=400,
+
+def _bypass_requested(request: Request) -> bool:
+    return request.headers.get(GENERATION_CACHE_BYPASS_HEADER, "").lower() in {"1", "true"}
+
+
+@router.post("/generate")
+async def generate_from_document(
+    request: Request,
+    body: QuizGenerateRequest,
+    client: httpx.AsyncClient = Depends(get_upstream_client),
+    requester: str = Depends(get_requester_key),
+):
+    if body.type not in {"explain", "quiz"}:
+        return ORJSONResponse({"error": "Invalid generation type"}, status_code=400)
+
+    bypass = _bypass_requested(request)
+    if body.type == "quiz" and not bypass:
+        stored = await _stored_quiz(body.sessionId)
+        if stored is not None:
+            return ORJSONResponse(stored, headers={"X-Cache": "HIT"})
+
+    context_text = document_store.get(body.sessionId)
+    if context_text is None:
+        return _document_not_found()
+
+    generation = _prepare_generation(body.type, context_text)
+    if body.type == "quiz":
+        quiz, leader = await _run_quiz_generation(client, generation, requester, body.sessionId)
+        return ORJSONResponse(quiz, headers={"X-Cache": _cache_status(leader, bypass)})
+
+    cached = None if bypass else generation_cache.get(generation.key)
+    if cached is not None:
+        return StreamingResponse(
+            replay(cached),
+            media_type=SSE_MEDIA_TYPE,
+            headers={**SSE_HEADERS, "X-Cache": "HIT"},
         )
 
-    context_text = truncate_for_context(context_text)
+    events, leader = await _join_explain_generation(client, generation, requester)
+    return StreamingResponse(
+        events,
+        media_type=SSE_MEDIA_TYPE,
+        headers={**SSE_HEADERS, "X-Cache": _cache_status(leader, bypass)},
+    )
+
+
+async def _explain_job(
+    job: Job, client: httpx.AsyncClient, generation: Generation, requester: str, bypass: bool
+) -> Dict[str, Any]:
+    cached = None if bypass else generation_cache.get(generation.key)
+    if cached is not None:
+        events = replay(cached)
+    else:
+        events, _ = await _join_explain_generation(client, generation, requester)
+    parser = SSEParser()
+    finish_reason = None
+    async for chunk in events:
+        for data in parser.feed(chunk):
+            payload = orjson.loads(data)
+            if isinstance(payload, str):
+                job.append(payload)
+            elif "message" in payload:
+                raise HTTPException(status_code=502, detail=payload["message"])
+            else:
+                finish_reason = payload.get("finish_reason")
+    return {"text": "".join(job.deltas), "finishReason": finish_reason}
+
+
+async def _quiz_job(
+    client: httpx.AsyncClient,
+    generation: Generation,
+    requester: str,
+    document_hash: str,
+    bypass: bool,
+) -> Dict[str, Any]:
+    if not bypass:
+        stored = await _stored_quiz(document_hash)
+        if stored is not None:
+            return stored
+    quiz, _ = await _run_quiz_generation(client, generation, requester, document_hash)
+    return quiz
+
+
+@router.post("/jobs", status_code=202)
+async def create_generation_job(
+    request: Request,
+    body: QuizGenerateRequest,
+    client: httpx.AsyncClient = Depends(get_upstream_client),
+    requester: str = Depends(get_requester_key),
+):
+    """Queue an explain/quiz generation and return its job id without waiting for the model."""
+    if body.type not in {"explain", "quiz"}:
+        return ORJSONResponse({"error": "Invalid generation type"}, status_code=400)
+
+    context_text = document_store.get(body.sessionId)
+    if context_text is None:
+        return _document_not_found()
+
+    bypass = _bypass_requested(request)
+    generation = _prepare_generation(body.type, context_text)
+
+    async def work(job: Job) -> Dict[str, Any]:
+        if body.type == "explain":
+            return await _explain_job(job, client, generation, requester, bypass)
+        return await _quiz_job(client, generation, requester, body.sessionId, bypass)
+
+    try:
+        job = job_queue.submit(requester, body.type, work)
+    except JobQueueFull as exc:
+        return ORJSONResponse({"error": str(exc)}, status_code=503, headers={"Retry-After": "5"})
+
+    return ORJSONResponse(
+        {"jobId": job.id, "status": job.status},
+        status_code=202,
+        headers={"Location": f"/api/quizzes/jobs/{job.id}"},
+    )
+
+
+@router.get("/jobs/{job_id}")
+async def get_generation_job(job_id: str, requester: str = Depends(get_requester_key)):
+    job = job_queue.get(job_id, requester)
+    if job is None:
+        return ORJSONResponse({"error": "Job not found or expired"}, status_code=404)
+    return ORJSONResponse(job.snapshot())
 
-    system_prompt = {
-        "role": "system",
-        "content": (
-            "You are a helpful academic tutor assisting a student with a document.\n"
-            "Use the following context to answer the student's questions.\n"
-            "If the answer is not in the context, say you don't find it in the document "
-            "but try to answer from general knowledge if relevant (and mark it as general "
-            "knowledge).\n\n"
-            "CONTEXT:\n"
-            f"{context_text}\n\n"
-            "RULES:\n"
-            "1. Be concise and clear.\n"
-            "2. Use Markdown formatting.\n"
-            "3. Maintain a professional, encouraging tone."
-        ),
-    }
 
+@router.get("/jobs/{job_id}/events")
+async def stream_generation_job(job_id: str, requester: str = Depends(get_requester_key)):
+    job = job_queue.get(job_id, requester)
+    if job is None:
+        return ORJSONResponse({"error": "Job not found or expired"}, status_code=404)
+    return StreamingResponse(job.events(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
+
+
+@router.post("/chat")
+async def quiz_chat(
+    body: QuizChatRequest,
+    client: httpx.AsyncClient = Depends(get_upstream_client),
+    requester: str = Depends(get_requester_key),
+):
+    if not body.message.strip():
+        return ORJSONResponse({"error": "Message is required"}, status_code=400)
+
+    context_text = document_store.get(body.sessionId)
+    if context_text is None:
+        return _document_not_found()
+
+    if body.conversationId:
+        conversation = conversation_store.get(
+            body.conversationId, requester, "doc_chat", body.sessionId
+        )
+        if conversation is None:
+            return ORJSONResponse(
+                {"error": "Conversation not found or expired"}, status_code=404
+            )
+    else:
+        conversation = conversation_store.new(
+            requester, "doc_chat", body.sessionId, opening=body.initialMessage
+        )
+
+    index = index_cache.get(body.sessionId)
+    if index is None:
+        index = await asyncio.to_thread(build_index, context_text)
+        index_cache.put(body.sessionId, index)
+
+    context_text = select_context(index, body.message)
+
+    system_prompt = (
+        "You are a helpful academic tutor assisting a student with a document.\n"
+        "Use the following context to answer the student's questions.\n"
+        "If the answer is not in the context, say you don't find it in the document "
+        "but try to answer from general knowledge if relevant (and mark it as general "
+        "knowledge).\n\n"
+        "CONTEXT:\n"
+        f"{context_text}\n\n"
+        "RULES:\n"
+        "1. Be concise and clear.\n"
+        "2. Use Markdown formatting.\n"
+        "3. Maintain a professional, encouraging tone."
+    )
+
+    messages = conversation.prompt_messages(system_prompt, body.message)
     payload = {
-        "model": "llama-3.3-70b-versatile",
-        "messages": [system_prompt, *[m.model_dump() for m in body.messages]],
-        "stream": True,
+        "model": model_router.route("doc_chat", messages).model,
+        "messages": messages,
     }
 
-    headers = {"Authorization": f"Bearer {GROQ_API_KEY}"} if GROQ_API_KEY else {}
-
-    async def stream_completion() -> AsyncGenerator[bytes, None]:
-        groq_url = f"{GROQ_BASE_URL}/chat/completions"
-        async with httpx.AsyncClient(timeout=None) as client:
-            try:
-                async with client.stream("POST", groq_url, json=payload, headers=headers) as resp:
-                    resp.raise_for_status()
-                    async for chunk in resp.aiter_bytes():
-                        if chunk:
-                            yield chunk
-            except httpx.HTTPError as exc:
-                msg = "Failed to process chat"
-                raise HTTPException(status_code=500, detail=msg) from exc
-
-    return StreamingResponse(stream_completion(), media_type="text/plain; charset=utf-8")
+    stream = await open_chat_completion(
+        client, payload, "Failed to process chat", endpoint="doc_chat", requester=requester
+    )
+    # Stored only once the stream is open; see ai_chat.
+    conversation_store.add(conversation)
+    return StreamingResponse(
+        record_turn(client, conversation, body.message, stream),
+        media_type=SSE_MEDIA_TYPE,
+        headers={**SSE_HEADERS, "X-Conversation-Id": conversation.id},
+        background=BackgroundTask(stream.aclose),
+    )
 
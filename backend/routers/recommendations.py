@@ -1,27 +1,17 @@
-from collections import defaultdict
 from typing import List, Dict
 
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database import get_db
-from models import User, QuizHistory
-from schemas import verify_access_token
+from models import UserTopicStats
+from schemas import UserRead
+from security import get_current_user
 
 router = APIRouter()
 
-def _extract_token(request: Request):
-    token = request.cookies.get("auth_token")
-    if token:
-        return token
-    auth = request.headers.get("Authorization", "")
-    if auth.lower().startswith("bearer "):
-        return auth[7:].strip()
-    return None
-
-
 def calculate_trend(scores: List[int]) -> str:
     if len(scores) < 2:
         return "stable"
@@ -64,39 +54,25 @@ def get_study_plan(study_goal: str, weak_topics: List[str], trend_map: Dict[str,
 
 
 @router.get("/study-plan")
-async def get_recommendations(request: Request, db: AsyncSession = Depends(get_db)):
-    token = _extract_token(request)
-    if not token:
-        return JSONResponse(
-            status_code=401,
-            content={"message": "Not authenticated"},
-        )
-
-    decoded = verify_access_token(token)
-    if not decoded or "userId" not in decoded:
-        return JSONResponse(
-            status_code=401,
-            content={"message": "Invalid token"},
-        )
-
-    user_id = decoded["userId"]
-
-    user = await db.get(User, user_id)
-    if not user:
-        return JSONResponse(
-            status_code=404,
-            content={"message": "User not found"},
-        )
-
+async def get_recommendations(
+    user: UserRead = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
     result = await db.execute(
-        select(QuizHistory)
-        .where(QuizHistory.user_id == user.id)
-        .order_by(QuizHistory.created_at.asc())
+        select(
+            UserTopicStats.topic,
+            UserTopicStats.attempts,
+            UserTopicStats.percentage_sum,
+            UserTopicStats.first_percentage,
+            UserTopicStats.last_percentage,
+        )
+        .where(UserTopicStats.user_id == user.id)
+        .order_by(UserTopicStats.topic)
     )
-    history = result.scalars().all()
+    stats = result.all()
 
-    if not history:
-        return JSONResponse(
+    if not stats:
+        return ORJSONResponse(
             status_code=200,
             content={
                 "message": "No quiz history yet",
@@ -109,19 +85,16 @@ async def get_recommendations(request: Request, db: AsyncSession = Depends(get_d
             },
         )
 
-    topic_scores: Dict[str, List[int]] = defaultdict(list)
-
-    for record in history:
-        topic_scores[record.topic].append(record.percentage)
-
     avg_scores = {
-        topic: round(sum(scores) / len(scores), 2)
-        for topic, scores in topic_scores.items()
+        row.topic: round(row.percentage_sum / row.attempts, 2)
+        for row in stats
     }
 
     trend_map = {
-        topic: calculate_trend(scores)
-        for topic, scores in topic_scores.items()
+        row.topic: calculate_trend(
+            [row.first_percentage, row.last_percentage] if row.attempts > 1 else [row.last_percentage]
+        )
+        for row in stats
     }
 
     weak_topics = [
@@ -140,7 +113,7 @@ async def get_recommendations(request: Request, db: AsyncSession = Depends(get_d
 
     study_plan = get_study_plan(user.study_goal, weak_topics, trend_map)
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=200,
         content={
             "study_goal": user.study_goal,
@@ -1,6 +1,6 @@
 import os
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 from uuid import UUID
 
 from jose import JWTError, jwt
@@ -82,25 +82,26 @@ def verify_access_token(token: str) -> Optional[Dict[str, Any]]:
 
 # ─── AI Chat ─────────────────────────────────────────────────────────────────
 
-class ChatMessage(BaseModel):
-    role: str
-    content: str
-
-
 class ChatRequest(BaseModel):
-    messages: List[ChatMessage]
+    message: str
+    # Omit to start a new conversation; the id comes back in X-Conversation-Id.
+    conversationId: Optional[str] = None
 
 
 # ─── Quizzes ─────────────────────────────────────────────────────────────────
 
 class QuizGenerateRequest(BaseModel):
     type: str
-    documentText: Optional[str] = None
+    sessionId: str
 
 
 class QuizChatRequest(BaseModel):
-    messages: List[ChatMessage]
-    documentText: Optional[str] = None
+    message: str
+    sessionId: str
+    conversationId: Optional[str] = None
+    # Assistant message that opened the chat (the document explanation); only
+    # used when a new conversation is started.
+    initialMessage: Optional[str] = None
 
 
 # ─── Assignments ─────────────────────────────────────────────────────────────
@@ -119,6 +120,19 @@ class AssignmentUpdate(BaseModel):
     score: Optional[str] = None
 
 
+class AssignmentBatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[UUID] = None
+    title: Optional[str] = None
+    course: Optional[str] = None
+    status: Optional[str] = None
+    score: Optional[str] = None
+
+
+class AssignmentBatchRequest(BaseModel):
+    operations: List[AssignmentBatchOperation]
+
+
 class AssignmentRead(BaseModel):
     id: UUID
     user_id: UUID
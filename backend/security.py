@@ -0,0 +1,175 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db
+from models import User
+from schemas import UserRead, verify_access_token
+
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "2048"))
+# Other workers cannot see update_me invalidations, so profiles also expire.
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+# Comma-separated addresses of reverse proxies whose X-Forwarded-For is believed.
+TRUSTED_PROXIES = {
+    addr.strip() for addr in os.getenv("TRUSTED_PROXIES", "").split(",") if addr.strip()
+}
+
+
+class AuthError(Exception):
+    """Raised by the auth dependencies; rendered as {"message": ...} by main.py."""
+
+    def __init__(self, message: str, status_code: int = 401):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class _ExpiringLRU:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Any, Tuple[Any, float]]" = OrderedDict()
+
+    def get(self, key: Any) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Any, value: Any, expires_at: float) -> None:
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Any) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_token_cache = _ExpiringLRU(TOKEN_CACHE_SIZE)
+_user_cache = _ExpiringLRU(USER_CACHE_SIZE)
+
+
+def extract_token(request: Request) -> Optional[str]:
+    """Get auth token from cookie (browser) or Authorization Bearer header (Postman/API)."""
+    token = request.cookies.get("auth_token")
+    if token:
+        return token
+    auth = request.headers.get("Authorization", "")
+    if auth.lower().startswith("bearer "):
+        return auth[7:].strip()
+    return None
+
+
+def decode_token(token: str) -> Optional[Dict[str, Any]]:
+    """verify_access_token with verified claims cached until the token's exp."""
+    claims = _token_cache.get(token)
+    if claims is not None:
+        return claims
+    claims = verify_access_token(token)
+    if claims and "exp" in claims:
+        _token_cache.put(token, claims, float(claims["exp"]))
+    return claims
+
+
+async def get_current_user_id(request: Request) -> UUID:
+    """Dependency: id of the authenticated user, without touching the database."""
+    token = extract_token(request)
+    if not token:
+        raise AuthError("Not authenticated")
+    decoded = decode_token(token)
+    if not decoded or "userId" not in decoded:
+        raise AuthError("Invalid token")
+    try:
+        return UUID(decoded["userId"])
+    except ValueError as exc:
+        raise AuthError("Invalid token") from exc
+
+
+def get_requester_key(request: Request) -> str:
+    """Dependency: identity used for per-user fairness on the AI endpoints.
+
+    The AI routes do not require login, so anonymous callers fall back to the
+    client address. X-Forwarded-For is only read when the connection comes
+    from one of TRUSTED_PROXIES; the last hop not added by a trusted proxy is
+    used, since anything left of it was supplied by the client.
+    """
+    token = extract_token(request)
+    decoded = decode_token(token) if token else None
+    if decoded and "userId" in decoded:
+        return f"user:{decoded['userId']}"
+    host = request.client.host if request.client else "unknown"
+    if host in TRUSTED_PROXIES:
+        hops = [hop.strip() for hop in request.headers.get("X-Forwarded-For", "").split(",")]
+        for hop in reversed(hops):
+            if hop and hop not in TRUSTED_PROXIES:
+                return f"ip:{hop}"
+    return f"ip:{host}"
+
+
+# Profile columns; write endpoints return these so UserRead is built without a refresh.
+USER_COLUMNS = (
+    User.id,
+    User.name,
+    User.email,
+    User.major,
+    User.group,
+    User.gpa,
+    User.study_goal,
+    User.weak_subjects,
+    User.study_hours_per_week,
+    User.created_at,
+)
+
+
+def user_to_read(user) -> UserRead:
+    """UserRead from a User or a row of USER_COLUMNS."""
+    return UserRead(
+        id=user.id,
+        name=user.name,
+        email=user.email,
+        major=user.major,
+        group=user.group,
+        gpa=user.gpa,
+        study_goal=user.study_goal,
+        weak_subjects=user.weak_subjects,
+        study_hours_per_week=user.study_hours_per_week,
+        createdAt=user.created_at,
+    )
+
+
+def cache_user(user: UserRead) -> None:
+    _user_cache.put(user.id, user, time.time() + USER_CACHE_TTL)
+
+
+def invalidate_user(user_id: UUID) -> None:
+    _user_cache.pop(user_id)
+
+
+async def get_current_user(
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+) -> UserRead:
+    """Dependency: profile of the authenticated user, served from a per-worker cache."""
+    cached = _user_cache.get(user_id)
+    if cached is not None:
+        return cached
+    user = await db.get(User, user_id)
+    if not user:
+        raise AuthError("User not found", status_code=404)
+    profile = user_to_read(user)
+    cache_user(profile)
+    return profile
@@ -0,0 +1,138 @@
+"""Coalescing of identical in-flight generations.
+
+The first request for a key starts the work in a background task; identical
+requests that arrive while it runs attach to it instead of calling the model
+again. Because the work does not run in any client's request task, it
+survives the originating client disconnecting.
+
+- `SingleFlight.run` shares one awaitable result (quiz generation).
+- `StreamFlights.join` fans one upstream event stream out to every subscriber
+  through a buffer; late joiners get the already-emitted prefix replayed
+  first. The finished stream is stored in the generation cache once.
+
+Flights are per worker, like the caches they sit in front of.
+"""
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Tuple
+
+from generation_cache import GenerationCache, generation_cache, record
+from metrics import SINGLEFLIGHT_IN_FLIGHT, SINGLEFLIGHT_REQUESTS
+from sse import HEARTBEAT, SSE_HEARTBEAT_INTERVAL
+from upstream import CompletionStream
+
+Opener = Callable[[], Awaitable[CompletionStream]]
+
+
+class SingleFlight:
+    def __init__(self, kind: str):
+        self.kind = kind
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def run(self, key: str, work: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Result of the work for `key`, and whether this call started it."""
+        task = self._tasks.get(key)
+        leader = task is None
+        if leader:
+            task = asyncio.create_task(work())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        SINGLEFLIGHT_REQUESTS.labels(self.kind, "leader" if leader else "follower").inc()
+        # A cancelled waiter must not cancel the shared work.
+        return await asyncio.shield(task), leader
+
+
+class StreamFlight:
+    """One upstream stream, buffered and fanned out to any number of subscribers."""
+
+    def __init__(self, cache: GenerationCache, key: str, open_stream: Opener):
+        self.opened: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._chunks: List[bytes] = []
+        self._done = False
+        self._changed = asyncio.Event()
+        self.task = asyncio.create_task(self._run(cache, key, open_stream))
+
+    async def _run(self, cache: GenerationCache, key: str, open_stream: Opener) -> None:
+        try:
+            stream = await open_stream()
+        except asyncio.CancelledError:
+            self.opened.cancel()
+            self._finish()
+            raise
+        except Exception as exc:
+            self.opened.set_exception(exc)
+            self._finish()
+            return
+        self.opened.set_result(None)
+        try:
+            # Subscribers send their own heartbeats, so they are not buffered.
+            async for chunk in record(cache, key, stream):
+                if chunk != HEARTBEAT:
+                    self._chunks.append(chunk)
+                    self._notify()
+        finally:
+            await stream.aclose()
+            self._finish()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _finish(self) -> None:
+        self._done = True
+        self._notify()
+
+    async def subscribe(self) -> AsyncIterator[bytes]:
+        position = 0
+        while True:
+            changed = self._changed
+            if position < len(self._chunks):
+                chunk = self._chunks[position]
+                position += 1
+                yield chunk
+                continue
+            if self._done:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=SSE_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+
+
+class StreamFlights:
+    def __init__(self, kind: str, cache: GenerationCache):
+        self.kind = kind
+        self.cache = cache
+        self._flights: Dict[str, StreamFlight] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def join(self, key: str, open_stream: Opener) -> Tuple[AsyncIterator[bytes], bool]:
+        """Subscribe to the flight for `key` (a generation cache key), starting it if needed.
+
+        Returns the subscriber stream and whether this request started the
+        flight. Errors raised while opening the upstream stream (e.g. a 429
+        from the governor) are re-raised to every waiting request.
+        """
+        flight = self._flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = StreamFlight(self.cache, key, open_stream)
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._drop(key, flight))
+        SINGLEFLIGHT_REQUESTS.labels(self.kind, "leader" if leader else "follower").inc()
+        await asyncio.shield(flight.opened)
+        return flight.subscribe(), leader
+
+    def _drop(self, key: str, flight: StreamFlight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+explain_flights = StreamFlights("generate_explain", generation_cache)
+quiz_flights = SingleFlight("generate_quiz")
+SINGLEFLIGHT_IN_FLIGHT.labels("generate_explain").set_function(lambda: len(explain_flights))
+SINGLEFLIGHT_IN_FLIGHT.labels("generate_quiz").set_function(lambda: len(quiz_flights))
@@ -0,0 +1,67 @@
+"""Server-sent event framing for the AI streams.
+
+Upstream chat-completion chunks are parsed and re-emitted to the browser as a
+compact `text/event-stream`:
+
+    data: "Hello"                               content delta (a JSON string)
+    : ping                                      heartbeat comment, ignored by clients
+    event: done
+    data: {"finish_reason":"stop","usage":{...}}
+    event: error
+    data: {"message":"..."}
+"""
+import os
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+SSE_HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_INTERVAL", "15"))
+
+SSE_MEDIA_TYPE = "text/event-stream"
+# Stop reverse proxies (nginx) from buffering the stream.
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+HEARTBEAT = b": ping\n\n"
+DONE_PREFIX = b"event: done\n"
+
+
+def delta_event(text: str) -> bytes:
+    return b"data: " + orjson.dumps(text) + b"\n\n"
+
+
+def done_event(finish_reason: Optional[str], usage: Optional[Dict[str, Any]]) -> bytes:
+    body = orjson.dumps({"finish_reason": finish_reason, "usage": usage})
+    return DONE_PREFIX + b"data: " + body + b"\n\n"
+
+
+def error_event(message: str) -> bytes:
+    return named_event("error", {"message": message})
+
+
+def named_event(event: str, payload: Any) -> bytes:
+    return f"event: {event}\ndata: ".encode() + orjson.dumps(payload) + b"\n\n"
+
+
+class SSEParser:
+    """Incremental parser for upstream `text/event-stream` bytes.
+
+    `feed` returns the `data` payloads of every event completed by the chunk;
+    partial events stay buffered until the rest arrives.
+    """
+
+    def __init__(self):
+        self._buffer = b""
+
+    def feed(self, chunk: bytes) -> List[str]:
+        self._buffer = (self._buffer + chunk).replace(b"\r\n", b"\n")
+        *events, self._buffer = self._buffer.split(b"\n\n")
+        payloads = []
+        for event in events:
+            data = [
+                line[5:].removeprefix(b" ")
+                for line in event.split(b"\n")
+                if line.startswith(b"data:")
+            ]
+            if data:
+                payloads.append(b"\n".join(data).decode("utf-8"))
+        return payloads
@@ -0,0 +1,40 @@
+import os
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from database import Base, create_missing_indexes
+from models import User
+
+# Tests that need Postgres are skipped unless this points at a scratch database.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db_sessions():
+    """Session factory on TEST_DATABASE_URL, with the schema created."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_async_engine(TEST_DATABASE_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_missing_indexes)
+    try:
+        yield async_sessionmaker(engine, expire_on_commit=False)
+    finally:
+        await engine.dispose()
+
+
+@pytest.fixture
+async def user_id(db_sessions):
+    async with db_sessions() as db:
+        user = User(name="Test", email=f"test-{uuid.uuid4().hex}@example.com", password_hash="x")
+        db.add(user)
+        await db.commit()
+        return user.id
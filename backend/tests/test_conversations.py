@@ -0,0 +1,49 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+
+import upstream
+from benchmarks.stub_llm import STUB_CONFIG, StubServer
+from conversations import conversation_store
+from model_router import FAST_MODEL, LARGE_MODEL, MODEL_ROUTES, ModelRouter
+from routers import chat
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(scope="module")
+def stub():
+    with StubServer(ttft_ms=10, tokens_per_sec=0, tokens=3) as server:
+        yield server
+
+
+@pytest.fixture
+async def client(stub, monkeypatch):
+    # Keep the failures below out of the app-wide router's health samples.
+    monkeypatch.setattr(upstream, "model_router", ModelRouter(MODEL_ROUTES, 1500, 1.5, 0.9, 60, 5))
+    monkeypatch.setattr(upstream, "UPSTREAM_RETRY_ATTEMPTS", 0)
+    monkeypatch.setitem(STUB_CONFIG, "model_status", {})
+    app = FastAPI()
+    app.include_router(chat.router, prefix="/api/ai")
+    async with httpx.AsyncClient(base_url=stub.base_url) as upstream_client:
+        app.state.upstream_client = upstream_client
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            yield c
+
+
+async def test_failed_first_turn_stores_no_conversation(client):
+    STUB_CONFIG["model_status"] = {FAST_MODEL: 503, LARGE_MODEL: 503}
+    before = len(conversation_store)
+    resp = await client.post("/api/ai/chat", json={"message": "What is a heap?"})
+    assert resp.status_code == 500
+    assert len(conversation_store) == before
+
+
+async def test_first_turn_stores_the_conversation(client):
+    resp = await client.post("/api/ai/chat", json={"message": "What is a heap?"})
+    assert resp.status_code == 200
+    conversation_id = resp.headers["X-Conversation-Id"]
+    conversation = conversation_store.get(conversation_id, "ip:127.0.0.1", "ai_chat")
+    assert conversation is not None
+    assert [m["role"] for m in conversation.messages] == ["user", "assistant"]
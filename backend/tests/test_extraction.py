@@ -0,0 +1,50 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import extraction
+
+
+def _sleep_extractor(path: str, budget: int) -> str:
+    """Stands in for an office extractor; `path` is the number of seconds to take."""
+    time.sleep(float(path))
+    return f"slept {path}"
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = ProcessPoolExecutor(max_workers=1)
+    monkeypatch.setattr(extraction, "_pool", pool)
+    monkeypatch.setattr(extraction, "EXTRACTION_MAX_QUEUE", 1)
+    monkeypatch.setattr(extraction, "EXTRACTION_TIMEOUT", 0.5)
+    monkeypatch.setitem(extraction._OFFICE_EXTRACTORS, "sleep", _sleep_extractor)
+    try:
+        yield pool
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+@pytest.mark.anyio
+async def test_timed_out_extraction_holds_its_slot_until_the_worker_is_done(pool):
+    # Warm the worker up so process start-up does not count against the timeout.
+    assert await extraction.extract_office_text("0", "sleep") == "slept 0"
+
+    started = time.monotonic()
+    with pytest.raises(extraction.ExtractionTimeout):
+        await extraction.extract_office_text("1.5", "sleep")
+
+    # The worker is still busy with the timed-out document, so a fast one is
+    # turned away rather than admitted to queue behind it.
+    with pytest.raises(extraction.ExtractionBusy):
+        await extraction.extract_office_text("0.05", "sleep")
+    assert extraction._in_flight == 1
+
+    while extraction._in_flight:
+        await asyncio.sleep(0.05)
+    assert time.monotonic() - started >= 1.4
+
+    assert await extraction.extract_office_text("0.05", "sleep") == "slept 0.05"
+    assert extraction._in_flight == 0
+
@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import func, select, text
+
+from models import QuizHistory, UserTopicStats
+from routers import history
+from schemas import QuizHistoryCreate
+
+pytestmark = pytest.mark.anyio
+
+BATCH = [QuizHistoryCreate(topic="Algebra", score=i % 10, total_questions=10) for i in range(20)]
+
+
+async def _counts(db_sessions, user_id):
+    async with db_sessions() as db:
+        rows = await db.scalar(
+            select(func.count()).select_from(QuizHistory).where(QuizHistory.user_id == user_id)
+        )
+        stats = await db.scalar(
+            select(func.count()).select_from(UserTopicStats).where(UserTopicStats.user_id == user_id)
+        )
+        return rows, stats
+
+
+@pytest.fixture(params=["insert", "copy"])
+def write_path(request, monkeypatch):
+    threshold = len(BATCH) if request.param == "copy" else len(BATCH) + 1
+    monkeypatch.setattr(history, "HISTORY_BATCH_COPY_THRESHOLD", threshold)
+    return request.param
+
+
+async def test_batch_writes_rows_and_stats(db_sessions, user_id, write_path):
+    async with db_sessions() as db:
+        body = await history.save_quiz_results_batch(BATCH, user_id=user_id, db=db)
+    assert body["created"] == len(BATCH)
+    assert await _counts(db_sessions, user_id) == (len(BATCH), 1)
+
+
+async def test_failure_after_rows_rolls_back_rows_and_stats(
+    db_sessions, user_id, write_path, monkeypatch
+):
+    written = []
+
+    async with db_sessions() as db:
+
+        async def failing_commit():
+            # Runs after the stats upsert and the history write, in the same transaction.
+            written.append(
+                await db.scalar(
+                    select(func.count())
+                    .select_from(QuizHistory)
+                    .where(QuizHistory.user_id == user_id)
+                )
+            )
+            await db.execute(text("SELECT 1 / 0"))
+
+        monkeypatch.setattr(db, "commit", failing_commit)
+        with pytest.raises(Exception, match="division by zero"):
+            await history.save_quiz_results_batch(BATCH, user_id=user_id, db=db)
+    assert written == [len(BATCH)]
+    assert await _counts(db_sessions, user_id) == (0, 0)
+
+
+async def test_rows_are_discarded_without_commit(db_sessions, user_id, write_path, monkeypatch):
+    async def no_commit():
+        pass
+
+    async with db_sessions() as db:
+        monkeypatch.setattr(db, "commit", no_commit)
+        await history.save_quiz_results_batch(BATCH, user_id=user_id, db=db)
+    # Closing the session rolled the transaction back; COPY must not have committed on its own.
+    assert await _counts(db_sessions, user_id) == (0, 0)
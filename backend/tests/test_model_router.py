@@ -0,0 +1,153 @@
+import time
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+import model_router
+import upstream
+from benchmarks.stub_llm import STUB_CONFIG, StubServer
+from model_router import FAST_MODEL, LARGE_MODEL, ModelRouter
+
+ROUTES = {"ai_chat": {"short": [FAST_MODEL, LARGE_MODEL], "long": [LARGE_MODEL, FAST_MODEL]}}
+SHORT = [{"role": "user", "content": "What is a binary search tree?"}]
+LONG = [{"role": "user", "content": "word " * 400}]
+WINDOW_SECONDS = 60
+MIN_SAMPLES = 3
+
+
+class Clock:
+    """Stands in for the `time` module in model_router; `advance` skips ahead."""
+
+    def __init__(self):
+        self.offset = 0.0
+
+    def monotonic(self) -> float:
+        return time.monotonic() + self.offset
+
+    def advance(self, seconds: float) -> None:
+        self.offset += seconds
+
+
+@pytest.fixture(scope="module")
+def stub():
+    with StubServer(ttft_ms=10, tokens_per_sec=0, tokens=3) as server:
+        yield server
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(model_router, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def router(monkeypatch, stub, clock):
+    router = ModelRouter(
+        routes=ROUTES,
+        short_prompt_tokens=100,
+        ttft_slo=0.2,
+        percentile=0.9,
+        window_seconds=WINDOW_SECONDS,
+        min_samples=MIN_SAMPLES,
+    )
+    monkeypatch.setattr(upstream, "model_router", router)
+    monkeypatch.setattr(upstream, "UPSTREAM_RETRY_ATTEMPTS", 0)
+    monkeypatch.setitem(STUB_CONFIG, "model_ttft_ms", {FAST_MODEL: 10, LARGE_MODEL: 30})
+    monkeypatch.setitem(STUB_CONFIG, "model_status", {})
+    return router
+
+
+@pytest.fixture
+async def client(stub):
+    async with httpx.AsyncClient(base_url=stub.base_url, timeout=httpx.Timeout(5, read=0.5)) as c:
+        yield c
+
+
+async def _chat(client: httpx.AsyncClient, router: ModelRouter, messages=SHORT) -> str:
+    """Route one ai_chat turn and run it against the stub; returns the model used."""
+    model = router.route("ai_chat", messages).model
+    try:
+        stream = await upstream.open_chat_completion(
+            client, {"model": model, "messages": messages}, "chat failed", "ai_chat", "test"
+        )
+    except HTTPException:
+        return model
+    async for _ in stream:
+        pass
+    return model
+
+
+async def _chats(client: httpx.AsyncClient, router: ModelRouter, count: int) -> list:
+    return [await _chat(client, router) for _ in range(count)]
+
+
+def test_routes_by_prompt_size():
+    router = ModelRouter(ROUTES, 100, 0.2, 0.9, WINDOW_SECONDS, MIN_SAMPLES)
+    short, long = router.route("ai_chat", SHORT), router.route("ai_chat", LONG)
+    assert (short.size_class, short.model, short.reason) == ("short", FAST_MODEL, "primary")
+    assert (long.size_class, long.model, long.reason) == ("long", LARGE_MODEL, "primary")
+
+
+def test_slow_models_need_min_samples_and_all_slow_picks_fastest():
+    router = ModelRouter(ROUTES, 100, 0.2, 0.9, WINDOW_SECONDS, MIN_SAMPLES)
+    for _ in range(MIN_SAMPLES - 1):
+        router.record_ttft(FAST_MODEL, 1.0)
+    assert router.route("ai_chat", SHORT).reason == "primary"
+    router.record_ttft(FAST_MODEL, 1.0)
+    assert router.route("ai_chat", SHORT) == (LARGE_MODEL, FAST_MODEL, "short", "fallback")
+    for _ in range(MIN_SAMPLES):
+        router.record_ttft(LARGE_MODEL, 2.0)
+    assert router.route("ai_chat", SHORT) == (FAST_MODEL, FAST_MODEL, "short", "all_slow")
+
+
+@pytest.mark.anyio
+async def test_healthy_primary_keeps_traffic(router, client):
+    assert await _chats(client, router, 6) == [FAST_MODEL] * 6
+    assert router.observed_ttft(FAST_MODEL) < router.ttft_slo
+
+
+@pytest.mark.anyio
+async def test_falls_back_when_primary_is_slow_and_recovers(router, client, clock):
+    STUB_CONFIG["model_ttft_ms"] = {FAST_MODEL: 300, LARGE_MODEL: 30}
+    assert await _chats(client, router, MIN_SAMPLES) == [FAST_MODEL] * MIN_SAMPLES
+    assert await _chats(client, router, 4) == [LARGE_MODEL] * 4
+    assert router.route("ai_chat", SHORT).reason == "fallback"
+
+    STUB_CONFIG["model_ttft_ms"] = {FAST_MODEL: 10, LARGE_MODEL: 30}
+    clock.advance(WINDOW_SECONDS)
+    assert await _chats(client, router, 4) == [FAST_MODEL] * 4
+    assert router.route("ai_chat", SHORT).reason == "primary"
+
+
+@pytest.mark.anyio
+async def test_falls_back_when_primary_errors_and_recovers(router, client, clock):
+    STUB_CONFIG["model_status"] = {FAST_MODEL: 503}
+    assert await _chats(client, router, MIN_SAMPLES) == [FAST_MODEL] * MIN_SAMPLES
+    assert await _chats(client, router, 4) == [LARGE_MODEL] * 4
+
+    STUB_CONFIG["model_status"] = {}
+    clock.advance(WINDOW_SECONDS)
+    assert await _chats(client, router, 4) == [FAST_MODEL] * 4
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("status", [400, 401, 404, 422])
+async def test_client_errors_do_not_count_against_the_model(router, client, status):
+    STUB_CONFIG["model_status"] = {FAST_MODEL: status}
+    assert await _chats(client, router, MIN_SAMPLES + 2) == [FAST_MODEL] * (MIN_SAMPLES + 2)
+    assert router.observed_ttft(FAST_MODEL) is None
+
+
+@pytest.mark.anyio
+async def test_falls_back_when_primary_times_out_and_recovers(router, client, clock):
+    # Past the client's 0.5 s read timeout, so no first token ever arrives.
+    STUB_CONFIG["model_ttft_ms"] = {FAST_MODEL: 2000, LARGE_MODEL: 30}
+    assert await _chats(client, router, MIN_SAMPLES) == [FAST_MODEL] * MIN_SAMPLES
+    assert router.observed_ttft(FAST_MODEL) == float("inf")
+    assert await _chats(client, router, 4) == [LARGE_MODEL] * 4
+
+    STUB_CONFIG["model_ttft_ms"] = {FAST_MODEL: 10, LARGE_MODEL: 30}
+    clock.advance(WINDOW_SECONDS)
+    assert await _chats(client, router, 4) == [FAST_MODEL] * 4
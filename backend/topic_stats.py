@@ -0,0 +1,128 @@
+"""Maintenance of the user_topic_stats aggregate table.
+
+Run `python -m topic_stats` from backend/ to (re)build the table from
+quiz_history, e.g. after deploying it onto an existing database.
+"""
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from database import Base, engine
+from models import UserTopicStats
+
+
+def topic_stats_upsert(
+    user_id: UUID,
+    topic: str,
+    percentage_sum: int,
+    first_percentage: int,
+    last_percentage: int,
+    attempts: int = 1,
+    last_attempt_at: Optional[datetime] = None,
+):
+    """Statement folding `attempts` new results for one (user, topic) into its stats row."""
+    return topic_stats_upsert_many(
+        [
+            {
+                "user_id": user_id,
+                "topic": topic,
+                "attempts": attempts,
+                "percentage_sum": percentage_sum,
+                "first_percentage": first_percentage,
+                "last_percentage": last_percentage,
+                "last_attempt_at": last_attempt_at,
+            }
+        ]
+    )
+
+
+def topic_stats_upsert_many(rows: List[Dict[str, Any]]):
+    """Multi-row variant of topic_stats_upsert; (user_id, topic) must be unique within `rows`."""
+    stmt = insert(UserTopicStats).values(
+        [
+            {
+                **row,
+                "last_attempt_at": row.get("last_attempt_at") or func.now(),
+            }
+            for row in rows
+        ]
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[UserTopicStats.user_id, UserTopicStats.topic],
+        set_={
+            "attempts": UserTopicStats.attempts + stmt.excluded.attempts,
+            "percentage_sum": UserTopicStats.percentage_sum + stmt.excluded.percentage_sum,
+            "last_percentage": stmt.excluded.last_percentage,
+            "last_attempt_at": stmt.excluded.last_attempt_at,
+        },
+    )
+
+
+def aggregate_topic_results(user_id: UUID, results: List[Tuple[str, int]]) -> List[Dict[str, Any]]:
+    """Fold ordered (topic, percentage) results into one upsert row per topic."""
+    rows: Dict[str, Dict[str, Any]] = {}
+    for topic, percentage in results:
+        row = rows.get(topic)
+        if row is None:
+            rows[topic] = {
+                "user_id": user_id,
+                "topic": topic,
+                "attempts": 1,
+                "percentage_sum": percentage,
+                "first_percentage": percentage,
+                "last_percentage": percentage,
+            }
+        else:
+            row["attempts"] += 1
+            row["percentage_sum"] += percentage
+            row["last_percentage"] = percentage
+    return list(rows.values())
+
+
+BACKFILL_SQL = text(
+    """
+    INSERT INTO user_topic_stats (
+        user_id, topic, attempts, percentage_sum,
+        first_percentage, last_percentage, last_attempt_at
+    )
+    SELECT
+        user_id,
+        topic,
+        count(*),
+        sum(percentage),
+        (array_agg(percentage ORDER BY created_at, id))[1],
+        (array_agg(percentage ORDER BY created_at DESC, id DESC))[1],
+        max(created_at)
+    FROM quiz_history
+    GROUP BY user_id, topic
+    ON CONFLICT (user_id, topic) DO UPDATE SET
+        attempts = EXCLUDED.attempts,
+        percentage_sum = EXCLUDED.percentage_sum,
+        first_percentage = EXCLUDED.first_percentage,
+        last_percentage = EXCLUDED.last_percentage,
+        last_attempt_at = EXCLUDED.last_attempt_at
+    """
+)
+
+
+async def backfill_topic_stats(conn: AsyncConnection) -> int:
+    """Recompute every stats row from quiz_history. Returns the number of rows written."""
+    result = await conn.execute(BACKFILL_SQL)
+    return result.rowcount
+
+
+async def main() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        rows = await backfill_topic_stats(conn)
+    await engine.dispose()
+    print(f"user_topic_stats: {rows} rows backfilled")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
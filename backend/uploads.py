@@ -0,0 +1,155 @@
+"""Streaming upload handling.
+
+The multipart request body is parsed as it arrives from the client: the file
+part goes straight to a temporary file in chunks while its content hash is
+computed, so a request never holds the whole file in memory and the file is
+written to disk once. Extraction then reads from the file path.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, BinaryIO, NamedTuple, Optional
+
+from fastapi import Request
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+# Room for the multipart boundaries and part headers around the file.
+UPLOAD_MULTIPART_OVERHEAD = 64 * 1024
+# Defaults to the system temp directory.
+UPLOAD_TMP_DIR: Optional[str] = os.getenv("UPLOAD_TMP_DIR") or None
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds UPLOAD_MAX_BYTES."""
+
+
+class InvalidUpload(ValueError):
+    """Raised when the request is not multipart or has no file part."""
+
+
+class SpooledUpload(NamedTuple):
+    path: str
+    # SHA-256 of the content; the document store is keyed by it.
+    key: str
+    size: int
+    filename: str
+
+
+def _too_large(max_bytes: int) -> UploadTooLarge:
+    return UploadTooLarge(f"File is larger than the {max_bytes // (1024 * 1024)} MB upload limit")
+
+
+class _FilePart:
+    """MultipartParser callbacks writing the first file part named `field` to `out`."""
+
+    def __init__(self, field: str, out: BinaryIO, max_bytes: int):
+        self.field = field
+        self.out = out
+        self.max_bytes = max_bytes
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.filename: Optional[str] = None
+        self._writing = False
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        }
+
+    def _on_part_begin(self) -> None:
+        self._disposition = b""
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        name = options.get(b"name", b"").decode("utf-8", errors="replace")
+        if self.filename is None and name == self.field and b"filename" in options:
+            self.filename = options[b"filename"].decode("utf-8", errors="replace")
+            self._writing = True
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._writing:
+            return
+        chunk = data[start:end]
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise _too_large(self.max_bytes)
+        self.digest.update(chunk)
+        self.out.write(chunk)
+
+    def _on_part_end(self) -> None:
+        self._writing = False
+
+
+async def _receive(
+    request: Request, boundary: bytes, out: BinaryIO, field: str, max_bytes: int
+) -> _FilePart:
+    body_limit = max_bytes + UPLOAD_MULTIPART_OVERHEAD
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > body_limit:
+        raise _too_large(max_bytes)
+
+    part = _FilePart(field, out, max_bytes)
+    parser = MultipartParser(boundary, part.callbacks())
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > body_limit:
+                raise _too_large(max_bytes)
+            # Parsing drives the hashing and the disk write; keep both off the event loop.
+            await asyncio.to_thread(parser.write, chunk)
+        parser.finalize()
+    except MultipartParseError as exc:
+        raise InvalidUpload("Malformed multipart upload") from exc
+    if part.filename is None:
+        raise InvalidUpload("No file provided")
+    return part
+
+
+@asynccontextmanager
+async def spooled_upload(
+    request: Request, field: str = "file", max_bytes: int = UPLOAD_MAX_BYTES
+) -> AsyncIterator[SpooledUpload]:
+    """Stream the `field` file part of a multipart request to a temp file; it is removed on exit.
+
+    Raises UploadTooLarge before reading anything when Content-Length is over
+    the limit, and otherwise as soon as more than `max_bytes` have arrived.
+    Raises InvalidUpload when the body is not multipart or has no such file.
+    """
+    _, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise InvalidUpload("Expected a multipart/form-data upload")
+
+    fd, path = tempfile.mkstemp(prefix="mentoro-upload-", dir=UPLOAD_TMP_DIR)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            part = await _receive(request, boundary, out, field, max_bytes)
+        yield SpooledUpload(path, part.digest.hexdigest(), part.size, part.filename)
+    finally:
+        os.unlink(path)
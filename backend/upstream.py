@@ -0,0 +1,322 @@
+import asyncio
+import math
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+import orjson
+from fastapi import HTTPException, Request
+
+from governor import AdmissionRejected, llm_governor
+from metrics import (
+    LLM_ADMISSION_REJECTED,
+    UPSTREAM_ERRORS,
+    UPSTREAM_RETRIES,
+    observe_upstream_stream,
+)
+from model_router import model_router
+from sse import (
+    HEARTBEAT,
+    SSE_HEARTBEAT_INTERVAL,
+    SSEParser,
+    delta_event,
+    done_event,
+    error_event,
+)
+
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
+
+UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "false").lower() in {"1", "true", "yes"}
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "20"))
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "60"))
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "5"))
+UPSTREAM_READ_TIMEOUT = float(os.getenv("UPSTREAM_READ_TIMEOUT", "60"))
+UPSTREAM_POOL_TIMEOUT = float(os.getenv("UPSTREAM_POOL_TIMEOUT", "10"))
+# Retries only happen before the first byte reaches the client.
+UPSTREAM_RETRY_ATTEMPTS = int(os.getenv("UPSTREAM_RETRY_ATTEMPTS", "3"))
+UPSTREAM_RETRY_BASE_DELAY = float(os.getenv("UPSTREAM_RETRY_BASE_DELAY", "0.5"))
+UPSTREAM_RETRY_MAX_DELAY = float(os.getenv("UPSTREAM_RETRY_MAX_DELAY", "8"))
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_upstream_client() -> httpx.AsyncClient:
+    """Build the app-wide pooled client used for every call to the LLM provider."""
+    headers = {"Authorization": f"Bearer {GROQ_API_KEY}"} if GROQ_API_KEY else {}
+    return httpx.AsyncClient(
+        base_url=GROQ_BASE_URL,
+        headers=headers,
+        http2=UPSTREAM_HTTP2 and _http2_available(),
+        limits=httpx.Limits(
+            max_connections=UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE,
+            keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            connect=UPSTREAM_CONNECT_TIMEOUT,
+            read=UPSTREAM_READ_TIMEOUT,
+            write=UPSTREAM_CONNECT_TIMEOUT,
+            pool=UPSTREAM_POOL_TIMEOUT,
+        ),
+    )
+
+
+def get_upstream_client(request: Request) -> httpx.AsyncClient:
+    """FastAPI dependency returning the client created in the app lifespan."""
+    return request.app.state.upstream_client
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(UPSTREAM_RETRY_MAX_DELAY, UPSTREAM_RETRY_BASE_DELAY * 2**attempt))
+
+
+async def _send_with_retry(
+    client: httpx.AsyncClient, payload: Dict[str, Any], error_message: str, endpoint: str
+) -> httpx.Response:
+    """Open the upstream stream, retrying 429/5xx and transport errors before the first byte."""
+    model = payload.get("model", "")
+    for attempt in range(UPSTREAM_RETRY_ATTEMPTS + 1):
+        retry_after = None
+        try:
+            response = await client.send(
+                client.build_request("POST", "/chat/completions", json=payload), stream=True
+            )
+        except httpx.HTTPError as exc:
+            reason = "transport"
+            if attempt == UPSTREAM_RETRY_ATTEMPTS:
+                UPSTREAM_ERRORS.labels(endpoint, model).inc()
+                model_router.record_failure(model)
+                raise HTTPException(status_code=500, detail=error_message) from exc
+        else:
+            if response.status_code < 400:
+                return response
+            await response.aclose()
+            reason = str(response.status_code)
+            retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+            retryable = response.status_code in RETRYABLE_STATUS
+            too_long = retry_after is not None and retry_after > UPSTREAM_RETRY_MAX_DELAY
+            if not retryable or too_long or attempt == UPSTREAM_RETRY_ATTEMPTS:
+                UPSTREAM_ERRORS.labels(endpoint, model).inc()
+                # Other 4xx mean a bad request or key, not an unhealthy model.
+                if response.status_code == 429 or response.status_code >= 500:
+                    model_router.record_failure(model)
+                if response.status_code == 429:
+                    raise HTTPException(
+                        status_code=429,
+                        detail="AI service rate limit reached, please retry shortly",
+                        headers={"Retry-After": str(math.ceil(retry_after or 1))},
+                    )
+                raise HTTPException(status_code=500, detail=error_message)
+        UPSTREAM_RETRIES.labels(endpoint, model, reason).inc()
+        await asyncio.sleep(max(_backoff(attempt), retry_after or 0))
+    raise AssertionError("unreachable")
+
+
+async def open_chat_completion(
+    client: httpx.AsyncClient,
+    payload: Dict[str, Any],
+    error_message: str,
+    endpoint: str,
+    requester: str,
+) -> "CompletionStream":
+    """Admit the request through the governor and open the upstream stream.
+
+    Runs before the StreamingResponse is created, so queue rejections and
+    upstream failures still reach the client as a proper 429/500/503.
+    `endpoint` labels the upstream metrics (TTFT, duration, bytes, tokens/s).
+    """
+    payload = {**payload, "stream": True, "stream_options": {"include_usage": True}}
+    try:
+        await llm_governor.acquire(requester)
+    except AdmissionRejected as exc:
+        LLM_ADMISSION_REJECTED.labels(str(exc.status_code)).inc()
+        raise HTTPException(
+            status_code=exc.status_code,
+            detail=exc.message,
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+
+    start = time.perf_counter()
+    try:
+        response = await _send_with_retry(client, payload, error_message, endpoint)
+    except BaseException:
+        llm_governor.release()
+        raise
+    return CompletionStream(response, payload.get("model", ""), error_message, endpoint, start)
+
+
+class CompletionStream:
+    """Compact SSE re-emission of an admitted upstream stream (see sse.py).
+
+    Holds a governor slot until closed. Pass `aclose` as the StreamingResponse
+    background task too, so the slot is returned even if the client
+    disconnects before the body starts.
+    """
+
+    def __init__(
+        self, response: httpx.Response, model: str, error_message: str, endpoint: str, start: float
+    ):
+        self.response = response
+        self.model = model
+        self.error_message = error_message
+        self.endpoint = endpoint
+        self.start = start
+        self.ttft = None
+        self.size = 0
+        self.sent = 0
+        self.deltas = 0
+        self.finish_reason = None
+        self.usage = None
+        self.failed = False
+        self._parts: Optional[List[str]] = None
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            async for event in self._events():
+                self.sent += len(event)
+                yield event
+        finally:
+            await self.aclose()
+
+    async def _events(self) -> AsyncIterator[bytes]:
+        parser = SSEParser()
+        chunks = self.response.aiter_bytes()
+        pending = None
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(_next_chunk(chunks))
+                done, _ = await asyncio.wait({pending}, timeout=SSE_HEARTBEAT_INTERVAL)
+                if not done:
+                    yield HEARTBEAT
+                    continue
+                chunk = pending.result()
+                pending = None
+                if chunk is None:
+                    break
+                if self.ttft is None:
+                    self.ttft = time.perf_counter() - self.start
+                self.size += len(chunk)
+                for data in parser.feed(chunk):
+                    if data == "[DONE]":
+                        continue
+                    event = self._handle(orjson.loads(data))
+                    if event:
+                        yield event
+        except (httpx.HTTPError, orjson.JSONDecodeError, ValueError):
+            UPSTREAM_ERRORS.labels(self.endpoint, self.model).inc()
+            self.failed = True
+            yield error_event(self.error_message)
+            return
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+        if self.finish_reason is None:
+            UPSTREAM_ERRORS.labels(self.endpoint, self.model).inc()
+            self.failed = True
+            yield error_event(self.error_message)
+            return
+        yield done_event(self.finish_reason, self.usage)
+
+    def _handle(self, chunk: Dict[str, Any]) -> Optional[bytes]:
+        if "error" in chunk:
+            raise ValueError(chunk["error"])
+        # OpenAI puts usage on a final choice-less chunk; Groq also sends x_groq.usage.
+        usage = chunk.get("usage") or (chunk.get("x_groq") or {}).get("usage")
+        if usage:
+            self.usage = {
+                key: usage[key]
+                for key in ("prompt_tokens", "completion_tokens", "total_tokens")
+                if key in usage
+            }
+        choices = chunk.get("choices") or []
+        if not choices:
+            return None
+        choice = choices[0]
+        if choice.get("finish_reason"):
+            self.finish_reason = choice["finish_reason"]
+        content = (choice.get("delta") or {}).get("content")
+        if not content:
+            return None
+        self.deltas += 1
+        if self._parts is not None:
+            self._parts.append(content)
+        return delta_event(content)
+
+    def collect_text(self) -> None:
+        """Keep the content deltas so `text` holds the full reply once the stream ends."""
+        if self._parts is None:
+            self._parts = []
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts or ())
+
+    @property
+    def completed(self) -> bool:
+        return not self.failed and self.finish_reason is not None
+
+    async def read_text(self) -> str:
+        """Consume the whole stream and return the assembled content."""
+        self.collect_text()
+        async for _ in self:
+            pass
+        if not self.completed:
+            raise HTTPException(status_code=500, detail=self.error_message)
+        return self.text
+
+    async def aclose(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        llm_governor.release()
+        if self.ttft is not None:
+            model_router.record_ttft(self.model, self.ttft)
+        elif self.failed:
+            model_router.record_failure(self.model)
+        observe_upstream_stream(
+            self.endpoint,
+            self.model,
+            self.ttft,
+            time.perf_counter() - self.start,
+            self.size,
+            self.sent,
+            self.usage or {"completion_tokens": self.deltas},
+        )
+        await self.response.aclose()
+
+
+async def _next_chunk(chunks: AsyncIterator[bytes]) -> Optional[bytes]:
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return None
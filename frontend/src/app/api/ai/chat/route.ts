@@ -1,20 +1,34 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { getBackendUrl } from '@/lib/api-urls';
 
+// Lets the backend queue AI requests fairly per user (or per client address).
+function forwardedHeaders(req: NextRequest): Record<string, string> {
+    const headers: Record<string, string> = { 'Content-Type': 'application/json' };
+    const authToken = req.cookies.get('auth_token')?.value;
+    if (authToken) {
+        headers['Authorization'] = `Bearer ${authToken}`;
+    }
+    const forwardedFor = req.headers.get('x-forwarded-for');
+    if (forwardedFor) {
+        headers['X-Forwarded-For'] = forwardedFor;
+    }
+    return headers;
+}
+
 export async function POST(req: NextRequest) {
     try {
         const body = await req.json();
 
-        if (!body.messages || !Array.isArray(body.messages)) {
+        if (typeof body.message !== 'string' || !body.message.trim()) {
             return NextResponse.json(
-                { message: 'Messages array is required' },
+                { message: 'Message is required' },
                 { status: 400 }
             );
         }
 
         const res = await fetch(`${getBackendUrl()}/api/ai/chat`, {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers: forwardedHeaders(req),
             body: JSON.stringify(body),
         });
 
@@ -22,17 +36,24 @@ export async function POST(req: NextRequest) {
             const data = await res.json().catch(() => ({ detail: res.statusText }));
             return NextResponse.json(
                 { message: data.detail ?? 'AI chat request failed' },
-                { status: res.status }
+                {
+                    status: res.status,
+                    headers: res.headers.has('retry-after')
+                        ? { 'Retry-After': res.headers.get('retry-after')! }
+                        : undefined,
+                }
             );
         }
 
         // Stream the response from FastAPI directly to the client
-        const contentType = res.headers.get('content-type') ?? 'text/plain; charset=utf-8';
+        const contentType = res.headers.get('content-type') ?? 'text/event-stream';
         return new NextResponse(res.body, {
             status: res.status,
             headers: {
                 'Content-Type': contentType,
+                'Cache-Control': 'no-cache',
                 'Transfer-Encoding': 'chunked',
+                'X-Conversation-Id': res.headers.get('x-conversation-id') ?? '',
             },
         });
     } catch (error) {
@@ -12,7 +12,7 @@ function getAuthHeaders(req: NextRequest): HeadersInit {
 
 export async function GET(req: NextRequest) {
     try {
-        const res = await fetch(`${getBackendUrl()}/api/assignments`, {
+        const res = await fetch(`${getBackendUrl()}/api/assignments${req.nextUrl.search}`, {
             method: 'GET',
             headers: getAuthHeaders(req),
         });
@@ -13,7 +13,7 @@ function getAuthHeaders(req: NextRequest): HeadersInit {
 
 export async function GET(req: NextRequest) {
     try {
-        const res = await fetch(`${getBackendUrl()}/api/history/quiz`, {
+        const res = await fetch(`${getBackendUrl()}/api/history/quiz${req.nextUrl.search}`, {
             method: 'GET',
             headers: getAuthHeaders(req),
         });
@@ -1,34 +1,58 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { getBackendUrl } from '@/lib/api-urls';
 
+// Lets the backend queue AI requests fairly per user (or per client address).
+function forwardedHeaders(req: NextRequest): Record<string, string> {
+    const headers: Record<string, string> = { 'Content-Type': 'application/json' };
+    const authToken = req.cookies.get('auth_token')?.value;
+    if (authToken) {
+        headers['Authorization'] = `Bearer ${authToken}`;
+    }
+    const forwardedFor = req.headers.get('x-forwarded-for');
+    if (forwardedFor) {
+        headers['X-Forwarded-For'] = forwardedFor;
+    }
+    return headers;
+}
+
 export async function POST(request: NextRequest) {
     try {
         const body = await request.json();
-        const { type, documentText } = body;
+        const { type, sessionId } = body;
 
         if (!type || !['explain', 'quiz'].includes(type)) {
             return NextResponse.json({ error: 'Invalid generation type' }, { status: 400 });
         }
 
+        const bypass = request.headers.get('x-cache-bypass');
         const res = await fetch(`${getBackendUrl()}/api/quizzes/generate`, {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ type, documentText }),
+            headers: {
+                ...forwardedHeaders(request),
+                ...(bypass ? { 'X-Cache-Bypass': bypass } : {}),
+            },
+            body: JSON.stringify({ type, sessionId }),
         });
 
         if (!res.ok) {
             const data = await res.json().catch(() => ({}));
             return NextResponse.json(
                 { error: data.detail ?? data.error ?? 'Generation failed' },
-                { status: res.status }
+                {
+                    status: res.status,
+                    headers: res.headers.has('retry-after')
+                        ? { 'Retry-After': res.headers.get('retry-after')! }
+                        : undefined,
+                }
             );
         }
 
-        const contentType = res.headers.get('content-type') ?? 'text/plain; charset=utf-8';
+        const contentType = res.headers.get('content-type') ?? 'text/event-stream';
         return new NextResponse(res.body, {
             status: res.status,
             headers: {
                 'Content-Type': contentType,
+                'Cache-Control': 'no-cache',
                 'Transfer-Encoding': 'chunked',
             },
         });
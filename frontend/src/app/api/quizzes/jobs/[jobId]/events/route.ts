@@ -0,0 +1,51 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { getBackendUrl } from '@/lib/api-urls';
+
+function forwardedHeaders(req: NextRequest): Record<string, string> {
+    const headers: Record<string, string> = {};
+    const authToken = req.cookies.get('auth_token')?.value;
+    if (authToken) {
+        headers['Authorization'] = `Bearer ${authToken}`;
+    }
+    const forwardedFor = req.headers.get('x-forwarded-for');
+    if (forwardedFor) {
+        headers['X-Forwarded-For'] = forwardedFor;
+    }
+    return headers;
+}
+
+export async function GET(
+    req: NextRequest,
+    { params }: { params: Promise<{ jobId: string }> }
+) {
+    try {
+        const { jobId } = await params;
+        const res = await fetch(
+            `${getBackendUrl()}/api/quizzes/jobs/${encodeURIComponent(jobId)}/events`,
+            { headers: forwardedHeaders(req) }
+        );
+
+        if (!res.ok) {
+            const data = await res.json().catch(() => ({}));
+            return NextResponse.json(
+                { error: data.error ?? 'Generation job not found' },
+                { status: res.status }
+            );
+        }
+
+        return new NextResponse(res.body, {
+            status: res.status,
+            headers: {
+                'Content-Type': 'text/event-stream',
+                'Cache-Control': 'no-cache',
+                'Transfer-Encoding': 'chunked',
+            },
+        });
+    } catch (error) {
+        console.error('Generation job events proxy error:', error);
+        return NextResponse.json(
+            { error: 'Failed to stream generation job' },
+            { status: 500 }
+        );
+    }
+}
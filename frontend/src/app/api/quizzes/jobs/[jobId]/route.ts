@@ -0,0 +1,36 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { getBackendUrl } from '@/lib/api-urls';
+
+function forwardedHeaders(req: NextRequest): Record<string, string> {
+    const headers: Record<string, string> = {};
+    const authToken = req.cookies.get('auth_token')?.value;
+    if (authToken) {
+        headers['Authorization'] = `Bearer ${authToken}`;
+    }
+    const forwardedFor = req.headers.get('x-forwarded-for');
+    if (forwardedFor) {
+        headers['X-Forwarded-For'] = forwardedFor;
+    }
+    return headers;
+}
+
+export async function GET(
+    req: NextRequest,
+    { params }: { params: Promise<{ jobId: string }> }
+) {
+    try {
+        const { jobId } = await params;
+        const res = await fetch(
+            `${getBackendUrl()}/api/quizzes/jobs/${encodeURIComponent(jobId)}`,
+            { headers: forwardedHeaders(req) }
+        );
+        const data = await res.json().catch(() => ({}));
+        return NextResponse.json(data, { status: res.status });
+    } catch (error) {
+        console.error('Generation job proxy error:', error);
+        return NextResponse.json(
+            { error: 'Failed to load generation job' },
+            { status: 500 }
+        );
+    }
+}
@@ -0,0 +1,51 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { getBackendUrl } from '@/lib/api-urls';
+
+// Jobs belong to the requester the backend derives from these headers.
+function forwardedHeaders(req: NextRequest): Record<string, string> {
+    const headers: Record<string, string> = { 'Content-Type': 'application/json' };
+    const authToken = req.cookies.get('auth_token')?.value;
+    if (authToken) {
+        headers['Authorization'] = `Bearer ${authToken}`;
+    }
+    const forwardedFor = req.headers.get('x-forwarded-for');
+    if (forwardedFor) {
+        headers['X-Forwarded-For'] = forwardedFor;
+    }
+    return headers;
+}
+
+export async function POST(request: NextRequest) {
+    try {
+        const body = await request.json();
+        const { type, sessionId } = body;
+
+        if (!type || !['explain', 'quiz'].includes(type)) {
+            return NextResponse.json({ error: 'Invalid generation type' }, { status: 400 });
+        }
+
+        const bypass = request.headers.get('x-cache-bypass');
+        const res = await fetch(`${getBackendUrl()}/api/quizzes/jobs`, {
+            method: 'POST',
+            headers: {
+                ...forwardedHeaders(request),
+                ...(bypass ? { 'X-Cache-Bypass': bypass } : {}),
+            },
+            body: JSON.stringify({ type, sessionId }),
+        });
+
+        const data = await res.json().catch(() => ({}));
+        return NextResponse.json(data, {
+            status: res.status,
+            headers: res.headers.has('retry-after')
+                ? { 'Retry-After': res.headers.get('retry-after')! }
+                : undefined,
+        });
+    } catch (error) {
+        console.error('Generation job proxy error:', error);
+        return NextResponse.json(
+            { error: 'Failed to queue generation' },
+            { status: 500 }
+        );
+    }
+}
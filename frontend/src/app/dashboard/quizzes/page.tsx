@@ -39,12 +39,22 @@ export default function QuizzesPage() {
         setAssignmentsLoading(true);
         setAssignmentsError(null);
         try {
-            const res = await fetch('/api/assignments', { credentials: 'include' });
-            const data = await res.json().catch(() => ({}));
-            if (!res.ok) {
-                throw new Error(data.message ?? 'Failed to load assignments');
-            }
-            setAssignments(data.assignments ?? []);
+            // The list is keyset-paginated; follow next_cursor until the last page.
+            const all: AssignmentItem[] = [];
+            let cursor: string | null = null;
+            do {
+                const params = new URLSearchParams({ limit: '200' });
+                if (cursor) params.set('cursor', cursor);
+                const res: Response = await fetch(`/api/assignments?${params}`, { credentials: 'include' });
+                const data: { assignments?: AssignmentItem[]; next_cursor?: string | null; message?: string } =
+                    await res.json().catch(() => ({}));
+                if (!res.ok) {
+                    throw new Error(data.message ?? 'Failed to load assignments');
+                }
+                all.push(...(data.assignments ?? []));
+                cursor = data.next_cursor ?? null;
+            } while (cursor);
+            setAssignments(all);
         } catch (err) {
             setAssignmentsError(err instanceof Error ? err.message : 'Failed to load assignments');
             setAssignments([]);
@@ -170,8 +180,8 @@ export default function QuizzesPage() {
                 throw new Error(data.details ?? data.error ?? data.message ?? 'Failed to process file');
             }
 
-            if (data.extractedText) {
-                sessionStorage.setItem('mentoro-document-text', data.extractedText);
+            if (data.sessionId) {
+                sessionStorage.setItem('mentoro-session-id', data.sessionId);
             }
 
             router.push(`/dashboard/quizzes/result?type=${type}`);
@@ -397,7 +407,7 @@ export default function QuizzesPage() {
                         ref={fileInputRef}
                         style={{ display: 'none' }}
                         onChange={handleFileChange}
-                        accept=".pdf,.doc,.docx,.xlsx,.txt,.md"
+                        accept=".pdf,.docx,.xlsx,.txt,.md"
                     />
 
                     <Button variant="secondary" className={styles.uploadBtn} onClick={handleUploadClick} disabled={isProcessing}>
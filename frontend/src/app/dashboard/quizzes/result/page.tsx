@@ -7,20 +7,22 @@ import styles from './page.module.css';
 import { Button } from '@/components/ui/Button';
 import { DocumentChat } from '@/components/DocumentChat';
 import { QuizPlayer, Question } from '@/components/QuizPlayer';
+import { readAIStream } from '@/lib/sse';
 
 function ResultContent() {
     const searchParams = useSearchParams();
     const router = useRouter();
     const type = searchParams.get('type');
+    const regenerate = searchParams.get('regenerate') === '1';
     const [summary, setSummary] = useState('');
     const [questions, setQuestions] = useState<Question[]>([]);
-    const [documentText, setDocumentText] = useState<string | null>(null);
+    const [sessionId, setSessionId] = useState<string | null>(null);
     const [isLoading, setIsLoading] = useState(true);
     const [error, setError] = useState<string | null>(null);
 
     useEffect(() => {
         if (typeof window !== 'undefined') {
-            setDocumentText(sessionStorage.getItem('mentoro-document-text'));
+            setSessionId(sessionStorage.getItem('mentoro-session-id'));
         }
     }, []);
 
@@ -32,94 +34,33 @@ function ResultContent() {
 
         const fetchData = async () => {
             try {
-                const docText = typeof window !== 'undefined' ? sessionStorage.getItem('mentoro-document-text') : null;
+                const docSessionId = typeof window !== 'undefined' ? sessionStorage.getItem('mentoro-session-id') : null;
 
                 const response = await fetch('/api/quizzes/generate', {
                     method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ type, documentText: docText }),
+                    headers: {
+                        'Content-Type': 'application/json',
+                        ...(regenerate ? { 'X-Cache-Bypass': '1' } : {}),
+                    },
+                    body: JSON.stringify({ type, sessionId: docSessionId }),
                 });
 
                 if (!response.ok) throw new Error('Generation failed');
 
                 if (type === 'explain') {
-                    const reader = response.body?.getReader();
-                    if (!reader) throw new Error('No body');
-                    const decoder = new TextDecoder();
                     let fullText = '';
-
-                    while (true) {
-                        const { done, value } = await reader.read();
-                        if (done) break;
-                        const text = decoder.decode(value, { stream: true });
-                        const lines = text.split('\n');
-                        for (const line of lines) {
-                            if (line.startsWith('data: ') && line !== 'data: [DONE]') {
-                                try {
-                                    const json = JSON.parse(line.slice(6));
-                                    const delta = json.choices?.[0]?.delta?.content;
-                                    if (delta) {
-                                        fullText += delta;
-                                        setSummary((prev) => prev + delta);
-                                    }
-                                } catch {}
-                            }
-                        }
-                    }
+                    await readAIStream(response, (delta) => {
+                        fullText += delta;
+                        setSummary((prev) => prev + delta);
+                    });
                     setSummary(fullText);
                     setIsLoading(false);
 
                 } else if (type === 'quiz') {
-                    // For quiz, we need to wait for the full stream to parse JSON
-                    // Or ideally, the API should just return JSON for quiz if we aren't streaming.
-                    // Since existing API streams, let's accumulate and parse.
-                    const reader = response.body?.getReader();
-                    if (!reader) throw new Error('No body');
-                    const decoder = new TextDecoder();
-                    let fullText = '';
-
-                    while (true) {
-                        const { done, value } = await reader.read();
-                        if (done) break;
-                        const text = decoder.decode(value, { stream: true });
-                        const lines = text.split('\n');
-                        for (const line of lines) {
-                            if (line.startsWith('data: ') && line !== 'data: [DONE]') {
-                                try {
-                                    const json = JSON.parse(line.slice(6));
-                                    const delta = json.choices?.[0]?.delta?.content;
-                                    if (delta) fullText += delta;
-                                } catch {}
-                            }
-                        }
-                    }
-
-                    try {
-                        const parsed = JSON.parse(fullText);
-                        setQuestions(parsed);
-                        setIsLoading(false);
-                    } catch (e) {
-                        console.error("JSON Parse Error", e);
-                        console.log("Raw LLM Output:", fullText); // Log raw output for debugging
-
-                        // Attempt to extract JSON from code blocks or raw text
-                        const jsonMatch = fullText.match(/```json\n([\s\S]*?)\n```/) ||
-                            fullText.match(/```\n([\s\S]*?)\n```/) ||
-                            fullText.match(/\[\s*\{[\s\S]*\}\s*\]/); // Try to find array bracket pattern
-
-                        if (jsonMatch) {
-                            try {
-                                const extracted = jsonMatch[1] || jsonMatch[0];
-                                setQuestions(JSON.parse(extracted));
-                                setIsLoading(false);
-                            } catch (jsonErr) {
-                                console.error("Failed to parse extracted JSON", jsonErr);
-                                throw new Error('Failed to parse quiz data');
-                            }
-                        } else {
-                            throw new Error('Failed to parse quiz data. Output was not valid JSON.');
-                        }
-                    }
+                    // Quizzes are validated and stored by the backend, which returns them as JSON.
+                    const data = await response.json();
+                    setQuestions(data.questions);
+                    setIsLoading(false);
                 }
 
             } catch (err) {
@@ -130,7 +71,7 @@ function ResultContent() {
         };
 
         fetchData();
-    }, [type, router]);
+    }, [type, regenerate, router]);
 
     return (
         <div className={styles.container}>
@@ -158,7 +99,7 @@ function ResultContent() {
                 {error && (
                     <div className={styles.errorContainer}>
                         <p>{error}</p>
-                        <Button onClick={() => window.location.reload()}>
+                        <Button onClick={() => { window.location.href = `/dashboard/quizzes/result?type=${type}&regenerate=1`; }}>
                             <RefreshCw size={16} /> Retry
                         </Button>
                     </div>
@@ -169,7 +110,7 @@ function ResultContent() {
                         {type === 'explain' && (
                             <DocumentChat
                                 initialSummary={summary}
-                                documentText={documentText}
+                                sessionId={sessionId}
                             />
                         )}
                         {type === 'quiz' && <QuizPlayer questions={questions} />}
@@ -4,6 +4,8 @@ import React, { useState, useRef, useEffect } from 'react';
 import { Send, Bot } from 'lucide-react';
 import ReactMarkdown from 'react-markdown';
 import styles from './AIChat.module.css';
+import { sendChatTurn } from '@/lib/chat';
+import { readAIStream } from '@/lib/sse';
 
 interface Message {
     role: 'user' | 'assistant';
@@ -17,6 +19,7 @@ export const AIChat = () => {
     const [input, setInput] = useState('');
     const [isLoading, setIsLoading] = useState(false);
     const messagesEndRef = useRef<HTMLDivElement>(null);
+    const conversationId = useRef<string | null>(null);
 
     const scrollToBottom = () => {
         messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
@@ -36,49 +39,23 @@ export const AIChat = () => {
         setIsLoading(true);
 
         try {
-            const response = await fetch('/api/ai/chat', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    messages: [...messages, userMessage].map(m => ({ role: m.role, content: m.content }))
-                }),
-            });
+            const turn = await sendChatTurn('/api/ai/chat', { message: userMessage.content }, conversationId.current);
+            conversationId.current = turn.conversationId;
+            const response = turn.response;
 
             if (!response.ok) throw new Error(response.statusText);
 
-            // Stream response
-            const reader = response.body?.getReader();
-            const decoder = new TextDecoder();
+            // Add preliminary empty AI message, then fill it as deltas arrive
+            setMessages(prev => [...prev, { role: 'assistant', content: '' }]);
             let aiMessageContent = '';
-
-            if (reader) {
-                // Add preliminary empty AI message
-                setMessages(prev => [...prev, { role: 'assistant', content: '' }]);
-
-                while (true) {
-                    const { done, value } = await reader.read();
-                    if (done) break;
-
-                    const text = decoder.decode(value);
-                    const lines = text.split('\n');
-                    for (const line of lines) {
-                        if (line.startsWith('data: ') && line !== 'data: [DONE]') {
-                            try {
-                                const json = JSON.parse(line.slice(6));
-                                const delta = json.choices?.[0]?.delta?.content;
-                                if (delta) aiMessageContent += delta;
-                            } catch {}
-                        }
-                    }
-
-                    // Update last message with new content
-                    setMessages(prev => {
-                        const newMessages = [...prev];
-                        newMessages[newMessages.length - 1] = { role: 'assistant', content: aiMessageContent };
-                        return newMessages;
-                    });
-                }
-            }
+            await readAIStream(response, (delta) => {
+                aiMessageContent += delta;
+                setMessages(prev => {
+                    const newMessages = [...prev];
+                    newMessages[newMessages.length - 1] = { role: 'assistant', content: aiMessageContent };
+                    return newMessages;
+                });
+            });
         } catch (error) {
             console.error('Chat error:', error);
             setMessages(prev => [...prev, { role: 'assistant', content: 'Sorry, I encountered an error. Please try again later.' }]);
@@ -4,6 +4,8 @@ import React, { useState, useRef, useEffect } from 'react';
 import { Send, Bot } from 'lucide-react';
 import ReactMarkdown from 'react-markdown';
 import styles from './DocumentChat.module.css';
+import { sendChatTurn } from '@/lib/chat';
+import { readAIStream } from '@/lib/sse';
 
 interface Message {
     role: 'user' | 'assistant';
@@ -12,10 +14,10 @@ interface Message {
 
 interface DocumentChatProps {
     initialSummary: string;
-    documentText?: string | null;
+    sessionId?: string | null;
 }
 
-export const DocumentChat = ({ initialSummary, documentText }: DocumentChatProps) => {
+export const DocumentChat = ({ initialSummary, sessionId }: DocumentChatProps) => {
     const [messages, setMessages] = useState<Message[]>(() =>
         initialSummary.trim()
             ? [{ role: 'assistant', content: initialSummary }]
@@ -24,6 +26,7 @@ export const DocumentChat = ({ initialSummary, documentText }: DocumentChatProps
     const [input, setInput] = useState('');
     const [isLoading, setIsLoading] = useState(false);
     const messagesEndRef = useRef<HTMLDivElement>(null);
+    const conversationId = useRef<string | null>(null);
 
     const scrollToBottom = () => {
         messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
@@ -43,55 +46,33 @@ export const DocumentChat = ({ initialSummary, documentText }: DocumentChatProps
         setIsLoading(true);
 
         try {
-            const chatMessages = [...messages, userMessage].map((m) => ({
-                role: m.role,
-                content: m.content,
-            }));
-
-            const response = await fetch('/api/quizzes/chat', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    messages: chatMessages,
-                    documentText: documentText || (typeof window !== 'undefined' ? sessionStorage.getItem('mentoro-document-text') : null) || undefined,
-                }),
-            });
+            const turn = await sendChatTurn(
+                '/api/quizzes/chat',
+                {
+                    message: userMessage.content,
+                    sessionId: sessionId || (typeof window !== 'undefined' ? sessionStorage.getItem('mentoro-session-id') : null) || undefined,
+                },
+                conversationId.current,
+                initialSummary.trim() ? { initialMessage: initialSummary } : {}
+            );
+            conversationId.current = turn.conversationId;
+            const response = turn.response;
 
             if (!response.ok) throw new Error(response.statusText);
 
-            const reader = response.body?.getReader();
-            const decoder = new TextDecoder();
+            setMessages((prev) => [...prev, { role: 'assistant', content: '' }]);
             let aiMessageContent = '';
-
-            if (reader) {
-                setMessages((prev) => [...prev, { role: 'assistant', content: '' }]);
-
-                while (true) {
-                    const { done, value } = await reader.read();
-                    if (done) break;
-
-                    const text = decoder.decode(value);
-                    const lines = text.split('\n');
-                    for (const line of lines) {
-                        if (line.startsWith('data: ') && line !== 'data: [DONE]') {
-                            try {
-                                const json = JSON.parse(line.slice(6));
-                                const delta = json.choices?.[0]?.delta?.content;
-                                if (delta) aiMessageContent += delta;
-                            } catch {}
-                        }
-                    }
-
-                    setMessages((prev) => {
-                        const newMessages = [...prev];
-                        newMessages[newMessages.length - 1] = {
-                            role: 'assistant',
-                            content: aiMessageContent,
-                        };
-                        return newMessages;
-                    });
-                }
-            }
+            await readAIStream(response, (delta) => {
+                aiMessageContent += delta;
+                setMessages((prev) => {
+                    const newMessages = [...prev];
+                    newMessages[newMessages.length - 1] = {
+                        role: 'assistant',
+                        content: aiMessageContent,
+                    };
+                    return newMessages;
+                });
+            });
         } catch (error) {
             console.error('Document chat error:', error);
             setMessages((prev) => [
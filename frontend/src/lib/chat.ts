@@ -0,0 +1,29 @@
+/**
+ * Send one chat turn. The backend keeps the conversation history, so only the
+ * new message goes over the wire; the conversation id comes back in the
+ * X-Conversation-Id header. `startFields` are sent only when a new
+ * conversation is started. If the server no longer has the conversation
+ * (expired or restarted), a new one is started once.
+ */
+export async function sendChatTurn(
+  url: string,
+  fields: Record<string, unknown>,
+  conversationId: string | null,
+  startFields: Record<string, unknown> = {}
+): Promise<{ response: Response; conversationId: string | null }> {
+  const post = (id: string | null) =>
+    fetch(url, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(id ? { ...fields, conversationId: id } : { ...fields, ...startFields }),
+    });
+
+  let response = await post(conversationId);
+  if (response.status === 404 && conversationId) {
+    response = await post(null);
+  }
+  return {
+    response,
+    conversationId: response.headers.get('x-conversation-id') || conversationId,
+  };
+}
@@ -0,0 +1,56 @@
+export interface StreamUsage {
+  prompt_tokens?: number;
+  completion_tokens?: number;
+  total_tokens?: number;
+}
+
+export interface StreamResult {
+  finishReason: string | null;
+  usage: StreamUsage | null;
+}
+
+/**
+ * Read the backend's AI event stream: `data: "<delta>"` content events, a final
+ * `event: done` with finish reason and usage, or `event: error`. Heartbeat
+ * comments (`: ping`) are skipped. Calls `onDelta` for every content delta.
+ */
+export async function readAIStream(
+  response: Response,
+  onDelta: (delta: string) => void
+): Promise<StreamResult> {
+  const reader = response.body?.getReader();
+  if (!reader) throw new Error('No body');
+  const decoder = new TextDecoder();
+  let buffer = '';
+  const result: StreamResult = { finishReason: null, usage: null };
+
+  const handle = (raw: string) => {
+    let event = 'message';
+    const data: string[] = [];
+    for (const line of raw.split('\n')) {
+      if (line.startsWith('event:')) event = line.slice(6).trim();
+      else if (line.startsWith('data:')) data.push(line.slice(5).replace(/^ /, ''));
+    }
+    if (data.length === 0) return;
+    const payload = JSON.parse(data.join('\n'));
+    if (event === 'done') {
+      result.finishReason = payload.finish_reason ?? null;
+      result.usage = payload.usage ?? null;
+    } else if (event === 'error') {
+      throw new Error(payload.message ?? 'Stream failed');
+    } else if (typeof payload === 'string') {
+      onDelta(payload);
+    }
+  };
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const events = buffer.split('\n\n');
+    buffer = events.pop() ?? '';
+    events.forEach(handle);
+  }
+  if (buffer.trim()) handle(buffer);
+  return result;
+}